@@ -1,3 +1,5 @@
+from functools import partial
+
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -6,7 +8,17 @@ import plotly.express as px
 import plotly.graph_objects as go
 
 # Imports dos novos módulos multi-canal
+from data_processing.abc import ABC_CLASSES, WhatIfABC, abc_classes, abc_transitions
+from data_processing.analysis import AnalysisResult, build_analysis
 from data_processing.factory import detect_and_process
+from data_processing.report_cache import ReportCache, content_hash
+from data_processing.mercado_livre_processor import MercadoLivreProcessor
+from data_processing.periods import (
+    DEFAULT_WINDOWS, PeriodEngine, monthly_windows, parse_windows, period_columns, period_labels,
+    weekly_windows,
+)
+from data_processing.sales_matrix import SalesMatrix
+from data_processing.workbook import ParsedWorkbook
 from ui.components.shopee_components import (
     render_shopee_conversion_funnel,
     render_shopee_engagement_metrics,
@@ -1371,7 +1383,7 @@ def render_abc_quadrant(df_abc_summary: pd.DataFrame, df_abc_details: pd.DataFra
     # Botão de exportação logo abaixo dos cards
     st.download_button(
         label=f"📥 Gerar Relatório Excel Curva ABC ({period})",
-        data=to_xlsx_bytes(df_abc_details),
+        data=partial(to_xlsx_bytes, df_abc_details),
         file_name=f"relatorio_curva_abc_{period.replace('-', '_')}.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         use_container_width=True,
@@ -1434,19 +1446,19 @@ def render_tactical_card(row: dict, frente: str):
   </div>
   <div class='tactical-metrics'>
     <div class='tactical-metric'>
-      <div class='tactical-metric-value'>{row.get('Curva 0-30', '-')}</div>
+      <div class='tactical-metric-value'>{row.get(CURVE_COLS[0], '-')}</div>
       <div class='tactical-metric-label'>Curva Atual</div>
     </div>
     <div class='tactical-metric'>
-      <div class='tactical-metric-value'>{row.get('Curva 31-60', '-')}</div>
+      <div class='tactical-metric-value'>{row.get(CURVE_COLS[1], '-')}</div>
       <div class='tactical-metric-label'>Curva Anterior</div>
     </div>
     <div class='tactical-metric'>
-      <div class='tactical-metric-value'>{br_money(float(row.get('Fat. 0-30', 0))) if row.get('Fat. 0-30') else '-'}</div>
+      <div class='tactical-metric-value'>{br_money(float(row.get(FAT_COLS[0], 0))) if row.get(FAT_COLS[0]) else '-'}</div>
       <div class='tactical-metric-label'>Fat. Atual</div>
     </div>
     <div class='tactical-metric'>
-      <div class='tactical-metric-value'>{br_int(row.get('Qntd 0-30', 0))}</div>
+      <div class='tactical-metric-value'>{br_int(row.get(QTY_COLS[0], 0))}</div>
       <div class='tactical-metric-label'>Qtd. Atual</div>
     </div>
   </div>
@@ -1557,6 +1569,93 @@ def section_header(title: str, desc: str, icon: str = "📊", color: str = "purp
 def section_footer():
     st.markdown("</div>", unsafe_allow_html=True)
 
+def whatif_session(key, df_f: pd.DataFrame, fat_col: str) -> dict:
+    """Simulador de cenários guardado na sessão, um por análise e janela: o WhatIfABC
+    é montado uma vez e cada rerun só aplica o que mudou nos widgets (whatif_apply)."""
+    state = st.session_state.get("_whatif")
+    if state is None or state["key"] != key:
+        engine = WhatIfABC(df_f[fat_col].to_numpy(dtype=float))
+        state = {
+            "key": key,
+            "engine": engine,
+            "base_revenue": engine.revenue.copy(),
+            "base_codes": engine.codes.copy(),
+            "base_counts": np.bincount(engine.codes, minlength=len(ABC_CLASSES)),
+            "labels": (df_f["MLB"].astype(str) + " - " + df_f["Título"].astype(str)).tolist(),
+            "targets": {},      # anúncio -> faturamento simulado
+            "changed": set(),   # anúncios com curva diferente da atual
+        }
+        st.session_state["_whatif"] = state
+    return state
+
+def whatif_apply(state: dict, targets: dict):
+    """Leva o simulador ao cenário `targets` (anúncio -> faturamento simulado), editando
+    só os anúncios que entraram, saíram ou mudaram de valor desde o rerun anterior."""
+    engine, base_codes = state["engine"], state["base_codes"]
+    for item in set(state["targets"]) | set(targets):
+        value = targets.get(item, state["base_revenue"][item])
+        if value == engine.revenue[item]:
+            continue
+        for moved in engine.set_revenue(item, value).tolist():
+            if engine.codes[moved] != base_codes[moved]:
+                state["changed"].add(moved)
+            else:
+                state["changed"].discard(moved)
+    state["targets"] = dict(targets)
+
+def render_rolling_abc(skus: pd.DataFrame, days: pd.DatetimeIndex, codes: np.ndarray, edge: int):
+    """Mudanças diárias de curva (janela móvel) e a trajetória de um anúncio."""
+    section_header("Trajetória ABC Diária", f"Curva de cada anúncio na janela móvel de 0-{edge} dias", "📈", "purple")
+    # Nos primeiros dias do relatório a janela ainda está incompleta
+    first = min(edge, len(days) - 1)
+    codes, days = codes[:, first:], days[first:]
+    up, down = abc_transitions(codes)
+
+    changes = pd.DataFrame({
+        "Dia": np.tile(days, 2),
+        "Anúncios": np.concatenate([up, -down]),
+        "Mudança": np.repeat(["Subiram", "Caíram"], len(days)),
+    })
+    fig = px.bar(changes, x="Dia", y="Anúncios", color="Mudança",
+                 color_discrete_map={"Subiram": "#22c55e", "Caíram": "#ef4444"})
+    fig.update_layout(
+        barmode="relative",
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        margin=dict(l=20, r=20, t=20, b=20),
+        font=dict(color='#9ca3af'),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    # Anúncios que saíram da curva A no período exibido, com o dia da última saída
+    left_a = (codes[:, :-1] == 0) & (codes[:, 1:] != 0)
+    lost = np.flatnonzero(left_a.any(axis=1))
+    if len(lost):
+        last_exit = left_a.shape[1] - np.argmax(left_a[lost, ::-1], axis=1)
+        slipping = skus.iloc[lost].rename(columns={'mlb': 'MLB', 'titulo': 'Título'}).assign(**{
+            "Saiu da A em": days[last_exit].strftime("%d/%m/%Y"),
+            "Curva atual": np.asarray(ABC_CLASSES)[codes[lost, -1]],
+        })
+        st.dataframe(slipping, use_container_width=True, hide_index=True, height=220)
+
+    labels = (skus['mlb'].astype(str) + " - " + skus['titulo'].astype(str)).tolist()
+    changed = np.flatnonzero((codes != codes[:, :1]).any(axis=1))
+    if len(changed):
+        pick = st.selectbox("Anúncio", options=changed, format_func=lambda i: labels[i], key="rolling_abc_sku")
+        trajectory = pd.DataFrame({"Dia": days, "Curva": np.asarray(ABC_CLASSES)[codes[pick]]})
+        fig_sku = px.line(trajectory, x="Dia", y="Curva", line_shape="hv", markers=True,
+                          category_orders={"Curva": ABC_CLASSES})
+        fig_sku.update_traces(line_color='#a78bfa', marker_color='#c4b5fd')
+        fig_sku.update_layout(
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            margin=dict(l=20, r=20, t=20, b=20),
+            font=dict(color='#9ca3af')
+        )
+        st.plotly_chart(fig_sku, use_container_width=True)
+    section_footer()
+
 def render_front_card(icon: str, title: str, desc: str, itens: int, fat: float, card_type: str, filename: str, df_seg: pd.DataFrame):
     """Renderiza card de frente com download"""
     icon_map = {
@@ -1594,7 +1693,7 @@ def render_front_card(icon: str, title: str, desc: str, itens: int, fat: float,
     )
     st.download_button(
         f"📥 Baixar {title}",
-        data=to_xlsx_bytes(df_seg),
+        data=partial(to_xlsx_bytes, df_seg),
         file_name=filename,
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         key=f"dl_{title}_{filename}",
@@ -1642,400 +1741,216 @@ def ensure_cols(df: pd.DataFrame, cols: list) -> pd.DataFrame:
 
 rank = {"-": 0, "C": 1, "B": 2, "A": 3}
 
-# Períodos em ordem decrescente (mais antigo primeiro)
-periods = [
-    ("91-120", "Curva 91-120", "Qntd 91-120", "Fat. 91-120"),
-    ("61-90", "Curva 61-90", "Qntd 61-90", "Fat. 61-90"),
-    ("31-60", "Curva 31-60", "Qntd 31-60", "Fat. 31-60"),
-    ("0-30", "Curva 0-30", "Qntd 0-30", "Fat. 0-30"),
-]
-
-QTY_COLS = ["Qntd 0-30", "Qntd 31-60", "Qntd 61-90", "Qntd 91-120"]
-FAT_COLS = ["Fat. 0-30", "Fat. 31-60", "Fat. 61-90", "Fat. 91-120"]
-CURVE_COLS = ["Curva 0-30", "Curva 31-60", "Curva 61-90", "Curva 91-120"]
+# Janelas de análise oferecidas no painel (dia final de cada janela)
+PERIOD_PRESETS = {
+    "4 janelas de 30 dias": DEFAULT_WINDOWS,
+    "Semanal (12 semanas)": tuple(weekly_windows(12)),
+    "Mensal (12 meses)": tuple(monthly_windows(12)),
+    "Personalizado": None,
+}
 
-# =========================
-# Loaders
-# =========================
-@st.cache_data
-def _transform_ml_raw(file) -> tuple:
-    """Converte o relatorio bruto de vendas do Mercado Livre (120 dias) na estrutura 'Export'.
-    Retorna: (df_export, df_logistics, df_ads)
-    """
+# O diagnóstico compara a janela atual com as três anteriores
+MIN_WINDOWS = 4
 
-    def _seek0(f):
-        try:
-            f.seek(0)
-        except Exception:
-            pass
-
-    def _pick_col(cols, target: str) -> str:
-        if target in cols:
-            return target
-        for c in cols:
-            sc = str(c).strip()
-            if sc.startswith(target + "."):
-                return c
-        t = target.lower()
-        for c in cols:
-            if t in str(c).lower():
-                return c
-        raise KeyError(f"Coluna '{target}' não encontrada")
-
-    def _try_pick_col(cols, target: str):
-        try:
-            return _pick_col(cols, target)
-        except KeyError:
-            return None
 
-    _seek0(file)
-    preview = pd.read_excel(file, sheet_name=0, header=None, nrows=80)
+def windows_caption(edges) -> str:
+    """Descrição das janelas para os textos do painel ("4 janelas de 30 dias")."""
+    widths = set(np.diff((0,) + tuple(edges)).tolist())
+    if len(widths) == 1:
+        return f"{len(edges)} janelas de {widths.pop()} dias"
+    return f"{len(edges)} janelas personalizadas (até {edges[-1]} dias)"
 
-    header_row = None
-    for i in range(min(60, len(preview))):
-        row = preview.iloc[i].astype(str).str.lower()
-        if row.str.contains('data da venda', na=False).any() or row.str.contains('# de anúncio', na=False).any() or row.str.contains('de anúncio', na=False).any():
-            header_row = i
-            break
-    if header_row is None:
-        header_row = 0
 
-    _seek0(file)
-    df = pd.read_excel(file, sheet_name=0, header=header_row)
-    df.columns = [str(c).strip() for c in df.columns]
+# Cache persistente dos relatórios processados (chave = SHA-256 do conteúdo + versão do motor)
+report_cache = ReportCache()
 
-    col_data = _pick_col(df.columns, 'Data da venda')
-    col_unid = _pick_col(df.columns, 'Unidades')
+# Planilhas já abertas são identificadas pelo hash do conteúdo no cache do Streamlit
+WORKBOOK_HASH_FUNCS = {ParsedWorkbook: lambda wb: wb.digest}
 
+# =========================
+# Loaders
+# =========================
+def _is_export_sheet(workbook: ParsedWorkbook) -> bool:
+    """Planilha pronta (aba Export) em vez de relatório bruto de vendas do ML."""
     try:
-        col_rec = _pick_col(df.columns, 'Receita por produtos (BRL)')
+        return 'Export' in [str(s) for s in workbook.sheet_names]
     except Exception:
-        col_rec = _pick_col(df.columns, 'Receita por produtos')
+        return False
 
-    col_mlb = _pick_col(df.columns, '# de anúncio')
-    col_sku = _try_pick_col(df.columns, 'SKU')
-    col_tit = _pick_col(df.columns, 'Título do anúncio')
-    col_log = _pick_col(df.columns, 'Forma de entrega')
-    
-    # Nova coluna: Venda por publicidade (nome correto do ML)
-    col_ads = None
-    ads_variations = [
-        'Venda por publicidade',  # Nome correto do ML
-        'Venda por Publicidade',
-        'Vendas por Publicidade',
-        'Vendas por publicidade', 
-        'vendas por publicidade',
-        'venda por publicidade',
-        'Publicidade',
-        'publicidade',
-    ]
-    for var in ads_variations:
-        col_ads = _try_pick_col(df.columns, var)
-        if col_ads is not None:
-            break
-    
-    # Se ainda não encontrou, busca parcial por "publicidade"
-    if col_ads is None:
-        for c in df.columns:
-            c_lower = str(c).lower().strip()
-            if 'publicidade' in c_lower:
-                col_ads = c
-                break
-
-    use_cols = [col_data, col_unid, col_rec, col_mlb, col_tit, col_log]
-    if col_sku is not None:
-        use_cols.insert(4, col_sku)
-    if col_ads is not None:
-        use_cols.append(col_ads)
-
-    base = df[use_cols].copy()
-
-    # Renomear colunas
-    if col_sku is None and col_ads is None:
-        base.columns = ['data', 'unidades', 'receita', 'mlb', 'titulo', 'logistica']
-        base['sku'] = ''
-        base['ads'] = ''
-    elif col_sku is None and col_ads is not None:
-        base.columns = ['data', 'unidades', 'receita', 'mlb', 'titulo', 'logistica', 'ads']
-        base['sku'] = ''
-    elif col_sku is not None and col_ads is None:
-        base.columns = ['data', 'unidades', 'receita', 'mlb', 'sku', 'titulo', 'logistica']
-        base['ads'] = ''
-    else:
-        base.columns = ['data', 'unidades', 'receita', 'mlb', 'sku', 'titulo', 'logistica', 'ads']
-
-    base['mlb'] = base['mlb'].astype(str).str.strip()
-    base['sku'] = base['sku'].astype(str).str.strip()
-    base['titulo'] = base['titulo'].astype(str).str.strip()
-    base['logistica'] = base['logistica'].astype(str).str.strip()
-    base['ads'] = base['ads'].astype(str).str.strip().str.lower()
-
-    empty_mlb = base['mlb'].isin(['', 'nan', 'none', 'None', 'NaN'])
-    if empty_mlb.any():
-        base.loc[empty_mlb, 'mlb'] = base.loc[empty_mlb, 'sku']
-
-    base['_data_raw'] = base['data'].astype(str)
-    base['data'] = pd.to_datetime(base['_data_raw'], errors='coerce', dayfirst=True)
-
-    if base['data'].notna().sum() == 0:
-        s = base['_data_raw'].astype(str)
-        for fmt in ('%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y'):
-            tmp = pd.to_datetime(s, errors='coerce', format=fmt)
-            if tmp.notna().sum() > 0:
-                base['data'] = tmp
-                break
-
-    if base['data'].notna().sum() == 0:
-        month_map = {
-            'janeiro': '01', 'fevereiro': '02', 'março': '03', 'marco': '03',
-            'abril': '04', 'maio': '05', 'junho': '06', 'julho': '07',
-            'agosto': '08', 'setembro': '09', 'outubro': '10',
-            'novembro': '11', 'dezembro': '12',
-        }
-        s = base['_data_raw'].astype(str).str.lower()
-        s = s.str.replace('hs.', '', regex=False).str.replace('hs', '', regex=False)
-        for name, num in month_map.items():
-            s = s.str.replace(rf'\b{name}\b', num, regex=True)
-        s = s.str.replace(r'\s*de\s*', '/', regex=True)
-        s = s.str.replace(r'\s+', ' ', regex=True).str.strip()
-        tmp = pd.to_datetime(s, errors='coerce', dayfirst=True)
-        if tmp.notna().sum() > 0:
-            base['data'] = tmp
-
-    base = base.drop(columns=['_data_raw'], errors='ignore')
-    base = base.dropna(subset=['data'])
-    base = base[~base['mlb'].isin(['', 'nan', 'none', 'None', 'NaN'])].copy()
-
-    base['unidades'] = pd.to_numeric(base['unidades'], errors='coerce').fillna(0).astype(int)
-
-    rec = base['receita']
-    if rec.dtype == object:
-        rec = rec.astype(str).str.replace('\u00a0', '', regex=False).str.strip()
-        # Se contiver tanto '.' quanto ',', assume formato BR (1.234,56)
-        if rec.str.contains(r'\.', regex=True).any() and rec.str.contains(r',', regex=True).any():
-            rec = rec.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
-        # Se contiver apenas ',', assume que é o separador decimal (1234,56)
-        elif rec.str.contains(r',', regex=True).any():
-            rec = rec.str.replace(',', '.', regex=False)
-        # Remove símbolos de moeda se existirem
-        rec = rec.str.replace(r'[R\$\s]', '', regex=True)
-        
-    base['receita'] = pd.to_numeric(rec, errors='coerce').fillna(0.0)
 
-    if base.empty:
-        cols = ['MLB','Título'] + [f'Qntd {p}' for p in ['0-30','31-60','61-90','91-120']] + [f'Fat. {p}' for p in ['0-30','31-60','61-90','91-120']] + [f'Curva {p}' for p in ['0-30','31-60','61-90','91-120']]
+def ingest_daily_store(workbooks: list, cliente: str) -> tuple:
+    """Soma as vendas novas dos relatórios brutos do ML ao histórico diário da conta.
+    Roda fora dos caches, uma vez por conjunto de uploads e conta na sessão (vendas já
+    registradas são descartadas, então repetir a carga não duplica nada).
+    Retorna a versão do histórico, que entra na chave dos loaders que o leem.
+    """
+    key = (tuple(wb.digest for wb in workbooks), cliente)
+    if workbooks and not _is_export_sheet(workbooks[0]) and st.session_state.get('_ingested') != key:
+        daily, known_keys = history_manager.load_daily_store(cliente, "Mercado Livre")
+        processor = MercadoLivreProcessor()
+        processor.update_matrix(list(workbooks), daily, known_keys)
+        history_manager.append_daily_store(cliente, "Mercado Livre", processor.new_daily, processor.new_keys)
+        st.session_state['_ingested'] = key
+    return history_manager.daily_store_version(cliente, "Mercado Livre")
+
+
+@st.cache_resource(hash_funcs=WORKBOOK_HASH_FUNCS)
+def _ml_sales_matrix(workbooks: list, cliente: str = "", store_version: tuple = ()) -> tuple:
+    """Matriz anúncio x dia dos relatórios brutos do ML (lida uma vez por conjunto de arquivos).
+    Relatorios com periodos sobrepostos sao lidos em paralelo e as vendas repetidas
+    entre eles sao descartadas (mesmo numero de venda, data e anuncio).
+    Com `cliente`, os relatórios são somados ao histórico diário salvo da conta
+    (atualizado antes por ingest_daily_store); `store_version` é a versão desse
+    histórico e só entra na chave do cache.
+    Retorna: (SalesMatrix, células não numéricas por coluna)
+    """
+    processor = MercadoLivreProcessor()
+    if not cliente:
+        return processor.read_matrix(list(workbooks)), processor.parse_issues
+
+    daily, known_keys = history_manager.load_daily_store(cliente, "Mercado Livre")
+    return processor.update_matrix(list(workbooks), daily, known_keys), processor.parse_issues
+
+
+@st.cache_data(hash_funcs=WORKBOOK_HASH_FUNCS)
+def _transform_ml_raw(workbooks: list, windows: tuple = DEFAULT_WINDOWS, reference=None, cliente: str = "",
+                      store_version: tuple = ()) -> tuple:
+    """Converte um ou mais relatorios brutos de vendas do Mercado Livre na estrutura 'Export'.
+    `windows` define o dia final de cada janela de analise (padrao: 30/60/90/120) e
+    `reference` a data em que as janelas terminam (padrao: a ultima venda).
+    Os totais de cada janela saem da matriz anúncio x dia (_ml_sales_matrix), então
+    mudar as janelas não relê os arquivos. `cliente` ativa a atualização incremental
+    (`store_version`: versão do histórico diário, ver ingest_daily_store).
+    Retorna: (df_export, df_logistics, df_ads, parse_issues)
+    """
+
+    matrix, parse_issues = _ml_sales_matrix(workbooks, cliente, store_version)
+    periods = PeriodEngine(windows, reference)
+    labels = periods.labels
+
+    if matrix.is_empty:
+        cols = ['MLB','Título'] + [f'Qntd {p}' for p in labels] + [f'Fat. {p}' for p in labels] + [f'Curva {p}' for p in labels]
         empty_df = pd.DataFrame(columns=cols)
         empty_log = pd.DataFrame(columns=['periodo', 'full_pct', 'correios_pct', 'flex_pct', 'coleta_pct', 'outros_pct', 
                                           'full_qty', 'correios_qty', 'flex_qty', 'coleta_qty', 'outros_qty',
                                           'full_fat', 'correios_fat', 'flex_fat', 'coleta_fat', 'outros_fat'])
         empty_ads = pd.DataFrame(columns=['periodo', 'ads_pct', 'organic_pct', 'ads_qty', 'organic_qty'])
-        return empty_df, empty_log, empty_ads
-
-    ref = base['data'].max()
-    base['dias'] = (ref - base['data']).dt.days
-
-    def bucket(d):
-        if d <= 30:
-            return '0-30'
-        if d <= 60:
-            return '31-60'
-        if d <= 90:
-            return '61-90'
-        if d <= 120:
-            return '91-120'
-        return None
-
-    base['periodo'] = base['dias'].apply(bucket)
-    base = base.dropna(subset=['periodo'])
-
-    # Classificar logística
-    log_lower = base['logistica'].str.lower()
-    base['is_full'] = log_lower.str.contains('full', na=False)
-    base['is_correios'] = log_lower.str.contains('correios', na=False) | log_lower.str.contains('pontos', na=False) | log_lower.str.contains('ponto de envio', na=False)
-    base['is_flex'] = log_lower.str.contains('flex', na=False)
-    base['is_coleta'] = log_lower.str.contains('coleta', na=False)
-    base['is_outros'] = ~(base['is_full'] | base['is_correios'] | base['is_flex'] | base['is_coleta'])
-    
-    # Classificar vendas por publicidade: "Sim" = venda via Ads, Vazio/outros = Orgânica
-    # Normaliza valores e verifica se é "sim" ou variações
-    ads_lower = base['ads'].astype(str).str.strip().str.lower()
-    base['is_ads'] = ads_lower.isin(['sim', 's', 'yes', 'y', '1', 'true', 'si'])
-    
-    # Debug: contar quantos Ads foram encontrados
-    ads_count = base['is_ads'].sum()
-    total_count = len(base)
-    # st.write(f"DEBUG: {ads_count} vendas via Ads de {total_count} total")
-
-    # Agregar por período para logística
-    logistics_data = []
-    ads_data = []
-    
-    for periodo in ['0-30', '31-60', '61-90', '91-120']:
-        periodo_df = base[base['periodo'] == periodo]
-        total_qty = int(periodo_df['unidades'].sum())
-        
-        if total_qty > 0:
-            full_qty = int(periodo_df[periodo_df['is_full']]['unidades'].sum())
-            correios_qty = int(periodo_df[periodo_df['is_correios']]['unidades'].sum())
-            flex_qty = int(periodo_df[periodo_df['is_flex']]['unidades'].sum())
-            coleta_qty = int(periodo_df[periodo_df['is_coleta']]['unidades'].sum())
-            outros_qty = int(periodo_df[periodo_df['is_outros']]['unidades'].sum())
-            
-            full_fat = float(periodo_df[periodo_df['is_full']]['receita'].sum())
-            correios_fat = float(periodo_df[periodo_df['is_correios']]['receita'].sum())
-            flex_fat = float(periodo_df[periodo_df['is_flex']]['receita'].sum())
-            coleta_fat = float(periodo_df[periodo_df['is_coleta']]['receita'].sum())
-            outros_fat = float(periodo_df[periodo_df['is_outros']]['receita'].sum())
-            
-            logistics_data.append({
-                'periodo': periodo,
-                'full_pct': (full_qty / total_qty) * 100,
-                'correios_pct': (correios_qty / total_qty) * 100,
-                'flex_pct': (flex_qty / total_qty) * 100,
-                'coleta_pct': (coleta_qty / total_qty) * 100,
-                'outros_pct': (outros_qty / total_qty) * 100,
-                'full_qty': full_qty,
-                'correios_qty': correios_qty,
-                'flex_qty': flex_qty,
-                'coleta_qty': coleta_qty,
-                'outros_qty': outros_qty,
-                'full_fat': full_fat,
-                'correios_fat': correios_fat,
-                'flex_fat': flex_fat,
-                'coleta_fat': coleta_fat,
-                'outros_fat': outros_fat,
-                'total_qty': total_qty
-            })
-        
-            # Vendas por publicidade
-            ads_qty = int(periodo_df[periodo_df['is_ads']]['unidades'].sum())
-            organic_qty = total_qty - ads_qty
-            
-            ads_value = float(periodo_df[periodo_df['is_ads']]['receita'].sum())
-            total_value = float(periodo_df['receita'].sum())
-            organic_value = total_value - ads_value
-            
-            ads_data.append({
-                'periodo': periodo,
-                'ads_pct': (ads_qty / total_qty) * 100,
-                'organic_pct': (organic_qty / total_qty) * 100,
-                'ads_qty': ads_qty,
-                'organic_qty': organic_qty,
-                'ads_value': ads_value,
-                'organic_value': organic_value,
-                'total_qty': total_qty
-            })
-        else:
-            logistics_data.append({
-                'periodo': periodo,
-                'full_pct': 0, 'correios_pct': 0, 'flex_pct': 0, 'coleta_pct': 0, 'outros_pct': 0,
-                'full_qty': 0, 'correios_qty': 0, 'flex_qty': 0, 'coleta_qty': 0, 'outros_qty': 0,
-                'full_fat': 0, 'correios_fat': 0, 'flex_fat': 0, 'coleta_fat': 0, 'outros_fat': 0, 'total_qty': 0
-            })
-            ads_data.append({
-                'periodo': periodo,
-                'ads_pct': 0, 'organic_pct': 0, 'ads_qty': 0, 'organic_qty': 0, 
-                'ads_value': 0, 'organic_value': 0, 'total_qty': 0
-            })
-
-    df_logistics = pd.DataFrame(logistics_data)
-    df_ads = pd.DataFrame(ads_data)
-
-    # Agregação para export
-    agg_total = base.groupby(['mlb','titulo','periodo'], as_index=False).agg(
-        unidades=('unidades','sum'),
-        receita=('receita','sum'),
+        return empty_df, empty_log, empty_ads, parse_issues
+
+    # Logística e Ads por período: totais por (dia, forma de entrega, Ads) da matriz
+    # (formas de entrega pela tabela de regras; "Sim" = venda via Ads, Vazio/outros = Orgânica)
+    channels = ['full', 'correios', 'flex', 'coleta', 'outros']
+    totals = matrix.channel_totals(periods, ['unidades', 'receita'])
+    qty = totals['unidades'].round().astype(int)
+    fat = totals['receita']
+    total_qty = qty['total'].to_numpy()
+    share = qty.div(qty['total'].where(qty['total'] > 0), axis=0).fillna(0.0) * 100
+
+    df_logistics = pd.DataFrame({'periodo': labels})
+    for c in channels:
+        df_logistics[f'{c}_pct'] = share[c].to_numpy()
+    for c in channels:
+        df_logistics[f'{c}_qty'] = qty[c].to_numpy()
+    for c in channels:
+        df_logistics[f'{c}_fat'] = fat[c].to_numpy()
+    df_logistics['total_qty'] = total_qty
+
+    organic_qty = total_qty - qty['ads'].to_numpy()
+    df_ads = pd.DataFrame({
+        'periodo': labels,
+        'ads_pct': share['ads'].to_numpy(),
+        'organic_pct': np.divide(organic_qty * 100, total_qty, out=np.zeros(len(labels)), where=total_qty > 0),
+        'ads_qty': qty['ads'].to_numpy(),
+        'organic_qty': organic_qty,
+        'ads_value': fat['ads'].to_numpy(),
+        'organic_value': (fat['total'] - fat['ads']).to_numpy(),
+        'total_qty': total_qty,
+    })
+
+    # Agregação para export: um único bloco anúncio x período x métrica
+    block = matrix.period_matrix(
+        periods, ['unidades', 'receita', 'unidades_full', 'receita_full', 'unidades_ads'],
     )
+    qtd = block['unidades'].round().astype(int)
+    fat = block['receita']
+    qtd_full = block['unidades_full']
+    fat_full = block['receita_full']
+    qtd_ads = block['unidades_ads'].round().astype(int)
+
+    out = block.keys.rename(columns={'mlb':'MLB','titulo':'Título'})
+    out['MLB'] = out['MLB'].astype(object)
+    out['Título'] = out['Título'].astype(object)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share_qtd = np.where(qtd != 0, qtd_full / qtd, 0.0)
+        share_fat = np.where(fat != 0, fat_full / fat, 0.0)
+
+    for i, p in enumerate(labels):
+        out[f'Qntd {p}'] = qtd[:, i]
+        out[f'Fat. {p}'] = fat[:, i]
+        out[f'Share Full Qtd {p}'] = share_qtd[:, i]
+        out[f'Share Full Fat {p}'] = share_fat[:, i]
+        out[f'Logística dom {p}'] = np.where(share_qtd[:, i] >= 0.5, 'FULL', 'NÃO FULL')
+        out[f'Qntd Ads {p}'] = qtd_ads[:, i]
+
+    for p, curva in zip(labels, abc_classes(fat)):
+        out[f'Curva {p}'] = curva
+
+    return out, df_logistics, df_ads, parse_issues
+
+
+@st.cache_data(hash_funcs=WORKBOOK_HASH_FUNCS)
+def _rolling_abc(workbooks: list, edge: int = 30, cliente: str = "", store_version: tuple = ()) -> tuple:
+    """Curva ABC móvel de cada anúncio em cada dia (janela de `edge` dias).
+    Retorna: (anúncios, dias, códigos int8 anúncios x dias)
+    """
+    matrix, _ = _ml_sales_matrix(workbooks, cliente, store_version)
+    return matrix.skus, matrix.days, matrix.rolling_abc(edge)
+
+
+@st.cache_data(hash_funcs=WORKBOOK_HASH_FUNCS)
+def load_main(files: list, windows: tuple = DEFAULT_WINDOWS, reference=None, cliente: str = "",
+              store_version: tuple = ()) -> tuple:
+    """Aceita planilha pronta (aba Export) OU um ou mais relatorios brutos do ML.
+    `windows`/`reference` definem as janelas de analise (ver PeriodEngine).
+    `cliente` ativa a atualização incremental do histórico diário da conta
+    (`store_version`: versão do histórico, ver ingest_daily_store).
+    Retorna: (df_main, df_logistics, df_ads, parse_issues)
+    """
+    engine = PeriodEngine(windows, reference)
+    qty_cols, fat_cols, curve_cols = period_columns(engine.labels)
 
-    agg_full = base[base['is_full']].groupby(['mlb','titulo','periodo'], as_index=False).agg(
-        unidades_full=('unidades','sum'),
-        receita_full=('receita','sum'),
-    )
-
-    agg = agg_total.merge(agg_full, on=['mlb','titulo','periodo'], how='left')
-    agg['unidades_full'] = agg['unidades_full'].fillna(0).astype(int)
-    agg['receita_full'] = agg['receita_full'].fillna(0.0)
-
-    out_q = agg.pivot_table(index=['mlb','titulo'], columns='periodo', values='unidades', aggfunc='sum', fill_value=0)
-    out_f = agg.pivot_table(index=['mlb','titulo'], columns='periodo', values='receita', aggfunc='sum', fill_value=0.0)
-    out_qf = agg.pivot_table(index=['mlb','titulo'], columns='periodo', values='unidades_full', aggfunc='sum', fill_value=0)
-    out_ff = agg.pivot_table(index=['mlb','titulo'], columns='periodo', values='receita_full', aggfunc='sum', fill_value=0.0)
-
-    out = out_q.reset_index().rename(columns={'mlb':'MLB','titulo':'Título'})
-
-    for p in ['0-30','31-60','61-90','91-120']:
-        out[f'Qntd {p}'] = out_q[p].values if p in out_q.columns else 0
-        out[f'Fat. {p}'] = out_f[p].values if p in out_f.columns else 0.0
-
-        q_full = out_qf[p].values if p in out_qf.columns else 0
-        f_full = out_ff[p].values if p in out_ff.columns else 0.0
-
-        q_tot = out[f'Qntd {p}'].replace(0, np.nan)
-        f_tot = out[f'Fat. {p}'].replace(0, np.nan)
-
-        out[f'Share Full Qtd {p}'] = (q_full / q_tot).fillna(0.0)
-        out[f'Share Full Fat {p}'] = (f_full / f_tot).fillna(0.0)
-        out[f'Logística dom {p}'] = np.where(out[f'Share Full Qtd {p}'] >= 0.5, 'FULL', 'NÃO FULL')
-
-    def curva_abc(fat_series: pd.Series) -> pd.Series:
-        fat = fat_series.fillna(0.0)
-        total = float(fat.sum())
-        if total <= 0:
-            return pd.Series(['-'] * len(fat), index=fat.index)
-        order = fat.sort_values(ascending=False)
-        cum = order.cumsum() / total
-        curve = pd.Series(index=order.index, dtype=object)
-        curve.loc[cum <= 0.80] = 'A'
-        curve.loc[(cum > 0.80) & (cum <= 0.95)] = 'B'
-        curve.loc[cum > 0.95] = 'C'
-        curve.loc[order == 0] = '-'
-        return curve.reindex(fat.index).fillna('-')
-
-    for p in ['0-30','31-60','61-90','91-120']:
-        out[f'Curva {p}'] = curva_abc(out[f'Fat. {p}'])
-
-    return out, df_logistics, df_ads
-
+    # No modo incremental o resultado depende do histórico salvo, não só dos arquivos
+    cache_key = None if cliente else content_hash(*files, params=engine.key)
+    cached = report_cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        df, df_logistics, df_ads, issues = cached
+        return df, df_logistics, df_ads, {label: group['valor'] for label, group in issues.groupby('coluna', sort=False)}
 
-@st.cache_data
-def load_main(file) -> tuple:
-    """Aceita planilha pronta (aba Export) OU relatorio bruto do ML.
-    Retorna: (df_main, df_logistics, df_ads)
-    """
-    if hasattr(file, 'seek'):
-        file.seek(0)
+    workbooks = [ParsedWorkbook.of(f) for f in files]
+    workbook = workbooks[0]
 
     df_logistics = pd.DataFrame()
     df_ads = pd.DataFrame()
+    parse_issues = {}
 
-    try:
-        xls = pd.ExcelFile(file)
-        sheet_names = [str(s) for s in getattr(xls, 'sheet_names', [])]
-    except Exception:
-        if hasattr(file, 'seek'):
-            file.seek(0)
-        df, df_logistics, df_ads = _transform_ml_raw(file)
+    if _is_export_sheet(workbook):
+        df = workbook.sheet('Export').copy()
     else:
-        if 'Export' in sheet_names:
-            if hasattr(file, 'seek'):
-                file.seek(0)
-            df = pd.read_excel(file, sheet_name='Export')
-        else:
-            if hasattr(file, 'seek'):
-                file.seek(0)
-            df, df_logistics, df_ads = _transform_ml_raw(file)
+        df, df_logistics, df_ads, parse_issues = _transform_ml_raw(workbooks, windows, reference, cliente,
+                                                                   store_version)
 
-    for col in QTY_COLS:
+    for col in qty_cols:
         if col not in df.columns:
             df[col] = 0
         df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
 
-    for col in FAT_COLS:
+    for col in fat_cols:
         if col not in df.columns:
             df[col] = 0.0
         df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0)
 
-    for col in CURVE_COLS:
+    for col in curve_cols:
         if col not in df.columns:
             df[col] = '-'
         df[col] = df[col].fillna('-').astype(str).str.strip()
@@ -2051,8 +1966,51 @@ def load_main(file) -> tuple:
     df['MLB'] = df['MLB'].astype(str).str.strip()
     df['Título'] = df['Título'].astype(str).str.strip()
 
-    return df, df_logistics, df_ads
+    if cache_key:
+        # Células não numéricas salvas como (coluna, valor) junto com os dados
+        issues = pd.DataFrame({
+            'coluna': [label for label, cells in parse_issues.items() for _ in range(len(cells))],
+            'valor': [str(v) for cells in parse_issues.values() for v in cells],
+        })
+        report_cache.put(cache_key, (df, df_logistics, df_ads, issues))
+    return df, df_logistics, df_ads, parse_issues
+
+
+
+def _session_workbooks(files: list) -> list:
+    """ParsedWorkbook de cada upload, guardados na sessão enquanto os uploads forem os
+    mesmos: o conteúdo é copiado e o hash (digest) calculado uma vez por upload, não a
+    cada rerun.
+    """
+    ids = tuple((getattr(f, 'file_id', None), getattr(f, 'name', None), getattr(f, 'size', None)) for f in files)
+    saved = st.session_state.get('_workbooks')
+    if saved is None or saved[0] != ids or any(i[0] is None for i in ids):
+        saved = (ids, [ParsedWorkbook(f) for f in files])
+        st.session_state['_workbooks'] = saved
+    return saved[1]
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _analysis(content_key: str, canal: str, windows: tuple, reference, cliente: str, store_version: tuple,
+              curve_filter: tuple, _workbooks: list) -> AnalysisResult:
+    """Carga e análise completas (build_analysis) de um conjunto de relatórios.
+    Chave: hash do conteúdo dos arquivos (inclui a versão do motor), canal e parâmetros
+    da análise; `_workbooks` não entra na chave. O resultado é compartilhado entre
+    reruns, então widgets que só mudam a exibição não recalculam nada (as abas apenas
+    leem os DataFrames, sem alterá-los).
+    """
+    if canal == 'Shopee':
+        _, df, df_logistics, df_ads, parse_issues = detect_and_process(_workbooks, windows, reference)
+    else:  # Mercado Livre - usa lógica original
+        df, df_logistics, df_ads, parse_issues = load_main(_workbooks, windows, reference, cliente, store_version)
+
+    # Garantir que df_ads e df_logistics não sejam None
+    if df_ads is None:
+        df_ads = pd.DataFrame()
+    if df_logistics is None:
+        df_logistics = pd.DataFrame()
 
+    return build_analysis(df, df_logistics, df_ads, canal, period_labels(windows), curve_filter, parse_issues)
 
 # =========================
 # Sidebar Premium v2
@@ -2091,11 +2049,44 @@ with st.sidebar:
     uploaded_files = st.file_uploader(
         "📂 Carregar relatório(s) de vendas",
         type=["xlsx", "xls"],
-        help="Suporta Mercado Livre e Shopee. Para Shopee, você pode enviar múltiplos arquivos.",
+        help="Suporta Mercado Livre e Shopee. Para o Mercado Livre, envie vários relatórios (ex.: um por mês) para juntar o histórico; vendas repetidas são contadas uma vez.",
         accept_multiple_files=True,
         key="main_files"
     )
 
+    # Janelas de análise (granularidade e data de referência)
+    st.markdown("### 🗓️ Janelas de Análise")
+    granularidade = st.selectbox(
+        "Granularidade dos períodos",
+        list(PERIOD_PRESETS),
+        index=0,
+        key="period_preset",
+        help="Janelas contadas em dias corridos a partir da data de referência. A primeira é a janela atual.",
+    )
+    analysis_windows = PERIOD_PRESETS[granularidade]
+    if analysis_windows is None:
+        windows_text = st.text_input(
+            "Fim de cada janela (dias)",
+            value="7, 14, 30, 60, 90, 120",
+            key="period_custom",
+            help=f"Dias crescentes separados por vírgula, mínimo de {MIN_WINDOWS} janelas.",
+        )
+        try:
+            analysis_windows = tuple(PeriodEngine(parse_windows(windows_text)).edges.tolist())
+            if len(analysis_windows) < MIN_WINDOWS:
+                raise ValueError(f"Informe ao menos {MIN_WINDOWS} janelas.")
+        except ValueError as e:
+            st.warning(f"{e} Usando {windows_caption(DEFAULT_WINDOWS)}.")
+            analysis_windows = DEFAULT_WINDOWS
+
+    usar_referencia = st.checkbox(
+        "Definir data de referência",
+        value=False,
+        key="period_ref_on",
+        help="Por padrão as janelas terminam na última venda do relatório.",
+    )
+    reference_date = st.date_input("Data de referência", key="period_ref", format="DD/MM/YYYY") if usar_referencia else None
+
     st.markdown('<div style="height:12px"></div>', unsafe_allow_html=True)
 
     # Seção de Filtros
@@ -2107,6 +2098,19 @@ with st.sidebar:
     st.markdown("### 👤 Identificação da Conta")
     cliente_nome = st.text_input("Nome do Cliente / Conta", value="", placeholder="Ex: Cliente X", help="Digite o nome do cliente para isolar o histórico e as comparações.")
     st.session_state['cliente_atual'] = cliente_nome.strip()
+    incremental = bool(cliente_nome.strip()) and st.checkbox(
+        "Atualização incremental",
+        value=False,
+        key="incremental",
+        help="Guarda o histórico diário de vendas da conta (Mercado Livre): envie só o relatório mais recente (ex.: da última semana) e apenas as vendas novas são somadas ao histórico.",
+    )
+    if incremental and st.button("Apagar histórico diário da conta", key="incremental_clear"):
+        history_manager.clear_daily_store(cliente_nome.strip(), "Mercado Livre")
+        for loader in (_ml_sales_matrix, _transform_ml_raw, _rolling_abc, load_main, _analysis):
+            loader.clear()
+        st.session_state.pop('_ingested', None)
+        st.success("Histórico diário apagado.")
+    conta_incremental = cliente_nome.strip() if incremental else ""
 
     # Versão removida conforme solicitado
 
@@ -2114,13 +2118,22 @@ if not uploaded_files:
     render_guide_tab()
     st.stop()
 
+# Janelas escolhidas: rótulos e colunas usados em todo o painel (a primeira é a atual)
+PERIOD_LABELS = period_labels(analysis_windows)
+QTY_COLS, FAT_COLS, CURVE_COLS = period_columns(PERIOD_LABELS)
+
+# Períodos em ordem decrescente (mais antigo primeiro)
+periods = list(zip(PERIOD_LABELS, CURVE_COLS, QTY_COLS, FAT_COLS))[::-1]
+
 # =========================
 # Carregar dados
 # =========================
 # Detecta o canal baseado no primeiro arquivo
 try:
     from data_processing.factory import detect_channel
-    canal_detectado = detect_channel(uploaded_files)
+    # Cada arquivo é aberto uma única vez e reaproveitado na detecção e no processamento
+    workbooks = _session_workbooks(uploaded_files)
+    canal_detectado = detect_channel(workbooks)
     
     # Armazena o canal no session_state
     st.session_state['canal'] = canal_detectado
@@ -2139,391 +2152,65 @@ try:
         </div>
         """, unsafe_allow_html=True)
     
-    # Processa conforme o canal
-    if canal_detectado == 'Shopee':
-        from data_processing.factory import detect_and_process
-        _, df, df_logistics, df_ads = detect_and_process(uploaded_files)
-    else:  # Mercado Livre - usa lógica original
-        df, df_logistics, df_ads = load_main(uploaded_files[0])
-    
-    # Garantir que df_ads e df_logistics não sejam None
-    if df_ads is None:
-        df_ads = pd.DataFrame()
-    if df_logistics is None:
-        df_logistics = pd.DataFrame()
-    
+    # Processa conforme o canal (carga + análise em cache)
+    analysis_key = content_hash(params=";".join(wb.digest for wb in workbooks))
+    # Histórico diário da conta atualizado antes da análise; a versão entra nas chaves
+    store_version = ()
+    if conta_incremental and canal_detectado == "Mercado Livre":
+        store_version = ingest_daily_store(workbooks, conta_incremental)
+    analysis_params = (analysis_key, canal_detectado, analysis_windows, reference_date,
+                       conta_incremental, store_version, tuple(curve_filter))
+    analysis = _analysis(*analysis_params, workbooks)
+
 except Exception as e:
     st.error(f"Erro ao processar arquivo(s): {str(e)}")
     import traceback
     st.error(traceback.format_exc())
     st.stop()
 
+df, df_logistics, df_ads = analysis.df, analysis.df_logistics, analysis.df_ads
+
+# Valores que não puderam ser lidos como número entram como zero: avisa em vez de esconder
+for label, cells in analysis.parse_issues.items():
+    st.warning(
+        f"{br_int(len(cells))} célula(s) de '{label}' não puderam ser lidas como número e foram "
+        f"contadas como zero (ex.: {cells.iloc[0]!r})."
+    )
+
 if df.empty:
     st.warning("Nenhum dado válido encontrado no arquivo.")
     st.stop()
 
-# Filtrar por curva
-df_f = df[df["Curva 0-30"].isin(curve_filter)].copy()
-
-if df_f.empty:
+if analysis.df_f.empty:
     st.warning("Nenhum produto corresponde aos filtros selecionados.")
     st.stop()
 
-# =========================
-# Cálculos auxiliares
-# =========================
-df_f["Fat total"] = df_f[FAT_COLS].sum(axis=1)
-df_f["Qtd total"] = df_f[QTY_COLS].sum(axis=1)
-df_f["TM total"] = df_f.apply(lambda r: safe_div(r["Fat total"], r["Qtd total"]), axis=1)
-
-kpi_rows = []
-for p, cc, qq, ff in periods:
-    fat = float(df_f[ff].sum())
-    qty = int(df_f[qq].sum())
-    tm = safe_div(fat, qty)
-    kpi_rows.append({"Período": p, "Qtd": qty, "Faturamento": fat, "Ticket médio": tm})
-kpi_df = pd.DataFrame(kpi_rows)
-
-# =========================
-# Segmentações
-# =========================
-# Adapta segmentações conforme o canal
-if st.session_state.get('canal') == 'Shopee':
-    # Para Shopee (período único), usa apenas curva atual
-    anchors = df_f[
-        (df_f["Curva 0-30"] == "A")
-    ].sort_values("Fat total", ascending=False).copy()
-    
-    inactivate = df_f[
-        (df_f["Qntd 0-30"] == 0)
-    ].sort_values("Fat total", ascending=False).copy()
-    
-    revitalize = df_f[
-        (df_f["Curva 0-30"].isin(["C", "-"])) &
-        (df_f["Qntd 0-30"] > 0)  # Teve vendas mas está em C ou -
-    ].sort_values("Fat total", ascending=False).copy()
-else:
-    # Para Mercado Livre (múltiplos períodos), usa histórico
-    anchors = df_f[
-        (df_f["Curva 0-30"] == "A") &
-        (df_f["Curva 31-60"].isin(["A", "B"])) &
-        (df_f["Curva 61-90"].isin(["A", "B"]))
-    ].sort_values("Fat total", ascending=False).copy()
-    
-    inactivate = df_f[
-        (df_f["Qntd 0-30"] == 0) &
-        (df_f["Qntd 31-60"] == 0) &
-        (df_f["Qntd 61-90"] == 0)
-    ].sort_values("Fat total", ascending=False).copy()
-    
-    revitalize = df_f[
-        (df_f["Curva 31-60"].isin(["A", "B"])) &
-        (df_f["Curva 0-30"].isin(["C", "-"]))
-    ].sort_values("Fat total", ascending=False).copy()
-
-if st.session_state.get('canal') == 'Shopee':
-    # Para Shopee, adapta segmentações para período único
-    rise_to_A = df_f[
-        (df_f["Curva 0-30"] == "A") &
-        (df_f["Qntd 0-30"] > 0)
-    ].sort_values("Fat total", ascending=False).copy()
-    
-    opp_50_60 = df_f[
-        (df_f["Curva 0-30"] == "B")
-    ].sort_values("Fat total", ascending=False).copy()
-    
-    dead_stock_combo = df_f[
-        (df_f["Curva 0-30"] == "-") &
-        (df_f["Fat total"] > 0)
-    ].sort_values("TM total", ascending=False).copy()
-    
-    # Fuga de receita: produtos C ou - com bom ticket médio (potencial)
-    drop_alert = df_f[
-        (df_f["Curva 0-30"].isin(["C", "-"])) &
-        (df_f["TM total"] > df_f["TM total"].median())
-    ].copy()
-    
-    if len(drop_alert) > 0:
-        drop_alert["Perda estimada"] = drop_alert["TM total"] * 10  # Estima perda baseada no TM
-        drop_alert = drop_alert.sort_values("Perda estimada", ascending=False)
-else:
-    # Para Mercado Livre, usa lógica original com histórico
-    rise_to_A = df_f[
-        (df_f["Curva 31-60"].isin(["B", "C"])) &
-        (df_f["Curva 0-30"] == "A")
-    ].sort_values("Fat total", ascending=False).copy()
-    
-    opp_50_60 = df_f[
-        (df_f["Curva 0-30"] == "B") &
-        (df_f["Qntd 0-30"] >= df_f["Qntd 31-60"] * 1.1)
-    ].sort_values("Fat total", ascending=False).copy()
-    
-    dead_stock_combo = df_f[
-        (df_f["Curva 0-30"] == "-") &
-        (df_f["Fat total"] > 0)
-    ].sort_values("TM total", ascending=False).copy()
-    
-    drop_alert = df_f[
-        (df_f["Curva 31-60"].isin(["A", "B"])) &
-        (df_f["Curva 0-30"].isin(["C", "-"]))
-    ].copy()
-    
-    if len(drop_alert) > 0:
-        drop_alert["Fat anterior ref"] = drop_alert[["Fat. 31-60", "Fat. 61-90"]].max(axis=1)
-        drop_alert["Perda estimada"] = drop_alert["Fat anterior ref"] - drop_alert["Fat. 0-30"]
-        drop_alert = drop_alert.sort_values("Perda estimada", ascending=False)
-
-# =========================
-# Plano tático
-# =========================
-plan = df_f.copy()
-
-def suggest_action(row):
-    c0, c1 = row["Curva 0-30"], row["Curva 31-60"]
-    
-    # Para Shopee (sem histórico), usa apenas curva atual
-    if st.session_state.get('canal') == 'Shopee':
-        if c0 == "A":
-            return "Garantir estoque 30d + otimizar fotos/título + avaliar Shopee Ads"
-        elif c0 == "B":
-            return "Testar Shopee Ads com palavras-chave específicas (cauda longa)"
-        elif c0 == "C":
-            # Verifica se tem bom ticket médio (potencial)
-            tm_total = row.get("TM total", 0)
-            if tm_total > 0:
-                return "Diagnosticar gargalo (CTR/conversão) + melhorar imagens/descrição"
-            else:
-                return "Testar preço promocional + bundle ou liquidar"
-        elif c0 == "-":
-            # Verifica se teve faturamento (dead stock) ou é inativo
-            fat_total = row.get("Fat total", 0)
-            if fat_total > 0:
-                return "Criar bundle com produto âncora ou participar Shopee Liquida"
-            else:
-                return "Testar preço promocional última chance ou desativar"
-        return "-"
-    
-    # Para Mercado Livre (com histórico), usa comparação de períodos
-    if c0 == "A" and c1 in ["A", "B"]:
-        return "Garantir estoque 30-60d + completar ficha técnica 100% + avaliar ML Ads"
-    if c0 == "A" and c1 in ["C", "-"]:
-        return "Subiu rápido – validar se é sazonal ou tendência antes de escalar"
-    if c0 == "B" and c1 == "A":
-        return "Caiu de A→B: diagnosticar (CTR/conversão/Buy Box) + corrigir gargalo"
-    if c0 == "B" and c1 in ["B", "C"]:
-        return "Potencial de crescimento: otimizar anúncio (conversão >2%) + testar ML Ads"
-    if c0 == "C":
-        return "Diagnosticar gargalo (foto/preço/descrição) + testar promoção ou kit"
-    if c0 == "-":
-        return "Sem giro: otimizar última chance (preço/foto) ou liquidar e liberar capital"
-    return "-"
-
-plan["Ação sugerida"] = plan.apply(suggest_action, axis=1)
-
-actions = pd.DataFrame(index=plan.index)
-actions["7d"] = "-"
-actions["15d"] = "-"
-actions["30d"] = "-"
-
-# DEFESA - Âncoras (produtos A estáveis)
-if st.session_state.get('canal') == 'Shopee':
-    actions.loc[anchors.index, "7d"] = "Garantir estoque 30-60d + monitorar taxa resposta (100%) + checar prazo entrega"
-    actions.loc[anchors.index, "15d"] = "Adicionar foto uso real + tabela medidas + responder FAQ na descrição"
-    actions.loc[anchors.index, "30d"] = "Testar Shopee Ads (cauda longa) se ACOS < margem + criar bundle upsell"
-else:
-    actions.loc[anchors.index, "7d"] = "Estoque 30-60d + monitorar Buy Box + validar reputação (resposta <24h, reclamações <1%)"
-    actions.loc[anchors.index, "15d"] = "Completar ficha técnica 100% + adicionar vídeo 15-30s + organizar variações"
-    actions.loc[anchors.index, "30d"] = "Se conversão >2%: testar ML Ads (cauda longa, ACOS <25-30%) + Full/Flex"
-
-# CORREÇÃO - Queda de faturamento / Fuga de receita
-if st.session_state.get('canal') == 'Shopee':
-    actions.loc[drop_alert.index, "7d"] = "Diagnosticar: CTR baixo (imagem/título) ou conversão baixa (descrição/preço/frete)"
-    actions.loc[drop_alert.index, "15d"] = "Testar nova capa (zoom produto + selo benefício) + expandir descrição com FAQ"
-    actions.loc[drop_alert.index, "30d"] = "Participar Flash Sale (margem mín aceitável) + cupom prazo limitado"
-else:
-    actions.loc[drop_alert.index, "7d"] = "Diagnosticar: CTR <1% (foto/título) ou conversão <2% (preço/descrição/frete) + comparar concorrentes"
-    actions.loc[drop_alert.index, "15d"] = "Corrigir gargalo: foto fundo branco + título otimizado + FAQ na descrição + ajustar preço"
-    actions.loc[drop_alert.index, "30d"] = "Se ajustes não funcionaram: oferta relâmpago ou cupom + responder avaliações negativas"
-
-# CORREÇÃO - Reativar produtos
-if st.session_state.get('canal') == 'Shopee':
-    actions.loc[revitalize.index, "7d"] = "Ler avaliações negativas concorrentes + responder todas avaliações negativas"
-    actions.loc[revitalize.index, "15d"] = "Ajustar preço (usar âncora: cheio+desconto) + melhorar capa (fundo limpo)"
-    actions.loc[revitalize.index, "30d"] = "Cupom seguidor (criar base clientes) + monitorar se conversão voltou"
-else:
-    actions.loc[revitalize.index, "7d"] = "Diagnosticar problema: sem impressões (SEO) ou CTR baixo (foto) + verificar categoria correta"
-    actions.loc[revitalize.index, "15d"] = "Otimizar: título com palavra-chave + ficha técnica 100% + foto fundo branco + vídeo"
-    actions.loc[revitalize.index, "30d"] = "Testar preço promocional (abaixo média) + cupom + monitorar se conversão voltou"
-
-# ATAQUE - Subindo para A
-if st.session_state.get('canal') == 'Shopee':
-    actions.loc[rise_to_A.index, "7d"] = "Estoque 30-60d + otimizar anúncio (conversão >2%) antes de investir Ads"
-    actions.loc[rise_to_A.index, "15d"] = "Ativar Shopee Ads: orçamento baixo + palavras cauda longa + monitorar ACOS"
-    actions.loc[rise_to_A.index, "30d"] = "Se ROAS >3: aumentar budget + participar campanhas (11.11, Black Friday)"
-else:
-    actions.loc[rise_to_A.index, "7d"] = "Estoque 60-90d + validar conversão >2% + completar ficha técnica 100% + Full/Flex"
-    actions.loc[rise_to_A.index, "15d"] = "Ativar ML Ads: orçamento baixo + palavras cauda longa + monitorar ACOS diariamente"
-    actions.loc[rise_to_A.index, "30d"] = "Se ACOS <25-30%: aumentar budget + participar ofertas relâmpago + monitorar posição orgânica"
-
-# ATAQUE - Oportunidades B/C
-if st.session_state.get('canal') == 'Shopee':
-    actions.loc[opp_50_60.index, "7d"] = "Calcular margem líquida + ACOS máx aceitável + volume busca categoria"
-    actions.loc[opp_50_60.index, "15d"] = "Testar Ads: termos específicos (ex: 'sapato social preto 40' > 'sapato')"
-    actions.loc[opp_50_60.index, "30d"] = "Ajustar lances (alto rendimento: +lance | baixo: pausar) + criar bundles"
-else:
-    actions.loc[opp_50_60.index, "7d"] = "Calcular margem líquida + ACOS máx aceitável + otimizar anúncio (conversão >2%)"
-    actions.loc[opp_50_60.index, "15d"] = "Testar ML Ads: termos específicos (ex: 'tênis corrida nike 42' > 'tênis') + monitorar CTR"
-    actions.loc[opp_50_60.index, "30d"] = "Ajustar lances (alto ROAS: +lance | baixo: pausar) + testar kit com produto âncora"
-
-# LIMPEZA - Combo/Kit
-if st.session_state.get('canal') == 'Shopee':
-    actions.loc[dead_stock_combo.index, "7d"] = "Analisar: quem comprou também comprou? Pesquisar combos concorrentes"
-    actions.loc[dead_stock_combo.index, "15d"] = "Criar bundle (dead stock + âncora) desconto 10-20% + anúncio novo"
-    actions.loc[dead_stock_combo.index, "30d"] = "Se bundle não funcionou: Shopee Liquida com preço agressivo"
-else:
-    actions.loc[dead_stock_combo.index, "7d"] = "Analisar: quem comprou também comprou? Pesquisar kits concorrentes + avaliar margem kit"
-    actions.loc[dead_stock_combo.index, "15d"] = "Criar kit (dead stock + âncora) desconto 10-20% + anúncio novo otimizado + variações"
-    actions.loc[dead_stock_combo.index, "30d"] = "Se kit não vendeu: liquidação agressiva (preço abaixo custo) + oferta relâmpago"
-
-# LIMPEZA - Inativar
-if st.session_state.get('canal') == 'Shopee':
-    actions.loc[inactivate.index, "7d"] = "Calcular custo oportunidade (capital imobilizado) + verificar se obsoleto"
-    actions.loc[inactivate.index, "15d"] = "Liquidação: preço agressivo + frete grátis + comunicar 'Última Chance'"
-    actions.loc[inactivate.index, "30d"] = "Se não vendeu: desativar + liquidar lote ou doar (crédito fiscal)"
-else:
-    actions.loc[inactivate.index, "7d"] = "Calcular custo oportunidade (capital imobilizado) + diagnosticar: obsoleto ou anúncio ruim?"
-    actions.loc[inactivate.index, "15d"] = "Liquidação: preço agressivo + frete grátis + comunicar 'Última Chance' + ML Ads baixo orçamento"
-    actions.loc[inactivate.index, "30d"] = "Se não vendeu: desativar + liquidar lote (revendedores) ou doar (crédito fiscal)"
-
-# OTIMIZAÇÃO - Produtos que não se encaixam em outras frentes
-# Identificar índices de otimização (todos que não estão nas outras frentes)
-all_classified = set(anchors.index) | set(drop_alert.index) | set(revitalize.index) | set(rise_to_A.index) | set(opp_50_60.index) | set(dead_stock_combo.index) | set(inactivate.index)
-optimization_idx = [idx for idx in plan.index if idx not in all_classified]
-
-for idx in optimization_idx:
-    row = plan.loc[idx]
-    c0 = row.get("Curva 0-30", "-")
-    c1 = row.get("Curva 31-60", "-")
-    
-    if c0 == "A":
-        # Produto A que não é âncora - subiu rápido
-        actions.loc[idx, "7d"] = "Validar se é sazonal"
-        actions.loc[idx, "15d"] = "Monitorar tendência"
-        actions.loc[idx, "30d"] = "Decidir estratégia"
-    elif c0 == "B":
-        # Produto B estável ou em transição
-        actions.loc[idx, "7d"] = "Analisar histórico"
-        actions.loc[idx, "15d"] = "Testar otimização"
-        actions.loc[idx, "30d"] = "Avaliar promoção"
-    elif c0 == "C":
-        # Produto C - baixo volume
-        actions.loc[idx, "7d"] = "Revisar preço"
-        actions.loc[idx, "15d"] = "Testar destaque"
-        actions.loc[idx, "30d"] = "Avaliar combo"
-    else:
-        # Sem vendas recentes
-        actions.loc[idx, "7d"] = "Verificar anúncio"
-        actions.loc[idx, "15d"] = "Ajustar estratégia"
-        actions.loc[idx, "30d"] = "Decidir manter/remover"
-
-plan["Plano 7 dias"] = actions["7d"]
-plan["Plano 15 dias"] = actions["15d"]
-plan["Plano 30 dias"] = actions["30d"]
-
-def frente_bucket(idx):
-    if idx in anchors.index:
-        return "DEFESA"
-    if idx in drop_alert.index:
-        return "CORREÇÃO"
-    if idx in revitalize.index:
-        return "CORREÇÃO"
-    if idx in rise_to_A.index or idx in opp_50_60.index:
-        return "ATAQUE"
-    if idx in dead_stock_combo.index or idx in inactivate.index:
-        return "LIMPEZA"
-    return "OTIMIZAÇÃO"
-
-plan["Frente"] = [frente_bucket(i) for i in plan.index]
-
-# =========================
-# Diagnóstico macro
-# =========================
-dist_0_30 = df_f["Curva 0-30"].value_counts().reindex(["A", "B", "C", "-"]).fillna(0).astype(int)
-dist_0_30_df = pd.DataFrame({"Curva": dist_0_30.index, "Anúncios": dist_0_30.values})
-
-fat_0_30_total = float(df_f["Fat. 0-30"].sum())
-fat_0_30_A = float(df_f.loc[df_f["Curva 0-30"] == "A", "Fat. 0-30"].sum())
-conc_A_0_30 = safe_div(fat_0_30_A, fat_0_30_total)
-
-# Busca ticket médio usando os nomes de período
-tm_0_30_row = kpi_df.loc[kpi_df["Período"] == "0-30", "Ticket médio"]
-tm_31_60_row = kpi_df.loc[kpi_df["Período"] == "31-60", "Ticket médio"]
-tm_61_90_row = kpi_df.loc[kpi_df["Período"] == "61-90", "Ticket médio"]
-
-tm_0_30 = float(tm_0_30_row.iloc[0]) if len(tm_0_30_row) > 0 else 0.0
-tm_31_60 = float(tm_31_60_row.iloc[0]) if len(tm_31_60_row) > 0 else 0.0
-tm_61_90 = float(tm_61_90_row.iloc[0]) if len(tm_61_90_row) > 0 else 0.0
-
-def tm_direction(a, b, c):
-    if np.isnan(a) or np.isnan(b) or np.isnan(c):
-        return "Sem dados suficientes para leitura do ticket médio."
-    if a < b < c:
-        return "📈 Ticket médio subindo. Ajuda margem, mas pode cair volume se preço esticar."
-    if a > b > c:
-        return "📉 Ticket médio caindo. Pode ser mix mais barato ou promoções."
-    if b < a and c > b:
-        return "🔄 Ticket caiu e depois recuperou."
-    if b > a and c < b:
-        return "⚡ Ticket subiu e depois caiu."
-    return "📊 Ticket oscilando. Vale cruzar com mix e concorrência."
-
-tm_reading = tm_direction(tm_0_30, tm_31_60, tm_61_90)
-
-# =========================
-# KPIs topo e Histórico
-# =========================
-total_ads = len(df_f)
-tt_fat = float(df_f[FAT_COLS].sum().sum())
-tt_qty = int(df_f[QTY_COLS].sum().sum())
-tm_geral = safe_div(tt_fat, tt_qty) if tt_qty else 0.0
+# Resultados da análise (somente leitura)
+df_f = analysis.df_f
+kpi_df = analysis.kpi_df
+anchors = analysis.anchors
+inactivate = analysis.inactivate
+revitalize = analysis.revitalize
+rise_to_A = analysis.rise_to_A
+opp_50_60 = analysis.opp_50_60
+dead_stock_combo = analysis.dead_stock_combo
+drop_alert = analysis.drop_alert
+plan = analysis.plan
+front_counts = analysis.front_counts
+dist_0_30_df = analysis.dist_0_30_df
+conc_A_0_30 = analysis.conc_A_0_30
+tm_0_30 = analysis.tm_0_30
+tm_reading = analysis.tm_reading
+total_ads = analysis.total_ads
+tt_fat = analysis.tt_fat
+tt_qty = analysis.tt_qty
+tm_geral = analysis.tm_geral
+ancoras_valor = analysis.ancoras_valor
 
 # Preparar snapshot atual
 canal_atual = st.session_state.get('canal', 'Mercado Livre')
 cliente_atual = st.session_state.get('cliente_atual', 'Geral')
-
-fuga_count = len(drop_alert) if 'drop_alert' in locals() else 0
-fuga_valor = float(drop_alert['Perda estimada'].sum()) if 'drop_alert' in locals() and not drop_alert.empty else 0.0
-ancoras_count = len(anchors) if 'anchors' in locals() else 0
-ancoras_valor = float(anchors['Fat total'].sum()) if 'anchors' in locals() and not anchors.empty else 0.0
-
-# Pegar dados de Ads do período 0-30 para o snapshot
-ads_pct_snap = 0.0
-ads_valor_snap = 0.0
-organic_valor_snap = 0.0
-if not df_ads.empty:
-    ads_row_snap = df_ads[df_ads['periodo'] == '0-30']
-    if not ads_row_snap.empty:
-        ads_row_snap = ads_row_snap.iloc[0]
-        ads_pct_snap = float(ads_row_snap.get('ads_pct', 0))
-        ads_valor_snap = float(ads_row_snap.get('ads_value', 0))
-        organic_valor_snap = float(ads_row_snap.get('organic_value', 0))
-
-current_metrics = {
-    "cliente": cliente_atual,
-    "canal": canal_atual,
-    "total_ads": total_ads,
-    "total_fat": tt_fat,
-    "total_qty": tt_qty,
-    "conc_a": float(conc_A_0_30),
-    "tm_atual": tm_geral,
-    "fuga_receita_count": fuga_count,
-    "fuga_receita_valor": fuga_valor,
-    "ancoras_count": ancoras_count,
-    "ancoras_valor": ancoras_valor,
-    "ads_pct": ads_pct_snap,
-    "ads_valor": ads_valor_snap,
-    "organic_valor": organic_valor_snap
-}
+current_metrics = {"cliente": cliente_atual, **analysis.snapshot}
 
 # Botão para salvar snapshot
 with st.sidebar:
@@ -2570,12 +2257,19 @@ with col4: st.metric(m4_label, m4_val, m4_delta)
 
 st.markdown('<div style="height:1rem"></div>', unsafe_allow_html=True)
 
-tab1, tab2, tab3, tab4, tab5 = st.tabs(["DASHBOARD", "LISTAS E EXPORTAÇÃO", "PLANO TÁTICO", "RELATÓRIO ESTRATÉGICO", "GUIA DE USO"])
+# Só a aba selecionada é executada (on_change="rerun" + tab.open) e o conteúdo de
+# cada aba é um fragmento: widgets dentro dela reexecutam apenas a própria aba
+tab1, tab2, tab3, tab4, tab5 = st.tabs(
+    ["DASHBOARD", "LISTAS E EXPORTAÇÃO", "PLANO TÁTICO", "RELATÓRIO ESTRATÉGICO", "GUIA DE USO"],
+    key="main_tabs",
+    on_change="rerun",
+)
 
 # =========================
 # TAB 1: Dashboard
 # =========================
-with tab1:
+@st.fragment
+def render_dashboard_tab():
     # Seletor de período
     st.markdown(
         """
@@ -2589,18 +2283,13 @@ with tab1:
     
     selected_period = st.selectbox(
         "Período",
-        options=["0-30", "31-60", "61-90", "91-120"],
+        options=PERIOD_LABELS,
         index=0,
         label_visibility="collapsed"
     )
     
     # Mapear colunas baseado no período selecionado
-    period_map = {
-        "0-30": ("Curva 0-30", "Qntd 0-30", "Fat. 0-30"),
-        "31-60": ("Curva 31-60", "Qntd 31-60", "Fat. 31-60"),
-        "61-90": ("Curva 61-90", "Qntd 61-90", "Fat. 61-90"),
-        "91-120": ("Curva 91-120", "Qntd 91-120", "Fat. 91-120"),
-    }
+    period_map = {p: (cc, qq, ff) for p, cc, qq, ff in periods}
     
     curve_col, qty_col, fat_col = period_map[selected_period]
     
@@ -2624,7 +2313,7 @@ with tab1:
     left, right = st.columns([1.2, 1])
 
     with left:
-        section_header("Resumo por Período", "Visão consolidada das 4 janelas de tempo", "📅", "purple")
+        section_header("Resumo por Período", f"Visão consolidada das {windows_caption(analysis_windows)}", "📅", "purple")
         show = kpi_df.copy()
         show["Qtd"] = show["Qtd"].map(br_int)
         show["Faturamento"] = show["Faturamento"].map(br_money)
@@ -2747,6 +2436,12 @@ with tab1:
                     period=selected_period
                 )
     
+
+        # Curva ABC diária em janela móvel (só para relatórios brutos, calculada sob demanda)
+        if not df_logistics.empty and st.toggle("Trajetória ABC diária (janela móvel)", key="rolling_abc"):
+            render_rolling_abc(*_rolling_abc(workbooks, analysis_windows[0], conta_incremental, store_version),
+                               analysis_windows[0])
+
     elif st.session_state.get('canal') == 'Shopee':
         # Seções específicas da Shopee
         st.markdown('<div style="height:2rem"></div>', unsafe_allow_html=True)
@@ -2767,20 +2462,25 @@ with tab1:
         st.markdown('<div style="height:2rem"></div>', unsafe_allow_html=True)
         
         # Distribuição ABC
-        render_shopee_abc_distribution(df_f)
+        render_shopee_abc_distribution(df_f, curve_col=CURVE_COLS[0])
         
         st.markdown('<div style="height:2rem"></div>', unsafe_allow_html=True)
         
         # Top Produtos
-        render_shopee_top_products(df_f, top_n=10)
+        render_shopee_top_products(df_f, top_n=10, curve_col=CURVE_COLS[0])
 
     section_header("Faturamento por Curva e Período", "Comparativo entre as janelas de tempo", "📊", "green")
-    rev_rows = []
-    for p, cc, qq, ff in periods:
-        grp = df_f.groupby(cc)[ff].sum()
-        for curva in ["A", "B", "C", "-"]:
-            rev_rows.append({"Período": p, "Curva": curva, "Faturamento": float(grp.get(curva, 0.0))})
-    rev_df = pd.DataFrame(rev_rows)
+    # Faturamento por (período, curva) em uma única agregação sobre todas as janelas
+    rev_df = (
+        pd.DataFrame({
+            "Período": np.tile(PERIOD_LABELS, len(df_f)),
+            "Curva": df_f[CURVE_COLS].astype(str).to_numpy().ravel(),
+            "Faturamento": df_f[FAT_COLS].to_numpy(dtype=float).ravel(),
+        })
+        .groupby(["Período", "Curva"])["Faturamento"].sum()
+        .reindex(pd.MultiIndex.from_product([PERIOD_LABELS[::-1], ["A", "B", "C", "-"]], names=["Período", "Curva"]), fill_value=0.0)
+        .reset_index()
+    )
     fig2 = px.bar(
         rev_df, 
         x="Período", 
@@ -2788,7 +2488,7 @@ with tab1:
         color="Curva", 
         barmode="group",
         color_discrete_map=colors_map,
-        category_orders={"Período": ["91-120", "61-90", "31-60", "0-30"]}  # Ordem decrescente
+        category_orders={"Período": PERIOD_LABELS[::-1]}  # Ordem decrescente
     )
     fig2.update_layout(
         plot_bgcolor='rgba(0,0,0,0)',
@@ -2808,7 +2508,7 @@ with tab1:
         x="Período", 
         y="Ticket médio", 
         markers=True,
-        category_orders={"Período": ["91-120", "61-90", "31-60", "0-30"]}  # Ordem decrescente
+        category_orders={"Período": PERIOD_LABELS[::-1]}  # Ordem decrescente
     )
     fig3.update_traces(line_color='#f59e0b', marker_color='#fbbf24', line_width=3, marker_size=10)
     fig3.update_layout(
@@ -2823,12 +2523,62 @@ with tab1:
 
     st.markdown('<div style="height:1rem"></div>', unsafe_allow_html=True)
     
+    section_header("Simulador de Cenários", "E se o faturamento de um anúncio mudar ou itens saírem do catálogo?", "🎯", "blue")
+    # Curva da janela atual editável: cada alteração reclassifica só os anúncios perto dos cortes
+    sim = whatif_session((analysis_params, FAT_COLS[0]), df_f, FAT_COLS[0])
+    whatif, curva_base, sim_labels = sim["engine"], sim["base_codes"], sim["labels"]
+
+    sim_col1, sim_col2, sim_col3 = st.columns([2, 1, 2])
+    with sim_col1:
+        sim_item = st.selectbox("Anúncio", options=range(len(df_f)), format_func=lambda i: sim_labels[i],
+                                index=None, placeholder="Escolha um anúncio", key="whatif_item")
+    with sim_col2:
+        sim_factor = st.number_input("Faturamento x", min_value=0.0, value=2.0, step=0.5, key="whatif_factor")
+    with sim_col3:
+        sim_removed = st.multiselect("Retirar do catálogo", options=range(len(df_f)),
+                                     format_func=lambda i: sim_labels[i], key="whatif_removed")
+
+    # Cenário pedido pelos widgets; retirar do catálogo prevalece sobre o fator
+    sim_targets = {}
+    if sim_item is not None:
+        sim_targets[sim_item] = sim["base_revenue"][sim_item] * sim_factor
+    sim_targets.update({i: 0.0 for i in sim_removed})
+    whatif_apply(sim, sim_targets)
+
+    sim_changed = np.array(sorted(sim["changed"]), dtype=np.int64)
+    sim_counts = sim["base_counts"].copy()
+    np.subtract.at(sim_counts, curva_base[sim_changed], 1)
+    np.add.at(sim_counts, whatif.codes[sim_changed], 1)
+    classes = np.asarray(ABC_CLASSES)
+    sim_dist = pd.DataFrame({
+        "Curva": ABC_CLASSES,
+        "Atual": sim["base_counts"],
+        "Simulado": sim_counts,
+    })
+    sim_left, sim_right = st.columns([1, 2])
+    with sim_left:
+        st.dataframe(sim_dist, use_container_width=True, hide_index=True)
+    with sim_right:
+        if len(sim_changed):
+            st.dataframe(pd.DataFrame({
+                "MLB": df_f["MLB"].to_numpy()[sim_changed],
+                "Título": df_f["Título"].to_numpy()[sim_changed],
+                "Curva atual": classes[curva_base[sim_changed]],
+                "Curva simulada": classes[whatif.codes[sim_changed]],
+                "Fat. simulado": [br_money(v) for v in whatif.revenue[sim_changed]],
+            }), use_container_width=True, hide_index=True, height=220)
+        else:
+            st.info("Nenhum anúncio muda de curva neste cenário.")
+    section_footer()
+
+    st.markdown('<div style="height:1rem"></div>', unsafe_allow_html=True)
+
     section_header("Ações por Frente", "Visão estratégica das prioridades", "🎯", "rose")
     
     def _front_agg(df_seg: pd.DataFrame):
         if df_seg is None or len(df_seg) == 0:
             return 0, 0.0
-        fat_col_agg = "Fat. 0-30" if "Fat. 0-30" in df_seg.columns else ("Fat total" if "Fat total" in df_seg.columns else None)
+        fat_col_agg = FAT_COLS[0] if FAT_COLS[0] in df_seg.columns else ("Fat total" if "Fat total" in df_seg.columns else None)
         fat = float(df_seg[fat_col_agg].sum()) if fat_col_agg else 0.0
         return int(len(df_seg)), fat
 
@@ -2853,10 +2603,16 @@ with tab1:
 
     section_footer()
 
+
+if tab1.open:
+    with tab1:
+        render_dashboard_tab()
+
 # =========================
 # TAB 2: Listas e Exportação (MELHORADA)
 # =========================
-with tab2:
+@st.fragment
+def render_lists_tab():
     st.markdown(render_report_section("package", "Central de Exportação", "Baixe listas segmentadas para ação imediata", "blue"), unsafe_allow_html=True)
     
 
@@ -2879,12 +2635,12 @@ with tab2:
     # Colunas base + planos de ação
     plan_cols = ["Ação sugerida", "Plano 7 dias", "Plano 15 dias", "Plano 30 dias"]
     
-    anchors_cols = ["MLB","Título","Fat total","Qtd total","TM total","Curva 0-30","Curva 31-60","Curva 61-90","Curva 91-120"] + plan_cols
-    inactivate_cols = ["MLB","Título","Fat total","Qtd total","Curva 0-30","Qntd 0-30","Qntd 31-60","Qntd 61-90"] + plan_cols
-    revitalize_cols = ["MLB","Título","Fat total","Qtd total","Curva 31-60","Curva 0-30","Qntd 31-60","Qntd 0-30"] + plan_cols
-    opp_cols = ["MLB","Título","Fat total","Curva 0-30","Qntd 0-30","Curva 31-60","Qntd 31-60"] + plan_cols
-    drop_cols = ["MLB","Título","Curva 31-60","Curva 61-90","Curva 0-30","Fat anterior ref","Fat. 0-30","Perda estimada"] + plan_cols
-    combo_cols = ["MLB","Título","TM histórico","Fat. 31-60","Fat. 61-90","Fat. 91-120","Fat. 0-30"] + plan_cols
+    anchors_cols = ["MLB","Título","Fat total","Qtd total","TM total",CURVE_COLS[0],CURVE_COLS[1],CURVE_COLS[2],CURVE_COLS[3]] + plan_cols
+    inactivate_cols = ["MLB","Título","Fat total","Qtd total",CURVE_COLS[0],QTY_COLS[0],QTY_COLS[1],QTY_COLS[2]] + plan_cols
+    revitalize_cols = ["MLB","Título","Fat total","Qtd total",CURVE_COLS[1],CURVE_COLS[0],QTY_COLS[1],QTY_COLS[0]] + plan_cols
+    opp_cols = ["MLB","Título","Fat total",CURVE_COLS[0],QTY_COLS[0],CURVE_COLS[1],QTY_COLS[1]] + plan_cols
+    drop_cols = ["MLB","Título",CURVE_COLS[1],CURVE_COLS[2],CURVE_COLS[0],"Fat anterior ref",FAT_COLS[0],"Perda estimada"] + plan_cols
+    combo_cols = ["MLB","Título","TM histórico",FAT_COLS[1],FAT_COLS[2],FAT_COLS[3],FAT_COLS[0]] + plan_cols
 
     anchors_export = ensure_cols(anchors_export, anchors_cols)
     inactivate_export = ensure_cols(inactivate_export, inactivate_cols)
@@ -2897,8 +2653,8 @@ with tab2:
     def get_fat(df_exp):
         if "Fat total" in df_exp.columns:
             return float(df_exp["Fat total"].sum())
-        elif "Fat. 0-30" in df_exp.columns:
-            return float(df_exp["Fat. 0-30"].sum())
+        elif FAT_COLS[0] in df_exp.columns:
+            return float(df_exp[FAT_COLS[0]].sum())
         return 0.0
 
     # Grid de cards de exportação
@@ -2908,29 +2664,29 @@ with tab2:
     
     with col1:
         st.markdown(render_export_card("🛡️", "Âncoras", "Produtos estáveis em curva A", len(anchors_export), get_fat(anchors_export), "defense"), unsafe_allow_html=True)
-        st.download_button("📥 Baixar Excel", data=to_xlsx_bytes(anchors_export), file_name="ancoras.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key="exp_anc", use_container_width=True)
+        st.download_button("📥 Baixar Excel", data=partial(to_xlsx_bytes, anchors_export), file_name="ancoras.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key="exp_anc", use_container_width=True)
     
     with col2:
         st.markdown(render_export_card("⚠️", "Fuga de Receita", "Produtos que caíram de curva", len(drop_export), get_fat(drop_export), "correction"), unsafe_allow_html=True)
-        st.download_button("📥 Baixar Excel", data=to_xlsx_bytes(drop_export), file_name="fuga_receita.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key="exp_drop", use_container_width=True)
+        st.download_button("📥 Baixar Excel", data=partial(to_xlsx_bytes, drop_export), file_name="fuga_receita.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key="exp_drop", use_container_width=True)
     
     with col3:
         st.markdown(render_export_card("🚀", "Crescimento", "Produtos em ascensão", len(opp_export), get_fat(opp_export), "attack"), unsafe_allow_html=True)
-        st.download_button("📥 Baixar Excel", data=to_xlsx_bytes(opp_export), file_name="crescimento.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key="exp_opp", use_container_width=True)
+        st.download_button("📥 Baixar Excel", data=partial(to_xlsx_bytes, opp_export), file_name="crescimento.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key="exp_opp", use_container_width=True)
 
     col4, col5, col6 = st.columns(3)
     
     with col4:
         st.markdown(render_export_card("🧹", "Inativar", "Produtos sem giro", len(inactivate_export), get_fat(inactivate_export), "cleanup"), unsafe_allow_html=True)
-        st.download_button("📥 Baixar Excel", data=to_xlsx_bytes(inactivate_export), file_name="inativar.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key="exp_ina", use_container_width=True)
+        st.download_button("📥 Baixar Excel", data=partial(to_xlsx_bytes, inactivate_export), file_name="inativar.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key="exp_ina", use_container_width=True)
     
     with col5:
         st.markdown(render_export_card("🔄", "Revitalizar", "Produtos para recuperar", len(revitalize_export), get_fat(revitalize_export), "opportunity"), unsafe_allow_html=True)
-        st.download_button("📥 Baixar Excel", data=to_xlsx_bytes(revitalize_export), file_name="revitalizar.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key="exp_rev", use_container_width=True)
+        st.download_button("📥 Baixar Excel", data=partial(to_xlsx_bytes, revitalize_export), file_name="revitalizar.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key="exp_rev", use_container_width=True)
     
     with col6:
         st.markdown(render_export_card("🎁", "Combos/Liquidação", "Produtos para kits", len(combo_export), get_fat(combo_export), "combo"), unsafe_allow_html=True)
-        st.download_button("📥 Baixar Excel", data=to_xlsx_bytes(combo_export), file_name="combos.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key="exp_combo", use_container_width=True)
+        st.download_button("📥 Baixar Excel", data=partial(to_xlsx_bytes, combo_export), file_name="combos.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key="exp_combo", use_container_width=True)
 
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -2940,7 +2696,7 @@ with tab2:
     with st.expander("PRÉVIA: FUGA DE RECEITA (TOP 20 POR PERDA ESTIMADA)", expanded=False):
         show = drop_export.head(20).copy()
         show["Fat anterior ref"] = show["Fat anterior ref"].apply(lambda x: br_money(float(x)) if pd.notna(x) else "-")
-        show["Fat. 0-30"] = show["Fat. 0-30"].apply(lambda x: br_money(float(x)) if pd.notna(x) else "-")
+        show[FAT_COLS[0]] = show[FAT_COLS[0]].apply(lambda x: br_money(float(x)) if pd.notna(x) else "-")
         show["Perda estimada"] = show["Perda estimada"].apply(lambda x: br_money(float(x)) if pd.notna(x) else "-")
 
         st.dataframe(show, use_container_width=True, hide_index=True, height=450)
@@ -2953,16 +2709,18 @@ with tab2:
 
     st.markdown("</div>", unsafe_allow_html=True)
 
+
+if tab2.open:
+    with tab2:
+        render_lists_tab()
+
 # =========================
 # TAB 3: Plano Tático (MELHORADA v2)
 # =========================
-with tab3:
+@st.fragment
+def render_plan_tab():
     st.markdown(render_report_section("layout", "Plano Tático por Produto", "Ações detalhadas para 15 e 30 dias", "purple"), unsafe_allow_html=True)
 
-    # Contagem de frentes para exibir nos botões
-    fronts = sorted(plan["Frente"].unique().tolist())
-    all_front_counts = plan["Frente"].value_counts()
-    
     # Container de filtros premium
     st.markdown(f"""
 <div class="filter-container">
@@ -2990,7 +2748,7 @@ with tab3:
     front_filter = []
     for i, frente in enumerate(["DEFESA", "CORREÇÃO", "ATAQUE", "LIMPEZA", "OTIMIZAÇÃO"]):
         with front_cols[i]:
-            count = int(all_front_counts.get(frente, 0))
+            count = int(front_counts.get(frente, 0))
             icon = front_icons.get(frente, "")
             if st.checkbox(f"{icon} {frente} ({count})", value=True, key=f"front_{frente}"):
                 front_filter.append(frente)
@@ -3039,9 +2797,6 @@ with tab3:
             view["Título"].astype(str).str.lower().str.contains(text_search)
         ].copy()
 
-    # Resumo das frentes filtradas
-    front_counts = view["Frente"].value_counts()
-    
     st.markdown('<div style="height:8px"></div>', unsafe_allow_html=True)
     
     # Métricas resumidas
@@ -3060,9 +2815,9 @@ with tab3:
 
     cols = [
         "MLB", "Título", "Frente",
-        "Curva 31-60", "Curva 0-30",
-        "Qntd 31-60", "Qntd 0-30",
-        "Fat. 0-30", "Fat total", "TM total",
+        CURVE_COLS[1], CURVE_COLS[0],
+        QTY_COLS[1], QTY_COLS[0],
+        FAT_COLS[0], "Fat total", "TM total",
         "Ação sugerida", "Plano 7 dias", "Plano 15 dias", "Plano 30 dias"
     ]
 
@@ -3071,7 +2826,7 @@ with tab3:
     # Botão de download
     st.download_button(
         "📥 Baixar Excel do Plano Filtrado",
-        data=to_xlsx_bytes(view_show),
+        data=partial(to_xlsx_bytes, view_show),
         file_name="plano_tatico.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         use_container_width=True
@@ -3089,7 +2844,7 @@ with tab3:
     else:
         # Visualização em tabela
         show = view_show.copy()
-        show["Fat. 0-30"] = show["Fat. 0-30"].apply(lambda x: br_money(float(x)) if pd.notna(x) else "-")
+        show[FAT_COLS[0]] = show[FAT_COLS[0]].apply(lambda x: br_money(float(x)) if pd.notna(x) else "-")
         show["Fat total"] = show["Fat total"].apply(lambda x: br_money(float(x)) if pd.notna(x) else "-")
         show["TM total"] = show["TM total"].apply(lambda x: br_money(float(x)) if pd.notna(x) else "-")
 
@@ -3097,10 +2852,16 @@ with tab3:
 
     st.markdown("</div>", unsafe_allow_html=True)
 
+
+if tab3.open:
+    with tab3:
+        render_plan_tab()
+
 # =========================
 # TAB 4: Relatório Estratégico (MELHORADA)
 # =========================
-with tab4:
+@st.fragment
+def render_report_tab():
     # Seção 1: Diagnóstico Macro
     st.markdown(render_report_section("search", "Diagnóstico Macro", "Visão geral da saúde do catálogo", "purple"), unsafe_allow_html=True)
     
@@ -3120,7 +2881,7 @@ with tab4:
     # Distribuição de curvas
     col1, col2 = st.columns(2)
     with col1:
-        st.markdown("#### Distribuição de Curvas (0-30)")
+        st.markdown(f"#### Distribuição de Curvas ({PERIOD_LABELS[0]})")
         st.dataframe(dist_0_30_df, use_container_width=True, hide_index=True, height=180)
     
     with col2:
@@ -3137,14 +2898,13 @@ with tab4:
     st.markdown(render_report_section("package", "Segmentação de Produtos", "Análise por categoria estratégica", "blue"), unsafe_allow_html=True)
     
     # Resumo das frentes
-    front_counts_all = plan["Frente"].value_counts()
     st.markdown(
         render_front_summary([
-            ("🛡️", int(front_counts_all.get("DEFESA", 0)), "DEFESA"),
-            ("⚠️", int(front_counts_all.get("CORREÇÃO", 0)), "CORREÇÃO"),
-            ("🚀", int(front_counts_all.get("ATAQUE", 0)), "ATAQUE"),
-            ("🧹", int(front_counts_all.get("LIMPEZA", 0)), "LIMPEZA"),
-            ("⚙️", int(front_counts_all.get("OTIMIZAÇÃO", 0)), "OTIMIZAÇÃO"),
+            ("🛡️", int(front_counts.get("DEFESA", 0)), "DEFESA"),
+            ("⚠️", int(front_counts.get("CORREÇÃO", 0)), "CORREÇÃO"),
+            ("🚀", int(front_counts.get("ATAQUE", 0)), "ATAQUE"),
+            ("🧹", int(front_counts.get("LIMPEZA", 0)), "LIMPEZA"),
+            ("⚙️", int(front_counts.get("OTIMIZAÇÃO", 0)), "OTIMIZAÇÃO"),
         ]),
         unsafe_allow_html=True
     )
@@ -3190,7 +2950,7 @@ with tab4:
             unsafe_allow_html=True
         )
 
-    drop_cols_show = ["MLB","Título","Curva 31-60","Curva 0-30","Perda estimada"]
+    drop_cols_show = ["MLB","Título",CURVE_COLS[1],CURVE_COLS[0],"Perda estimada"]
     show = ensure_cols(drop_alert.head(10), drop_cols_show)
     show["Perda estimada"] = show["Perda estimada"].apply(lambda x: br_money(float(x)) if pd.notna(x) else "-")
     st.dataframe(show, use_container_width=True, hide_index=True, height=350)
@@ -3203,13 +2963,13 @@ with tab4:
     front_order = ["LIMPEZA", "CORREÇÃO", "ATAQUE", "DEFESA", "OTIMIZAÇÃO"]
     
     # Download do plano completo
-    op_cols = ["Frente","MLB","Título","Curva 0-30","Fat. 0-30","Ação sugerida","Plano 7 dias","Plano 15 dias","Plano 30 dias"]
+    op_cols = ["Frente","MLB","Título",CURVE_COLS[0],FAT_COLS[0],"Ação sugerida","Plano 7 dias","Plano 15 dias","Plano 30 dias"]
     op = ensure_cols(plan, op_cols).copy()
-    op = op.sort_values(["Frente", "Fat. 0-30"], ascending=[True, False])
+    op = op.sort_values(["Frente", FAT_COLS[0]], ascending=[True, False])
 
     st.download_button(
         "📥 Baixar Plano Operacional Completo",
-        data=to_xlsx_bytes(op),
+        data=partial(to_xlsx_bytes, op),
         file_name="plano_operacional_completo.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         use_container_width=True
@@ -3223,8 +2983,8 @@ with tab4:
         
         icon = {"LIMPEZA": "🧹", "CORREÇÃO": "⚠️", "ATAQUE": "🚀", "DEFESA": "🛡️", "OTIMIZAÇÃO": "⚙️"}.get(fr, "📦")
         
-        with st.expander(f"{icon} {fr} ({len(op[op['Frente'] == fr])} itens)", expanded=False):
-            subset["Fat. 0-30"] = subset["Fat. 0-30"].apply(lambda x: br_money(float(x)) if pd.notna(x) else "-")
+        with st.expander(f"{icon} {fr} ({int(front_counts.get(fr, 0))} itens)", expanded=False):
+            subset[FAT_COLS[0]] = subset[FAT_COLS[0]].apply(lambda x: br_money(float(x)) if pd.notna(x) else "-")
             st.dataframe(subset, use_container_width=True, hide_index=True, height=350)
 
     st.markdown("</div>", unsafe_allow_html=True)
@@ -3312,6 +3072,11 @@ with tab4:
     
     st.markdown("</div>", unsafe_allow_html=True)
 
+
+if tab4.open:
+    with tab4:
+        render_report_tab()
+
 # Footer
 st.markdown('<div style="height:2rem"></div>', unsafe_allow_html=True)
 st.markdown(
@@ -3326,5 +3091,6 @@ st.markdown(
 # =========================
 # TAB 5: Guia de Uso
 # =========================
-with tab5:
-    render_guide_tab()
+if tab5.open:
+    with tab5:
+        render_guide_tab()
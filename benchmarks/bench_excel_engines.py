@@ -0,0 +1,121 @@
+"""
+Benchmark dos motores de leitura de Excel (data_processing/excel_engines.py).
+
+Mede o tempo de decodificação de cada motor disponível nos relatórios Shopee de
+exemplo do repositório e em um relatório Mercado Livre sintético grande.
+Com --process, mede também o MercadoLivreProcessor completo em cada motor.
+
+Uso:
+    python benchmarks/bench_excel_engines.py [--rows 50000] [--repeat 3] [--process]
+"""
+import argparse
+import datetime
+import io
+import os
+import random
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from data_processing.excel_engines import ENGINES  # noqa: E402
+from data_processing.mercado_livre_processor import MercadoLivreProcessor  # noqa: E402
+from data_processing.workbook import ParsedWorkbook  # noqa: E402
+
+SAMPLES = [
+    "parentskudetail.20251224_20260122.xlsx",
+    "sales_overview_20251224-20260122.xlsx",
+    "traffic_overview_20251224_20260122.xlsx",
+]
+
+MESES = ['janeiro', 'fevereiro', 'março', 'abril', 'maio', 'junho', 'julho',
+         'agosto', 'setembro', 'outubro', 'novembro', 'dezembro']
+
+LOGISTICAS = ['Mercado Envios Full', 'Correios e pontos de envio', 'Mercado Envios Flex',
+              'Coleta', 'Retirada']
+
+
+def synthetic_ml_report(rows: int, skus: int = 500, seed: int = 42) -> bytes:
+    """Gera um relatório de vendas ML no layout real (títulos, cabeçalho na linha 5)."""
+    from openpyxl import Workbook
+
+    rnd = random.Random(seed)
+    inicio = datetime.datetime(2025, 10, 1)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Vendas BR')
+    ws.append(['Relatório de vendas'])
+    ws.append(['Gerado em 22/01/2026'])
+    ws.append([])
+    ws.append(['Vendas', None, None, None, None, None, 'Anúncios', None, None, None, 'Envio'])
+    ws.append(['N.º de venda', 'Data da venda', 'Estado', 'Unidades', 'Receita por produtos (BRL)',
+               'Tarifa de venda', '# de anúncio', 'SKU', 'Título do anúncio',
+               'Venda por publicidade', 'Forma de entrega', 'Unidades'])
+    for i in range(rows):
+        k = int(rnd.paretovariate(1.2)) % skus
+        d = inicio + datetime.timedelta(days=rnd.randrange(110), minutes=rnd.randrange(1440))
+        data = f"{d.day} de {MESES[d.month - 1]} de {d.year} {d.hour:02d}:{d.minute:02d} hs."
+        unidades = rnd.choice([1, 1, 1, 2, 3])
+        ws.append([
+            2000000000 + i, data, 'Entregue', unidades, round(unidades * (10 + k * 1.7), 2), -1.5,
+            f"MLB{1000000 + k}", f"SKU-{k}", f"Produto {k}",
+            'Sim' if rnd.random() < 0.3 else None, rnd.choice(LOGISTICAS), 0,
+        ])
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def decode_all(data: bytes, engine: str) -> int:
+    """Decodifica todas as abas e retorna o total de linhas (só leitura, sem transformação)."""
+    wb = ParsedWorkbook(data, engine=engine)
+    total = sum(len(wb.rows(name)) for name in wb.sheet_names)
+    wb.close()
+    return total
+
+
+def best_of(repeat: int, func, *args) -> float:
+    tempos = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(*args)
+        tempos.append(time.perf_counter() - t0)
+    return min(tempos)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000, help="linhas do relatório ML sintético")
+    parser.add_argument("--repeat", type=int, default=3, help="repetições (vale o melhor tempo)")
+    parser.add_argument("--process", action="store_true", help="mede também o MercadoLivreProcessor")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    engines = [name for name, engine in ENGINES.items() if engine.available()]
+
+    arquivos = []
+    for sample in SAMPLES:
+        path = os.path.join(ROOT, sample)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                arquivos.append((sample, f.read()))
+    print(f"Gerando relatório ML sintético com {args.rows} linhas...")
+    ml_data = synthetic_ml_report(args.rows)
+    arquivos.append((f"ml_sintetico_{args.rows}.xlsx", ml_data))
+
+    print(f"\n{'arquivo':<45}" + "".join(f"{e:>12}" for e in engines))
+    for nome, data in arquivos:
+        tempos = [best_of(args.repeat, decode_all, data, engine) for engine in engines]
+        print(f"{nome:<45}" + "".join(f"{t:>11.3f}s" for t in tempos))
+
+    if args.process:
+        def processar(engine):
+            MercadoLivreProcessor().process([ParsedWorkbook(ml_data, engine=engine)])
+
+        tempos = [best_of(1, processar, engine) for engine in engines]
+        print(f"{'MercadoLivreProcessor (completo)':<45}" + "".join(f"{t:>11.3f}s" for t in tempos))
+
+
+if __name__ == "__main__":
+    main()
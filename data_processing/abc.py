@@ -0,0 +1,198 @@
+"""
+Curva ABC por faturamento.
+Classifica todos os períodos de uma vez sobre a matriz produto x período: cada
+coluna é ordenada (argsort), acumulada (cumsum) e classificada com np.select; o
+resultado volta para a posição original de cada produto, sem merge.
+"""
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Limites do faturamento acumulado: até 80% = A, até 95% = B, restante = C
+ABC_THRESHOLDS = (0.80, 0.95)
+
+# Produtos sem faturamento no período ficam como '-'
+ABC_CLASSES = ['A', 'B', 'C', '-']
+ABC_DTYPE = pd.CategoricalDtype(ABC_CLASSES)
+NO_SALES = ABC_CLASSES.index('-')
+
+
+def abc_codes(revenue, thresholds: Sequence[float] = ABC_THRESHOLDS) -> np.ndarray:
+    """
+    Códigos da curva (0=A, 1=B, 2=C, 3='-') para uma matriz produto x período
+    (ou um vetor, tratado como um único período). NaN conta como zero.
+    """
+    rev = np.nan_to_num(np.asarray(revenue, dtype=float))
+    if rev.ndim == 1:
+        return abc_codes(rev[:, None], thresholds)[:, 0]
+
+    order = np.argsort(-rev, axis=0, kind='stable')
+    total = rev.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share = np.cumsum(np.take_along_axis(rev, order, axis=0), axis=0) / total
+    a, b = thresholds
+    ranked = np.select([share <= a, share <= b], [0, 1], default=2).astype(np.int8)
+
+    codes = np.empty_like(ranked)
+    np.put_along_axis(codes, order, ranked, axis=0)
+    codes[rev == 0] = NO_SALES
+    codes[:, total <= 0] = NO_SALES
+    return codes
+
+
+def abc_classes(revenue, thresholds: Sequence[float] = ABC_THRESHOLDS) -> List[pd.Categorical]:
+    """Curva de cada coluna da matriz produto x período, como categóricos (uma entrada por período)."""
+    codes = abc_codes(revenue, thresholds)
+    return [pd.Categorical.from_codes(codes[:, i], dtype=ABC_DTYPE) for i in range(codes.shape[1])]
+
+
+def abc_curve(revenue: pd.Series, thresholds: Sequence[float] = ABC_THRESHOLDS) -> pd.Series:
+    """Curva ABC de uma coluna de faturamento (Series categórica com o mesmo índice)."""
+    return pd.Series(
+        pd.Categorical.from_codes(abc_codes(revenue.to_numpy(), thresholds), dtype=ABC_DTYPE),
+        index=revenue.index,
+        name='curva_abc',
+    )
+
+
+def abc_transitions(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mudanças de curva entre colunas consecutivas de uma matriz de códigos (produto x dia):
+    quantos produtos subiram (ex.: B -> A, '-' -> C) e quantos caíram em cada coluna.
+    A primeira coluna não tem anterior e fica zerada.
+    """
+    prev, cur = codes[:, :-1], codes[:, 1:]
+    up = np.concatenate([[0], (cur < prev).sum(axis=0)])
+    down = np.concatenate([[0], (cur > prev).sum(axis=0)])
+    return up, down
+
+
+class WhatIfABC:
+    """
+    Curva ABC editável para simulações ("e se o faturamento deste produto dobrar?",
+    "e se tirarmos estes 50 itens?").
+
+    Mantém o ranking por faturamento (ordem decrescente, empates pela posição do
+    produto, como abc_codes) e a soma acumulada ao longo dele. Uma edição move o
+    produto no ranking por busca binária (sem reordenar), desloca só o trecho entre a
+    posição antiga e a nova, refaz a soma acumulada a partir desse trecho (um cumsum,
+    sem ordenação) e reclassifica apenas os produtos perto dos cortes de 80%/95%, que
+    são os únicos que podem mudar de curva. Soma acumulada e total são recalculados
+    dos valores a cada edição, e não atualizados pela diferença, para que a curva
+    continue idêntica à de abc_codes depois de qualquer sequência de edições. Com faturamento
+    negativo a soma acumulada deixa de ser crescente e a reclassificação é completa.
+
+    `codes` tem sempre a curva atual (mesmos códigos de abc_codes).
+    """
+
+    def __init__(self, revenue, thresholds: Sequence[float] = ABC_THRESHOLDS):
+        self.revenue = np.nan_to_num(np.asarray(revenue, dtype=float)).copy()
+        self.thresholds = tuple(thresholds)
+        self._order = np.argsort(-self.revenue, kind='stable')
+        # Posição de cada produto no ranking (inversa de _order)
+        self._pos = np.empty_like(self._order)
+        self._pos[self._order] = np.arange(len(self._order))
+        self._neg = -self.revenue[self._order]
+        self._cum = np.cumsum(self.revenue[self._order])
+        self._total = self.revenue.sum()
+        self._cuts = self._find_cuts()
+        self.codes = abc_codes(self.revenue, self.thresholds)
+
+    def set_revenue(self, item: int, value: float) -> np.ndarray:
+        """Altera o faturamento de um produto. Retorna os produtos que mudaram de curva."""
+        value = float(np.nan_to_num(value))
+        old_value = self.revenue[item]
+        if value == old_value:
+            return np.empty(0, dtype=np.int64)
+
+        # Nova posição (chave: -faturamento, produto) contando o ranking sem o produto
+        old_pos = int(self._pos[item])
+        lo = int(np.searchsorted(self._neg, -value, side='left'))
+        hi = int(np.searchsorted(self._neg, -value, side='right'))
+        new_pos = lo + int(np.searchsorted(self._order[lo:hi], item))
+        if old_pos < new_pos:
+            new_pos -= 1
+
+        # Desloca só o trecho entre a posição antiga e a nova
+        start, stop = min(old_pos, new_pos), max(old_pos, new_pos) + 1
+        if old_pos < new_pos:
+            self._order[old_pos:new_pos] = self._order[old_pos + 1:new_pos + 1]
+            self._neg[old_pos:new_pos] = self._neg[old_pos + 1:new_pos + 1]
+        elif new_pos < old_pos:
+            self._order[new_pos + 1:old_pos + 1] = self._order[new_pos:old_pos].copy()
+            self._neg[new_pos + 1:old_pos + 1] = self._neg[new_pos:old_pos].copy()
+        self._order[new_pos] = item
+        self._neg[new_pos] = -value
+        self._pos[self._order[start:stop]] = np.arange(start, stop)
+        self.revenue[item] = value
+
+        # Soma acumulada refeita a partir do trecho deslocado e total refeito dos valores,
+        # nas mesmas operações de abc_codes (somar a diferença acumularia erro de arredondamento)
+        tail = -self._neg[start:]
+        if start:
+            tail[0] += self._cum[start - 1]
+        np.cumsum(tail, out=self._cum[start:])
+        self._total = self.revenue.sum()
+
+        old_cuts = self._cuts
+        self._cuts = self._find_cuts()
+        if self._cuts is None or old_cuts is None:
+            positions = np.arange(len(self._order))
+        else:
+            # Fora de [corte - 1, corte] nenhum produto troca de lado do corte
+            spans = [np.arange(max(min(a, b) - 1, 0), min(max(a, b) + 1, len(self._order)))
+                     for a, b in zip(old_cuts, self._cuts)]
+            positions = np.unique(np.concatenate(spans + [[new_pos]]))
+
+        items = self._order[positions]
+        codes = self._classify(positions)
+        changed = codes != self.codes[items]
+        self.codes[items[changed]] = codes[changed]
+        return items[changed]
+
+    def scale(self, item: int, factor: float) -> np.ndarray:
+        """Multiplica o faturamento de um produto (ex.: 2 = dobrar)."""
+        return self.set_revenue(item, self.revenue[item] * factor)
+
+    def remove(self, items) -> np.ndarray:
+        """Tira produtos da curva (faturamento zerado). Retorna os que mudaram de curva."""
+        before = self.codes.copy()
+        changed = [self.set_revenue(int(i), 0.0) for i in np.atleast_1d(items)]
+        if not changed:
+            return np.empty(0, dtype=np.int64)
+        # Um produto pode mudar de curva em uma remoção e voltar em outra
+        changed = np.unique(np.concatenate(changed))
+        return changed[self.codes[changed] != before[changed]]
+
+    def _find_cuts(self):
+        """
+        Quantas posições do ranking ficam em cada faixa (participação acumulada <= limite),
+        ou None quando a soma acumulada não é crescente (faturamento negativo ou total <= 0).
+        """
+        n = len(self._cum)
+        if n == 0 or self._neg[-1] > 0 or self._total <= 0:
+            return None
+        cuts = []
+        for limit in self.thresholds:
+            k = int(np.searchsorted(self._cum, limit * self._total, side='right'))
+            # Mesmo critério de abc_codes (acumulado / total <= limite), sem erro de arredondamento
+            while k > 0 and not self._cum[k - 1] / self._total <= limit:
+                k -= 1
+            while k < n and self._cum[k] / self._total <= limit:
+                k += 1
+            cuts.append(k)
+        return tuple(cuts)
+
+    def _classify(self, positions: np.ndarray) -> np.ndarray:
+        """Códigos da curva das posições do ranking."""
+        if self._total <= 0:
+            return np.full(len(positions), NO_SALES, dtype=np.int8)
+        a, b = self.thresholds
+        if self._cuts is not None:
+            codes = (positions >= self._cuts[0]).astype(np.int8) + (positions >= self._cuts[1])
+        else:
+            share = self._cum[positions] / self._total
+            codes = np.select([share <= a, share <= b], [0, 1], default=2).astype(np.int8)
+        codes[self._neg[positions] == 0] = NO_SALES
+        return codes.astype(np.int8)
@@ -0,0 +1,199 @@
+"""
+Ação sugerida e planos de 7/15/30 dias por produto.
+As regras de cada canal ficam em tabelas ordenadas (vale a primeira regra que
+casar, como em logistics). Cada tabela é compilada em um único np.select que
+escolhe a regra de cada produto; os textos das colunas saem por indexação nessa
+escolha, para o catálogo inteiro de uma vez.
+"""
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .segments import Catalog, Segmentation
+
+# Segmento dos produtos que não estão em nenhum segmento
+UNSEGMENTED = '-'
+
+
+class ActionRule(NamedTuple):
+    """
+    Textos atribuídos aos produtos que atendem todas as condições informadas.
+
+    Args:
+        texts: Um texto por coluna de saída
+        curve: Curvas aceitas na janela atual (ex.: 'AB'); None = qualquer
+        previous: Curvas aceitas na janela anterior; None = qualquer
+        segment: Segmento do produto (nome da tabela de segmentos ou UNSEGMENTED); None = qualquer
+        test: Condição adicional sobre o catálogo (ex.: faturamento > 0)
+    """
+    texts: Tuple[str, ...]
+    curve: Optional[str] = None
+    previous: Optional[str] = None
+    segment: Optional[str] = None
+    test: Optional[Callable[[Catalog], np.ndarray]] = None
+
+
+def _has_tm(c: Catalog) -> np.ndarray:
+    return c.col('TM total') > 0
+
+
+def _has_fat(c: Catalog) -> np.ndarray:
+    return c.col('Fat total') > 0
+
+
+# Ação sugerida (Mercado Livre): compara a curva atual com a da janela anterior
+ML_SUGGESTED = (
+    ActionRule(("Garantir estoque 30-60d + completar ficha técnica 100% + avaliar ML Ads",), curve='A', previous='AB'),
+    ActionRule(("Subiu rápido – validar se é sazonal ou tendência antes de escalar",), curve='A', previous='C-'),
+    ActionRule(("Caiu de A→B: diagnosticar (CTR/conversão/Buy Box) + corrigir gargalo",), curve='B', previous='A'),
+    ActionRule(("Potencial de crescimento: otimizar anúncio (conversão >2%) + testar ML Ads",), curve='B', previous='BC'),
+    ActionRule(("Diagnosticar gargalo (foto/preço/descrição) + testar promoção ou kit",), curve='C'),
+    ActionRule(("Sem giro: otimizar última chance (preço/foto) ou liquidar e liberar capital",), curve='-'),
+)
+
+# Ação sugerida (Shopee): sem histórico, usa apenas a curva atual
+SHOPEE_SUGGESTED = (
+    ActionRule(("Garantir estoque 30d + otimizar fotos/título + avaliar Shopee Ads",), curve='A'),
+    ActionRule(("Testar Shopee Ads com palavras-chave específicas (cauda longa)",), curve='B'),
+    # C com bom ticket médio (potencial)
+    ActionRule(("Diagnosticar gargalo (CTR/conversão) + melhorar imagens/descrição",), curve='C', test=_has_tm),
+    ActionRule(("Testar preço promocional + bundle ou liquidar",), curve='C'),
+    # '-' que já faturou (dead stock) ou inativo
+    ActionRule(("Criar bundle com produto âncora ou participar Shopee Liquida",), curve='-', test=_has_fat),
+    ActionRule(("Testar preço promocional última chance ou desativar",), curve='-'),
+)
+
+# Planos de 7/15/30 dias pela frente do produto. Um produto pode estar em vários
+# segmentos: vale o primeiro da tabela (limpeza > ataque > correção > defesa).
+# Produtos fora dos segmentos recebem o plano de otimização pela curva atual.
+_OPTIMIZATION_PLANS = (
+    # Produto A que não é âncora - subiu rápido
+    ActionRule(("Validar se é sazonal", "Monitorar tendência", "Decidir estratégia"), segment=UNSEGMENTED, curve='A'),
+    # Produto B estável ou em transição
+    ActionRule(("Analisar histórico", "Testar otimização", "Avaliar promoção"), segment=UNSEGMENTED, curve='B'),
+    # Produto C - baixo volume
+    ActionRule(("Revisar preço", "Testar destaque", "Avaliar combo"), segment=UNSEGMENTED, curve='C'),
+    # Sem vendas recentes
+    ActionRule(("Verificar anúncio", "Ajustar estratégia", "Decidir manter/remover"), segment=UNSEGMENTED),
+)
+
+ML_PLANS = (
+    # LIMPEZA - Inativar
+    ActionRule((
+        "Calcular custo oportunidade (capital imobilizado) + diagnosticar: obsoleto ou anúncio ruim?",
+        "Liquidação: preço agressivo + frete grátis + comunicar 'Última Chance' + ML Ads baixo orçamento",
+        "Se não vendeu: desativar + liquidar lote (revendedores) ou doar (crédito fiscal)",
+    ), segment='inactivate'),
+    # LIMPEZA - Combo/Kit
+    ActionRule((
+        "Analisar: quem comprou também comprou? Pesquisar kits concorrentes + avaliar margem kit",
+        "Criar kit (dead stock + âncora) desconto 10-20% + anúncio novo otimizado + variações",
+        "Se kit não vendeu: liquidação agressiva (preço abaixo custo) + oferta relâmpago",
+    ), segment='dead_stock_combo'),
+    # ATAQUE - Oportunidades B/C
+    ActionRule((
+        "Calcular margem líquida + ACOS máx aceitável + otimizar anúncio (conversão >2%)",
+        "Testar ML Ads: termos específicos (ex: 'tênis corrida nike 42' > 'tênis') + monitorar CTR",
+        "Ajustar lances (alto ROAS: +lance | baixo: pausar) + testar kit com produto âncora",
+    ), segment='opp_50_60'),
+    # ATAQUE - Subindo para A
+    ActionRule((
+        "Estoque 60-90d + validar conversão >2% + completar ficha técnica 100% + Full/Flex",
+        "Ativar ML Ads: orçamento baixo + palavras cauda longa + monitorar ACOS diariamente",
+        "Se ACOS <25-30%: aumentar budget + participar ofertas relâmpago + monitorar posição orgânica",
+    ), segment='rise_to_A'),
+    # CORREÇÃO - Reativar produtos
+    ActionRule((
+        "Diagnosticar problema: sem impressões (SEO) ou CTR baixo (foto) + verificar categoria correta",
+        "Otimizar: título com palavra-chave + ficha técnica 100% + foto fundo branco + vídeo",
+        "Testar preço promocional (abaixo média) + cupom + monitorar se conversão voltou",
+    ), segment='revitalize'),
+    # CORREÇÃO - Queda de faturamento / Fuga de receita
+    ActionRule((
+        "Diagnosticar: CTR <1% (foto/título) ou conversão <2% (preço/descrição/frete) + comparar concorrentes",
+        "Corrigir gargalo: foto fundo branco + título otimizado + FAQ na descrição + ajustar preço",
+        "Se ajustes não funcionaram: oferta relâmpago ou cupom + responder avaliações negativas",
+    ), segment='drop_alert'),
+    # DEFESA - Âncoras (produtos A estáveis)
+    ActionRule((
+        "Estoque 30-60d + monitorar Buy Box + validar reputação (resposta <24h, reclamações <1%)",
+        "Completar ficha técnica 100% + adicionar vídeo 15-30s + organizar variações",
+        "Se conversão >2%: testar ML Ads (cauda longa, ACOS <25-30%) + Full/Flex",
+    ), segment='anchors'),
+) + _OPTIMIZATION_PLANS
+
+SHOPEE_PLANS = (
+    # LIMPEZA - Inativar
+    ActionRule((
+        "Calcular custo oportunidade (capital imobilizado) + verificar se obsoleto",
+        "Liquidação: preço agressivo + frete grátis + comunicar 'Última Chance'",
+        "Se não vendeu: desativar + liquidar lote ou doar (crédito fiscal)",
+    ), segment='inactivate'),
+    # LIMPEZA - Combo/Kit
+    ActionRule((
+        "Analisar: quem comprou também comprou? Pesquisar combos concorrentes",
+        "Criar bundle (dead stock + âncora) desconto 10-20% + anúncio novo",
+        "Se bundle não funcionou: Shopee Liquida com preço agressivo",
+    ), segment='dead_stock_combo'),
+    # ATAQUE - Oportunidades B/C
+    ActionRule((
+        "Calcular margem líquida + ACOS máx aceitável + volume busca categoria",
+        "Testar Ads: termos específicos (ex: 'sapato social preto 40' > 'sapato')",
+        "Ajustar lances (alto rendimento: +lance | baixo: pausar) + criar bundles",
+    ), segment='opp_50_60'),
+    # ATAQUE - Subindo para A
+    ActionRule((
+        "Estoque 30-60d + otimizar anúncio (conversão >2%) antes de investir Ads",
+        "Ativar Shopee Ads: orçamento baixo + palavras cauda longa + monitorar ACOS",
+        "Se ROAS >3: aumentar budget + participar campanhas (11.11, Black Friday)",
+    ), segment='rise_to_A'),
+    # CORREÇÃO - Reativar produtos
+    ActionRule((
+        "Ler avaliações negativas concorrentes + responder todas avaliações negativas",
+        "Ajustar preço (usar âncora: cheio+desconto) + melhorar capa (fundo limpo)",
+        "Cupom seguidor (criar base clientes) + monitorar se conversão voltou",
+    ), segment='revitalize'),
+    # CORREÇÃO - Queda de faturamento / Fuga de receita
+    ActionRule((
+        "Diagnosticar: CTR baixo (imagem/título) ou conversão baixa (descrição/preço/frete)",
+        "Testar nova capa (zoom produto + selo benefício) + expandir descrição com FAQ",
+        "Participar Flash Sale (margem mín aceitável) + cupom prazo limitado",
+    ), segment='drop_alert'),
+    # DEFESA - Âncoras (produtos A estáveis)
+    ActionRule((
+        "Garantir estoque 30-60d + monitorar taxa resposta (100%) + checar prazo entrega",
+        "Adicionar foto uso real + tabela medidas + responder FAQ na descrição",
+        "Testar Shopee Ads (cauda longa) se ACOS < margem + criar bundle upsell",
+    ), segment='anchors'),
+) + _OPTIMIZATION_PLANS
+
+
+def _condition(rule: ActionRule, segments: Segmentation) -> np.ndarray:
+    """Máscara dos produtos que atendem a regra."""
+    catalog = segments.catalog
+    mask = np.ones(len(catalog), dtype=bool)
+    if rule.curve is not None:
+        mask &= catalog.curve(0, rule.curve)
+    if rule.previous is not None:
+        mask &= catalog.curve(1, rule.previous)
+    if rule.segment == UNSEGMENTED:
+        mask &= ~segments.classified()
+    elif rule.segment is not None:
+        mask &= segments.mask(rule.segment)
+    if rule.test is not None:
+        mask &= rule.test(catalog)
+    return mask
+
+
+def apply_rules(rules: Sequence[ActionRule], segments: Segmentation, default: str = "-") -> List[np.ndarray]:
+    """
+    Textos de cada produto do catálogo, uma lista por coluna de saída (object arrays).
+    Produtos que não atendem nenhuma regra recebem `default`.
+    """
+    conditions = [_condition(rule, segments) for rule in rules]
+    chosen = np.select(conditions, np.arange(len(rules)), default=len(rules))
+    out = []
+    for column in range(len(rules[0].texts)):
+        texts = np.array([rule.texts[column] for rule in rules] + [default], dtype=object)
+        out.append(texts[chosen])
+    return out
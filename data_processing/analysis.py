@@ -0,0 +1,227 @@
+"""
+Análise pós-carga: filtros, KPIs por período, segmentações, plano tático e
+métricas do snapshot, calculados uma única vez por relatório (AnalysisResult).
+As abas do app apenas fatiam o resultado.
+"""
+from typing import Dict, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .abc import ABC_CLASSES
+from .actions import ML_PLANS, ML_SUGGESTED, SHOPEE_PLANS, SHOPEE_SUGGESTED, apply_rules
+from .periods import period_columns
+from .segments import ML_SEGMENTS, SHOPEE_SEGMENTS, Segmentation, segment_catalog
+
+
+class AnalysisResult(NamedTuple):
+    """Resultado da análise de um relatório (somente leitura: é compartilhado entre reruns)."""
+    df: pd.DataFrame
+    df_logistics: pd.DataFrame
+    df_ads: pd.DataFrame
+    parse_issues: Dict[str, pd.Series]
+    df_f: pd.DataFrame
+    kpi_df: pd.DataFrame
+    anchors: pd.DataFrame
+    inactivate: pd.DataFrame
+    revitalize: pd.DataFrame
+    rise_to_A: pd.DataFrame
+    opp_50_60: pd.DataFrame
+    dead_stock_combo: pd.DataFrame
+    drop_alert: pd.DataFrame
+    plan: pd.DataFrame
+    front_counts: pd.Series
+    dist_0_30_df: pd.DataFrame
+    conc_A_0_30: float
+    tm_0_30: float
+    tm_reading: str
+    total_ads: int
+    tt_fat: float
+    tt_qty: int
+    tm_geral: float
+    ancoras_valor: float
+    snapshot: Dict[str, object]
+    segments: Segmentation
+
+
+def _safe_ratio(num: pd.Series, den: pd.Series) -> np.ndarray:
+    """num / den por linha, NaN onde den é zero ou vazio."""
+    num = num.to_numpy(dtype=float)
+    den = den.to_numpy(dtype=float)
+    return np.divide(num, den, out=np.full(len(num), np.nan), where=(den != 0) & ~np.isnan(den))
+
+
+def build_analysis(df: pd.DataFrame, df_logistics: pd.DataFrame, df_ads: pd.DataFrame, canal: str,
+                   labels: Sequence[str], curve_filter: Sequence[str] = ABC_CLASSES,
+                   parse_issues: Optional[Dict[str, pd.Series]] = None) -> AnalysisResult:
+    """
+    Calcula tudo o que o painel mostra a partir do export carregado.
+
+    Args:
+        df, df_logistics, df_ads: Saídas do carregamento (export, logística e Ads)
+        canal: 'Mercado Livre' ou 'Shopee' (a Shopee tem um único período e regras próprias)
+        labels: Rótulos das janelas de análise (a primeira é a atual)
+        curve_filter: Curvas da janela atual incluídas na análise
+        parse_issues: Células não numéricas da carga, por coluna (repassadas ao painel)
+
+    Com nenhum produto nas curvas do filtro, só df/df_logistics/df_ads/parse_issues/df_f
+    são preenchidos.
+    """
+    PERIOD_LABELS = list(labels)
+    QTY_COLS, FAT_COLS, CURVE_COLS = period_columns(PERIOD_LABELS)
+    shopee = canal == 'Shopee'
+    parse_issues = parse_issues or {}
+
+    # Filtrar por curva
+    df_f = df.iloc[0:0] if df.empty else df[df[CURVE_COLS[0]].isin(curve_filter)].copy()
+
+    if df_f.empty:
+        return AnalysisResult(df, df_logistics, df_ads, parse_issues, df_f,
+                              *([None] * (len(AnalysisResult._fields) - 5)))
+
+    # =========================
+    # Cálculos auxiliares
+    # =========================
+    df_f["Fat total"] = df_f[FAT_COLS].sum(axis=1)
+    df_f["Qtd total"] = df_f[QTY_COLS].sum(axis=1)
+    df_f["TM total"] = _safe_ratio(df_f["Fat total"], df_f["Qtd total"])
+
+    # KPIs por período (mais antigo primeiro), somando todas as janelas de uma vez
+    kpi_fat = df_f[FAT_COLS].sum().to_numpy(dtype=float)[::-1]
+    kpi_qty = df_f[QTY_COLS].sum().to_numpy(dtype=int)[::-1]
+    kpi_df = pd.DataFrame({
+        "Período": PERIOD_LABELS[::-1],
+        "Qtd": kpi_qty,
+        "Faturamento": kpi_fat,
+        "Ticket médio": np.divide(kpi_fat, kpi_qty, out=np.full(len(kpi_fat), np.nan), where=kpi_qty != 0),
+    })
+
+    # =========================
+    # Segmentações
+    # =========================
+    # Todas as regras avaliadas de uma vez; o catálogo é ordenado uma vez por critério
+    segments = segment_catalog(df_f, PERIOD_LABELS, SHOPEE_SEGMENTS if shopee else ML_SEGMENTS)
+    anchors = segments.frame('anchors')
+    inactivate = segments.frame('inactivate')
+    revitalize = segments.frame('revitalize')
+    rise_to_A = segments.frame('rise_to_A')
+    opp_50_60 = segments.frame('opp_50_60')
+    dead_stock_combo = segments.frame('dead_stock_combo')
+    drop_alert = segments.frame('drop_alert')
+
+    # =========================
+    # Plano tático
+    # =========================
+    plan = df_f.copy()
+
+    # Ação sugerida e planos 7/15/30 dias pelas tabelas de regras do canal
+    (plan["Ação sugerida"],) = apply_rules(SHOPEE_SUGGESTED if shopee else ML_SUGGESTED, segments)
+    plan["Plano 7 dias"], plan["Plano 15 dias"], plan["Plano 30 dias"] = apply_rules(
+        SHOPEE_PLANS if shopee else ML_PLANS, segments)
+
+    plan["Frente"], front_counts = segments.fronts()
+
+    # =========================
+    # Diagnóstico macro
+    # =========================
+    dist_0_30 = df_f[CURVE_COLS[0]].value_counts().reindex(["A", "B", "C", "-"]).fillna(0).astype(int)
+    dist_0_30_df = pd.DataFrame({"Curva": dist_0_30.index, "Anúncios": dist_0_30.values})
+
+    fat_0_30_total = float(df_f[FAT_COLS[0]].sum())
+    fat_0_30_A = float(df_f.loc[df_f[CURVE_COLS[0]] == "A", FAT_COLS[0]].sum())
+    conc_A_0_30 = fat_0_30_A / fat_0_30_total if fat_0_30_total else np.nan
+
+    # Busca ticket médio usando os nomes de período
+    tm_0_30_row = kpi_df.loc[kpi_df["Período"] == PERIOD_LABELS[0], "Ticket médio"]
+    tm_31_60_row = kpi_df.loc[kpi_df["Período"] == PERIOD_LABELS[1], "Ticket médio"]
+    tm_61_90_row = kpi_df.loc[kpi_df["Período"] == PERIOD_LABELS[2], "Ticket médio"]
+
+    tm_0_30 = float(tm_0_30_row.iloc[0]) if len(tm_0_30_row) > 0 else 0.0
+    tm_31_60 = float(tm_31_60_row.iloc[0]) if len(tm_31_60_row) > 0 else 0.0
+    tm_61_90 = float(tm_61_90_row.iloc[0]) if len(tm_61_90_row) > 0 else 0.0
+
+    def tm_direction(a, b, c):
+        if np.isnan(a) or np.isnan(b) or np.isnan(c):
+            return "Sem dados suficientes para leitura do ticket médio."
+        if a < b < c:
+            return "📈 Ticket médio subindo. Ajuda margem, mas pode cair volume se preço esticar."
+        if a > b > c:
+            return "📉 Ticket médio caindo. Pode ser mix mais barato ou promoções."
+        if b < a and c > b:
+            return "🔄 Ticket caiu e depois recuperou."
+        if b > a and c < b:
+            return "⚡ Ticket subiu e depois caiu."
+        return "📊 Ticket oscilando. Vale cruzar com mix e concorrência."
+
+    tm_reading = tm_direction(tm_0_30, tm_31_60, tm_61_90)
+
+    # =========================
+    # KPIs topo e Histórico
+    # =========================
+    total_ads = len(df_f)
+    tt_fat = float(df_f[FAT_COLS].sum().sum())
+    tt_qty = int(df_f[QTY_COLS].sum().sum())
+    tm_geral = tt_fat / tt_qty if tt_qty else 0.0
+
+    # Preparar snapshot atual
+    fuga_count = len(drop_alert)
+    fuga_valor = float(drop_alert['Perda estimada'].sum()) if not drop_alert.empty else 0.0
+    ancoras_count = len(anchors)
+    ancoras_valor = float(anchors['Fat total'].sum()) if not anchors.empty else 0.0
+
+    # Pegar dados de Ads do período atual para o snapshot
+    ads_pct_snap = 0.0
+    ads_valor_snap = 0.0
+    organic_valor_snap = 0.0
+    if not df_ads.empty:
+        ads_row_snap = df_ads[df_ads['periodo'] == PERIOD_LABELS[0]]
+        if not ads_row_snap.empty:
+            ads_row_snap = ads_row_snap.iloc[0]
+            ads_pct_snap = float(ads_row_snap.get('ads_pct', 0))
+            ads_valor_snap = float(ads_row_snap.get('ads_value', 0))
+            organic_valor_snap = float(ads_row_snap.get('organic_value', 0))
+
+    snapshot = {
+        "canal": canal,
+        "total_ads": total_ads,
+        "total_fat": tt_fat,
+        "total_qty": tt_qty,
+        "conc_a": float(conc_A_0_30),
+        "tm_atual": tm_geral,
+        "fuga_receita_count": fuga_count,
+        "fuga_receita_valor": fuga_valor,
+        "ancoras_count": ancoras_count,
+        "ancoras_valor": ancoras_valor,
+        "ads_pct": ads_pct_snap,
+        "ads_valor": ads_valor_snap,
+        "organic_valor": organic_valor_snap
+    }
+
+    return AnalysisResult(
+        df=df,
+        df_logistics=df_logistics,
+        df_ads=df_ads,
+        parse_issues=parse_issues,
+        df_f=df_f,
+        kpi_df=kpi_df,
+        anchors=anchors,
+        inactivate=inactivate,
+        revitalize=revitalize,
+        rise_to_A=rise_to_A,
+        opp_50_60=opp_50_60,
+        dead_stock_combo=dead_stock_combo,
+        drop_alert=drop_alert,
+        plan=plan,
+        front_counts=front_counts,
+        dist_0_30_df=dist_0_30_df,
+        conc_A_0_30=conc_A_0_30,
+        tm_0_30=tm_0_30,
+        tm_reading=tm_reading,
+        total_ads=total_ads,
+        tt_fat=tt_fat,
+        tt_qty=tt_qty,
+        tm_geral=tm_geral,
+        ancoras_valor=ancoras_valor,
+        snapshot=snapshot,
+        segments=segments,
+    )
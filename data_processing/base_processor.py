@@ -3,8 +3,11 @@ Classe base abstrata para processadores de dados de canais de venda.
 Todos os processadores específicos de canal devem herdar desta classe.
 """
 from abc import ABC, abstractmethod
+import threading
 import pandas as pd
-from typing import Tuple, Optional
+from typing import Dict, Tuple, Optional
+from .abc import ABC_DTYPE, abc_curve
+from .parsing import parse_number
 
 
 class BaseProcessor(ABC):
@@ -12,6 +15,22 @@ class BaseProcessor(ABC):
     
     def __init__(self):
         self.canal_name = "Base"
+        # Células que não puderam ser convertidas em número, por coluna
+        # (devolvidas ao painel junto com os dados; planilhas são lidas em paralelo)
+        self.parse_issues: Dict[str, pd.Series] = {}
+        self._issues_lock = threading.Lock()
+    
+    def parse_number_column(self, values: pd.Series, label: str, percent: bool = False) -> pd.Series:
+        """
+        Converte uma coluna monetária/percentual com parse_number.
+        Células inválidas ficam NaN e são registradas em parse_issues[label].
+        """
+        parsed, invalid = parse_number(values, percent=percent)
+        if len(invalid):
+            with self._issues_lock:
+                previous = self.parse_issues.get(label)
+                self.parse_issues[label] = invalid if previous is None else pd.concat([previous, invalid])
+        return parsed
     
     @abstractmethod
     def detect(self, file) -> bool:
@@ -19,7 +38,7 @@ class BaseProcessor(ABC):
         Detecta se o arquivo pertence a este canal.
         
         Args:
-            file: Arquivo uploaded pelo usuário
+            file: Arquivo uploaded pelo usuário (ou ParsedWorkbook já aberto)
             
         Returns:
             bool: True se o arquivo pertence a este canal
@@ -32,7 +51,7 @@ class BaseProcessor(ABC):
         Processa os arquivos do canal e retorna DataFrames padronizados.
         
         Args:
-            files: Lista de arquivos do canal
+            files: Lista de arquivos do canal (ou ParsedWorkbook já abertos)
             
         Returns:
             Tuple contendo:
@@ -44,7 +63,7 @@ class BaseProcessor(ABC):
     
     def calculate_abc_curve(self, df: pd.DataFrame, revenue_col: str, group_col: str = None) -> pd.DataFrame:
         """
-        Calcula a curva ABC baseada no faturamento.
+        Calcula a curva ABC baseada no faturamento (motor de data_processing.abc).
         
         Args:
             df: DataFrame com os dados
@@ -52,44 +71,17 @@ class BaseProcessor(ABC):
             group_col: Coluna opcional para agrupar antes do cálculo
             
         Returns:
-            DataFrame com coluna 'curva_abc' adicionada
+            DataFrame com coluna 'curva_abc' (categórica) adicionada
         """
         result = df.copy()
         
         if group_col and group_col in result.columns:
-            # Agrupa por produto antes de calcular
-            agg_df = result.groupby(group_col)[revenue_col].sum().reset_index()
-        else:
-            agg_df = result[[revenue_col]].copy()
-            agg_df['_id'] = range(len(agg_df))
-            group_col = '_id'
-        
-        # Ordena por faturamento decrescente
-        agg_df = agg_df.sort_values(revenue_col, ascending=False)
-        
-        # Calcula percentual acumulado
-        total_revenue = agg_df[revenue_col].sum()
-        if total_revenue > 0:
-            agg_df['_pct_acum'] = (agg_df[revenue_col].cumsum() / total_revenue) * 100
-        else:
-            agg_df['_pct_acum'] = 0
-        
-        # Classifica em curvas
-        def classify_curve(pct):
-            if pct <= 80:
-                return 'A'
-            elif pct <= 95:
-                return 'B'
-            else:
-                return 'C'
-        
-        agg_df['curva_abc'] = agg_df['_pct_acum'].apply(classify_curve)
-        
-        # Merge de volta ao DataFrame original
-        if '_id' in agg_df.columns:
-            result['curva_abc'] = agg_df['curva_abc'].values
+            # Agrupa por produto antes de calcular e devolve a curva para cada linha
+            agg = result.groupby(group_col, sort=False)[revenue_col].sum()
+            curve = abc_curve(agg)
+            result['curva_abc'] = pd.Categorical(result[group_col].map(curve), dtype=ABC_DTYPE)
         else:
-            result = result.merge(agg_df[[group_col, 'curva_abc']], on=group_col, how='left')
+            result['curva_abc'] = abc_curve(result[revenue_col]).array
         
         # Produtos sem vendas ficam como "-"
         result['curva_abc'] = result['curva_abc'].fillna('-')
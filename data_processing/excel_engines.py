@@ -0,0 +1,200 @@
+"""
+Motores de leitura de planilhas Excel.
+O ParsedWorkbook usa o motor mais rápido disponível (calamine, escrito em Rust)
+e recorre ao openpyxl quando o calamine não está instalado ou falha no arquivo.
+O motor pode ser fixado pela variável de ambiente CURVA_ABC_EXCEL_ENGINE
+("auto", "calamine", "openpyxl" ou "pandas") ou por set_default_engine().
+"""
+import io
+import os
+from abc import ABC, abstractmethod
+from datetime import date, timedelta
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+ENGINE_ENV_VAR = "CURVA_ABC_EXCEL_ENGINE"
+
+_default_engine: Optional[str] = None
+
+
+class ExcelEngine(ABC):
+    """
+    Classe base dos motores. As células são convertidas exatamente como o
+    pd.read_excel do motor correspondente faz, para que o resultado não dependa
+    do motor escolhido.
+    """
+
+    name = "base"
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    @abstractmethod
+    def open(self, data: bytes):
+        """Abre a planilha a partir do conteúdo do arquivo."""
+        pass
+
+    @abstractmethod
+    def sheet_names(self, book) -> List[str]:
+        """Nomes das abas, na ordem do arquivo."""
+        pass
+
+    @abstractmethod
+    def iter_rows(self, book, sheet_name: str, columns: Optional[List[int]] = None) -> Iterator[list]:
+        """Gera as linhas da aba (vazias = ""); com `columns`, apenas essas posições."""
+        pass
+
+    def close(self, book) -> None:
+        pass
+
+
+class CalamineEngine(ExcelEngine):
+    """
+    Leitor em Rust (python-calamine). Tipicamente 5-10x mais rápido que o openpyxl.
+    Diferença conhecida: espaços no fim de textos compartilhados são descartados
+    (os processadores já aplicam strip nesses campos).
+    """
+
+    name = "calamine"
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import python_calamine  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    @staticmethod
+    def _convert_cell(value):
+        if isinstance(value, float):
+            val = int(value)
+            if val == value:
+                return val
+            return value
+        if isinstance(value, date):
+            return pd.Timestamp(value)
+        if isinstance(value, timedelta):
+            return pd.Timedelta(value)
+        return value
+
+    def open(self, data: bytes):
+        from python_calamine import CalamineWorkbook
+        return CalamineWorkbook.from_filelike(io.BytesIO(data))
+
+    def sheet_names(self, book) -> List[str]:
+        return list(book.sheet_names)
+
+    def iter_rows(self, book, sheet_name: str, columns: Optional[List[int]] = None) -> Iterator[list]:
+        sheet = book.get_sheet_by_name(sheet_name)
+        convert = self._convert_cell
+        # O calamine começa na primeira célula com dado; o pandas conta a partir de A1
+        start_row, start_col = sheet.start or (0, 0)
+        for _ in range(start_row):
+            yield [] if columns is None else [""] * len(columns)
+        pad = [""] * start_col
+        for row in sheet.iter_rows():
+            if columns is None:
+                yield pad + [convert(v) for v in row]
+            else:
+                n = len(row)
+                yield [convert(row[i - start_col]) if start_col <= i < n + start_col else "" for i in columns]
+
+
+class OpenpyxlEngine(ExcelEngine):
+    """Leitor padrão do pandas, em Python puro."""
+
+    name = "openpyxl"
+
+    @staticmethod
+    def _convert_cell(cell):
+        from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+        if cell.value is None:
+            return ""
+        if cell.data_type == TYPE_ERROR:
+            return np.nan
+        if cell.data_type == TYPE_NUMERIC:
+            val = int(cell.value)
+            if val == cell.value:
+                return val
+            return float(cell.value)
+        return cell.value
+
+    def open(self, data: bytes):
+        from openpyxl import load_workbook
+        return load_workbook(io.BytesIO(data), read_only=True, data_only=True, keep_links=False)
+
+    def sheet_names(self, book) -> List[str]:
+        return list(book.sheetnames)
+
+    def iter_rows(self, book, sheet_name: str, columns: Optional[List[int]] = None) -> Iterator[list]:
+        ws = book[sheet_name]
+        ws.reset_dimensions()
+        convert = self._convert_cell
+        if columns is None:
+            for row in ws.rows:
+                yield [convert(cell) for cell in row]
+        else:
+            for row in ws.rows:
+                n = len(row)
+                yield [convert(row[i]) if i < n else "" for i in columns]
+
+    def close(self, book) -> None:
+        book.close()
+
+
+class PandasEngine(ExcelEngine):
+    """Último recurso para formatos não suportados acima (ex.: .xls via xlrd)."""
+
+    name = "pandas"
+
+    def open(self, data: bytes):
+        return pd.ExcelFile(io.BytesIO(data))
+
+    def sheet_names(self, book) -> List[str]:
+        return [str(s) for s in book.sheet_names]
+
+    def iter_rows(self, book, sheet_name: str, columns: Optional[List[int]] = None) -> Iterator[list]:
+        raw = book.parse(sheet_name, header=None)
+        if columns is not None:
+            raw = raw.reindex(columns=columns)
+        yield from raw.astype(object).where(raw.notna(), "").values.tolist()
+
+    def close(self, book) -> None:
+        book.close()
+
+
+ENGINES = {engine.name: engine for engine in (CalamineEngine, OpenpyxlEngine, PandasEngine)}
+
+
+def set_default_engine(name: Optional[str]) -> None:
+    """Fixa o motor padrão ("calamine", "openpyxl", "pandas") ou volta ao automático (None/"auto")."""
+    global _default_engine
+    if name in (None, "auto"):
+        _default_engine = None
+        return
+    if name not in ENGINES:
+        raise ValueError(f"Motor de leitura desconhecido: '{name}'. Opções: auto, {', '.join(ENGINES)}")
+    _default_engine = name
+
+
+def engine_chain(name: Optional[str] = None) -> List[ExcelEngine]:
+    """
+    Motores a tentar, em ordem. O motor pedido (parâmetro, set_default_engine ou
+    variável de ambiente) vem primeiro; os demais ficam como fallback.
+    """
+    name = name or _default_engine or os.environ.get(ENGINE_ENV_VAR, "auto")
+    preferred = [n for n in ("calamine", "openpyxl", "pandas") if ENGINES[n].available()]
+    if name != "auto" and name in ENGINES and ENGINES[name].available():
+        preferred.remove(name)
+        preferred.insert(0, name)
+    return [ENGINES[n]() for n in preferred]
+
+
+def active_engine_name(name: Optional[str] = None) -> str:
+    """Nome do motor que será tentado primeiro."""
+    return engine_chain(name)[0].name
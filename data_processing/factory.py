@@ -2,35 +2,56 @@
 Fábrica de processadores de canal.
 Detecta automaticamente o canal e retorna o processador apropriado.
 """
-from typing import List, Tuple, Optional
+from typing import Dict, List, Sequence, Tuple, Optional
 import pandas as pd
 from .mercado_livre_processor import MercadoLivreProcessor
+from .periods import DEFAULT_WINDOWS
 from .shopee_processor import ShopeeProcessor
+from .sniffer import SniffResult, sniff
+from .workbook import ParsedWorkbook
+
+
+def classify_files(files: list) -> List[SniffResult]:
+    """
+    Classifica cada arquivo (canal e tipo: product / sales / traffic) lendo apenas
+    o cabeçalho, sem decodificar as planilhas.
+    Retorna um SniffResult por arquivo, na mesma ordem.
+    """
+    return [sniff(f) for f in files]
+
+
+def _best_channel(results: List[SniffResult]) -> Optional[str]:
+    """Canal do arquivo classificado com maior confiança (None se nenhum foi reconhecido)."""
+    detected = [r for r in results if r.channel is not None]
+    if not detected:
+        return None
+    return max(detected, key=lambda r: r.confidence).channel
 
 
 def detect_channel(files: list) -> str:
     """
     Detecta o canal (Mercado Livre ou Shopee) baseado nos arquivos.
+    Todos os arquivos do lote são considerados, em qualquer ordem.
     Retorna: nome do canal
     """
     if not files:
         raise ValueError("Nenhum arquivo fornecido")
     
-    # Tenta detectar Shopee primeiro (múltiplos arquivos ou colunas específicas)
-    shopee_proc = ShopeeProcessor()
-    if shopee_proc.detect(files[0]):
-        return "Shopee"
-    
-    # Caso contrário, assume Mercado Livre
-    return "Mercado Livre"
+    # Caso nenhum arquivo seja reconhecido, assume Mercado Livre
+    return _best_channel(classify_files(files)) or "Mercado Livre"
 
 
-def detect_and_process(files: list) -> Tuple[str, pd.DataFrame, Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+def detect_and_process(files: list, windows: Sequence[int] = DEFAULT_WINDOWS,
+                       reference=None) -> Tuple[str, pd.DataFrame, Optional[pd.DataFrame], Optional[pd.DataFrame],
+                                                Dict[str, pd.Series]]:
     """
     Detecta o canal dos arquivos e processa os dados.
     
     Args:
-        files: Lista de arquivos uploaded pelo usuário
+        files: Lista de arquivos uploaded pelo usuário (ou ParsedWorkbook já abertos,
+            para reaproveitar a leitura feita na detecção)
+        windows: Dia final de cada janela de análise (padrão: 30, 60, 90 e 120)
+        reference: Data de referência das janelas (padrão: a última venda)
         
     Returns:
         Tuple contendo:
@@ -38,6 +59,7 @@ def detect_and_process(files: list) -> Tuple[str, pd.DataFrame, Optional[pd.Data
         - df_export: DataFrame principal com análise ABC
         - df_logistics: DataFrame com métricas logísticas (ou None)
         - df_ads: DataFrame com métricas de publicidade (ou None)
+        - parse_issues: Células não numéricas por coluna (contadas como zero)
         
     Raises:
         ValueError: Se o canal não puder ser detectado ou se houver erro no processamento
@@ -45,18 +67,18 @@ def detect_and_process(files: list) -> Tuple[str, pd.DataFrame, Optional[pd.Data
     if not files or len(files) == 0:
         raise ValueError("Nenhum arquivo fornecido")
     
+    # Cada arquivo é decodificado uma única vez e compartilhado entre detecção e processamento
+    files = [ParsedWorkbook.of(f) for f in files]
+    
     # Lista de processadores disponíveis
     processors = [
-        MercadoLivreProcessor(),
-        ShopeeProcessor()
+        MercadoLivreProcessor(windows=windows, reference=reference),
+        ShopeeProcessor(windows=windows)
     ]
     
-    # Tenta detectar o canal do primeiro arquivo
-    detected_processor = None
-    for processor in processors:
-        if processor.detect(files[0]):
-            detected_processor = processor
-            break
+    # Detecta o canal pelo cabeçalho de todos os arquivos do lote
+    channel = _best_channel(classify_files(files))
+    detected_processor = next((p for p in processors if p.canal_name == channel), None)
     
     if detected_processor is None:
         raise ValueError(
@@ -71,7 +93,7 @@ def detect_and_process(files: list) -> Tuple[str, pd.DataFrame, Optional[pd.Data
         # Adiciona coluna de canal
         df_export['_canal'] = detected_processor.canal_name
         
-        return detected_processor.canal_name, df_export, df_logistics, df_ads
+        return detected_processor.canal_name, df_export, df_logistics, df_ads, detected_processor.parse_issues
         
     except Exception as e:
         raise ValueError(f"Erro ao processar arquivos do canal {detected_processor.canal_name}: {str(e)}")
@@ -0,0 +1,147 @@
+"""
+Cache de layouts de relatório.
+Um layout é identificado pela impressão digital (hash) da linha de cabeçalho.
+Para cada layout já visto guardamos a posição do cabeçalho e o mapeamento de
+colunas, de modo que arquivos seguintes com o mesmo layout pulam a busca do
+cabeçalho e a resolução aproximada das colunas. Layouts novos são registrados
+com contadores, permitindo ver quantas variantes aparecem na prática.
+"""
+import atexit
+import hashlib
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .report_cache import CACHE_DIR
+
+
+def layout_fingerprint(values, version: str = "1") -> str:
+    """Hash dos textos da linha de cabeçalho (posições vazias incluídas)."""
+    cells = ['' if pd.isna(v) else str(v).strip() for v in values]
+    while cells and cells[-1] == '':
+        cells.pop()
+    return hashlib.sha1('\x1f'.join([version] + cells).encode('utf-8')).hexdigest()
+
+
+class LayoutRegistry:
+    """
+    Registro persistente (JSON) de layouts conhecidos.
+
+    Cada entrada guarda header_row, o mapeamento papel -> coluna, o cabeçalho
+    original, quantas vezes o layout foi visto e quando. O arquivo só é regravado
+    quando um layout novo é registrado; os contadores de layouts já conhecidos
+    ficam em memória e são gravados junto, a cada `flush_every` acertos ou em
+    flush(). Falhas de leitura ou escrita do arquivo não interrompem o
+    processamento: o registro é apenas uma otimização.
+    """
+
+    def __init__(self, path: str, version: str = "1", flush_every: int = 100):
+        """
+        Args:
+            path: Arquivo JSON do registro
+            version: Versão do mapeamento; ao mudar os papéis resolvidos, incrementar
+                para que layouts gravados antes sejam resolvidos de novo
+            flush_every: Acertos acumulados em memória antes de regravar o arquivo
+        """
+        self.path = path
+        self.version = version
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._layouts: Optional[Dict[str, dict]] = None
+        # Acertos contados em memória e ainda não gravados
+        self._pending = 0
+
+    def _load(self) -> Dict[str, dict]:
+        if self._layouts is None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self._layouts = json.load(f)
+            except (OSError, ValueError):
+                self._layouts = {}
+        return self._layouts
+
+    def _save(self) -> None:
+        tmp = f"{self.path}.tmp-{uuid.uuid4().hex}"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._layouts, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+            self._pending = 0
+        except OSError as e:
+            print(f"Erro ao gravar registro de layouts: {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _touch(self, entry: dict) -> None:
+        entry['count'] = entry.get('count', 0) + 1
+        entry['last_seen'] = datetime.now().isoformat(timespec='seconds')
+
+    def lookup(self, preview: pd.DataFrame) -> Optional[Tuple[int, Dict[str, str]]]:
+        """
+        Procura na prévia (header=None) uma linha de cabeçalho já conhecida.
+        Só as posições de cabeçalho registradas são testadas.
+        Retorna (header_row, colunas) ou None.
+        """
+        with self._lock:
+            layouts = self._load()
+            for row in sorted({e['header_row'] for e in layouts.values()}):
+                if row >= len(preview):
+                    continue
+                entry = layouts.get(layout_fingerprint(preview.iloc[row].tolist(), self.version))
+                if entry is not None and entry['header_row'] == row:
+                    self._touch(entry)
+                    self._pending += 1
+                    if self._pending >= self.flush_every:
+                        self._save()
+                    return row, dict(entry['columns'])
+        return None
+
+    def record(self, preview: pd.DataFrame, header_row: int, columns: Dict[str, str]) -> None:
+        """Registra o layout resolvido pela busca completa."""
+        header = ['' if pd.isna(v) else str(v) for v in preview.iloc[header_row].tolist()] \
+            if header_row < len(preview) else []
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            layouts = self._load()
+            entry = layouts.setdefault(layout_fingerprint(header, self.version), {
+                'header_row': header_row,
+                'columns': dict(columns),
+                'header': header,
+                'first_seen': now,
+            })
+            self._touch(entry)
+            self._save()
+
+    def flush(self) -> None:
+        """Grava os contadores acumulados em memória, se houver."""
+        with self._lock:
+            if self._pending:
+                self._save()
+
+    def summary(self) -> List[dict]:
+        """Layouts conhecidos, do mais visto para o menos visto."""
+        with self._lock:
+            layouts = self._load()
+            return sorted(
+                ({'fingerprint': fp, **entry} for fp, entry in layouts.items()),
+                key=lambda e: e.get('count', 0),
+                reverse=True,
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._layouts = {}
+            self._pending = 0
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+# Registro compartilhado dos relatórios de vendas do Mercado Livre
+ML_LAYOUTS = LayoutRegistry(os.path.join(CACHE_DIR, "ml_layouts.json"), version="2")
+atexit.register(ML_LAYOUTS.flush)
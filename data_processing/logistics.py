@@ -0,0 +1,71 @@
+"""
+Classificação da forma de entrega ('Forma de entrega' do Mercado Livre).
+Uma tabela ordenada de regras é avaliada uma vez por texto distinto; vale a
+primeira regra que casar, então cada venda recebe exatamente uma categoria e
+os percentuais por categoria não se sobrepõem.
+"""
+from typing import NamedTuple, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .parsing import normalize_text
+
+
+class LogisticsRule(NamedTuple):
+    """Categoria atribuída quando `pattern` (regex, sem diferenciar maiúsculas) aparece no texto."""
+    category: str
+    pattern: str
+
+
+# Ordem importa: "Mercado Envios Full" é full mesmo que outra regra também case
+ML_LOGISTICS_RULES = (
+    LogisticsRule('full', r'full'),
+    LogisticsRule('correios', r'correios|pontos|ponto de envio'),
+    LogisticsRule('flex', r'flex'),
+    LogisticsRule('coleta', r'coleta'),
+)
+
+# Categoria das formas de entrega que nenhuma regra reconhece
+FALLBACK_CATEGORY = 'outros'
+
+
+def logistics_categories(rules: Sequence[LogisticsRule] = ML_LOGISTICS_RULES,
+                         fallback: str = FALLBACK_CATEGORY) -> list:
+    """Categorias possíveis, na ordem das regras, com a categoria padrão por último."""
+    categories = []
+    for rule in rules:
+        if rule.category not in categories:
+            categories.append(rule.category)
+    if fallback not in categories:
+        categories.append(fallback)
+    return categories
+
+
+def classify_logistics(values: pd.Series, rules: Sequence[LogisticsRule] = ML_LOGISTICS_RULES,
+                       fallback: str = FALLBACK_CATEGORY) -> pd.Series:
+    """
+    Categoria de entrega de cada linha, como Series categórica.
+
+    As regras são testadas apenas sobre os textos distintos (normalizados em
+    minúsculas); o resultado volta para as linhas pelos códigos.
+    """
+    text = normalize_text(values, lower=True)
+    distinct = pd.Series(text.cat.categories, dtype=object)
+    categories = logistics_categories(rules, fallback)
+
+    distinct_codes = np.full(len(distinct), categories.index(fallback), dtype=np.int8)
+    pending = np.ones(len(distinct), dtype=bool)
+    for rule in rules:
+        if not pending.any():
+            break
+        hit = pending & distinct.str.contains(rule.pattern, case=False, regex=True, na=False).to_numpy()
+        distinct_codes[hit] = categories.index(rule.category)
+        pending &= ~hit
+
+    # normalize_text não deixa códigos vazios (células vazias viram 'nan' -> categoria padrão)
+    return pd.Series(
+        pd.Categorical.from_codes(distinct_codes[text.cat.codes.to_numpy()], categories=categories),
+        index=values.index,
+        name=values.name,
+    )
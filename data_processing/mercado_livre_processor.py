@@ -2,118 +2,315 @@
 Processador de dados do Mercado Livre.
 Mantém a lógica original de transformação do app.py.
 """
+import re
 import pandas as pd
 import numpy as np
-from typing import Tuple, Optional
+from typing import Dict, Iterator, List, Sequence, Tuple, Optional
+from pandas.io.parsers import TextParser
+from .abc import abc_classes
 from .base_processor import BaseProcessor
+from .layouts import ML_LAYOUTS, LayoutRegistry
+from .parsing import EMPTY_IDS, fill_text, normalize_text, parse_dates
+from .periods import DEFAULT_WINDOWS, PeriodEngine
+from .sales_matrix import SalesMatrix
+from .sniffer import sniff
+from .workbook import ParsedWorkbook, map_workbooks
+
+
+# Chaves da agregação diária (uma linha por anúncio/dia/forma de entrega/publicidade)
+DAILY_KEYS = ['mlb', 'titulo', 'dia', 'logistica', 'ads']
+
+# Identificam uma venda entre relatórios (o anúncio separa itens do mesmo carrinho)
+SALE_KEYS = ['venda', 'data', 'mlb']
+
+TEXT_ROLES = ['venda', 'mlb', 'sku', 'titulo', 'logistica', 'ads']
+
+# "N.º de venda", "Nº de venda", "Número de venda", "# de venda"...
+_SALE_ID_COL = re.compile(r'^(n\.?\s*[º°o]?\.?|número|#)\s*de\s+venda$', re.IGNORECASE)
+
+
+def _pick_col(cols, target: str) -> str:
+    if target in cols:
+        return target
+    for c in cols:
+        sc = str(c).strip()
+        if sc.startswith(target + "."):
+            return c
+    t = target.lower()
+    for c in cols:
+        if t in str(c).lower():
+            return c
+    raise KeyError(f"Coluna '{target}' não encontrada")
+
+
+def _try_pick_col(cols, target: str):
+    try:
+        return _pick_col(cols, target)
+    except KeyError:
+        return None
+
+
+class SaleIndex:
+    """Índice de hashes (uint64, ordenados) das vendas já incluídas."""
+
+    def __init__(self, keys: Optional[np.ndarray] = None):
+        self._keys = np.empty(0, dtype=np.uint64) if keys is None else np.unique(keys.astype(np.uint64))
+
+    @property
+    def keys(self) -> np.ndarray:
+        return self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def contains(self, keys: np.ndarray) -> np.ndarray:
+        return np.isin(keys, self._keys, assume_unique=False)
+
+    def add(self, keys: np.ndarray) -> None:
+        self._keys = np.union1d(self._keys, keys)
+
+
+def sale_keys(sales: pd.DataFrame) -> np.ndarray:
+    """Hash de (venda, data, anúncio) por linha."""
+    return pd.util.hash_pandas_object(sales[SALE_KEYS], index=False).to_numpy()
+
+
+def dedupe_sales(frames: List[pd.DataFrame], index: Optional[SaleIndex] = None) -> pd.DataFrame:
+    """
+    Junta as vendas de vários relatórios, na ordem recebida, descartando linhas
+    cuja venda (número + data + anúncio) já apareceu em um relatório anterior
+    (ou já está em `index`, ex.: o histórico salvo de um cliente; o índice é atualizado).
+    Repetições dentro do mesmo relatório e linhas sem número de venda são mantidas.
+    """
+    if index is None:
+        index = SaleIndex()
+    kept = []
+    for sales in frames:
+        if 'venda' in sales.columns and len(sales):
+            has_id = ~sales['venda'].isin(EMPTY_IDS).to_numpy()
+            keys = sale_keys(sales)
+            seen = index.contains(keys) & has_id
+            index.add(keys[has_id])
+            if seen.any():
+                sales = sales[~seen]
+        kept.append(sales)
+
+    return _concat_sales(kept)
+
+
+def _concat_sales(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    if len(frames) == 1:
+        return frames[0]
+    merged = pd.concat(frames, ignore_index=True)
+    # Categorias diferentes entre blocos/relatórios viram object no concat: recategoriza
+    for col in TEXT_ROLES:
+        if col in merged.columns:
+            merged[col] = normalize_text(merged[col])
+    return merged
 
 
 class MercadoLivreProcessor(BaseProcessor):
     """Processador para relatórios do Mercado Livre."""
-    
-    def __init__(self):
+
+    # Relatórios a partir deste tamanho são lidos em streaming (blocos de linhas)
+    STREAMING_MIN_BYTES = 15 * 1024 * 1024
+    STREAM_CHUNK_ROWS = 50_000
+
+    def __init__(self, streaming: Optional[bool] = None, chunk_rows: int = STREAM_CHUNK_ROWS,
+                 layouts: Optional[LayoutRegistry] = None, windows: Sequence[int] = DEFAULT_WINDOWS,
+                 reference=None):
+        """
+        Args:
+            streaming: True força a leitura em blocos, False força a leitura completa
+                e None decide pelo tamanho do arquivo (STREAMING_MIN_BYTES)
+            chunk_rows: Quantidade de linhas de venda por bloco no modo streaming
+            layouts: Registro de layouts conhecidos (padrão: ML_LAYOUTS, compartilhado)
+            windows: Dia final de cada janela de análise (padrão: 30, 60, 90 e 120 dias)
+            reference: Data de referência das janelas (padrão: a última venda)
+        """
         super().__init__()
         self.canal_name = "Mercado Livre"
-    
+        self.streaming = streaming
+        self.chunk_rows = chunk_rows
+        self.layouts = layouts if layouts is not None else ML_LAYOUTS
+        self.periods = PeriodEngine(windows, reference)
+        # Histórico diário consolidado do último process(), sua matriz anúncio x dia
+        # e as vendas repetidas descartadas
+        self.daily: Optional[pd.DataFrame] = None
+        self.matrix: Optional[SalesMatrix] = None
+        # Modo incremental (update_matrix): linhas diárias e vendas acrescentadas
+        self.new_daily: Optional[pd.DataFrame] = None
+        self.new_keys = np.empty(0, dtype=np.uint64)
+        self.duplicate_sales = 0
+
     def detect(self, file) -> bool:
         """
-        Detecta se o arquivo é um relatório do Mercado Livre.
+        Detecta se o arquivo é um relatório do Mercado Livre
+        (cabeçalho lido direto do zip do .xlsx, sem decodificar a planilha).
         """
-        try:
-            file.seek(0)
-            preview = pd.read_excel(file, sheet_name=0, header=None, nrows=80)
-            file.seek(0)
-            
-            # Procura por colunas características do ML
-            for i in range(min(60, len(preview))):
-                row = preview.iloc[i].astype(str).str.lower()
-                if row.str.contains('data da venda', na=False).any() or \
-                   row.str.contains('# de anúncio', na=False).any() or \
-                   row.str.contains('de anúncio', na=False).any():
-                    return True
-            
-            return False
-            
-        except Exception:
-            return False
-    
+        return sniff(file).channel == self.canal_name
+
     def process(self, files: list) -> Tuple[pd.DataFrame, Optional[pd.DataFrame], Optional[pd.DataFrame]]:
         """
-        Processa relatório do Mercado Livre.
-        Mantém a lógica original do _transform_ml_raw.
+        Processa um ou mais relatórios do Mercado Livre.
+
+        Vários arquivos (ex.: exportações mensais com janelas sobrepostas) são lidos
+        em paralelo e as vendas repetidas entre eles são descartadas (dedupe_sales)
+        antes da consolidação diária, então o histórico pode cobrir mais de 120 dias
+        sem contagem dupla.
         """
         if len(files) == 0:
             raise ValueError("Nenhum arquivo fornecido")
-        
-        # ML usa apenas um arquivo
-        file = files[0]
-        
-        return self._transform_ml_raw(file)
-    
-    def _transform_ml_raw(self, file) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+
+        return self.build_outputs(self.read_matrix(files))
+
+    def read_matrix(self, files: list) -> SalesMatrix:
         """
-        Converte o relatório bruto de vendas do Mercado Livre (120 dias) na estrutura 'Export'.
-        Retorna: (df_export, df_logistics, df_ads)
-        
-        NOTA: Esta é a função original do app.py, mantida intacta.
+        Lê os relatórios e devolve a matriz esparsa anúncio x dia (SalesMatrix), o
+        resultado canônico do processador (também guardado em self.matrix).
+        Mudar as janelas ou a data de referência depois disso não exige reler os
+        arquivos: basta chamar build_outputs com outro PeriodEngine.
+        """
+        workbooks = [ParsedWorkbook.of(f) for f in files]
+        if len(workbooks) == 1:
+            self.daily = self._read_daily(workbooks[0])
+            self.duplicate_sales = 0
+        else:
+            frames = map_workbooks(self.read_sales, workbooks)
+            sales = dedupe_sales(frames)
+            self.duplicate_sales = sum(len(f) for f in frames) - len(sales)
+            self.daily = self._aggregate_daily(sales)
+
+        self.matrix = SalesMatrix.from_daily(self.daily)
+        return self.matrix
+
+    def update_matrix(self, files: list, daily: pd.DataFrame, known_keys: np.ndarray) -> SalesMatrix:
+        """
+        Modo incremental: junta exportações novas (ex.: só a última semana) a um
+        histórico diário já consolidado, sem reler os relatórios antigos.
+
+        Vendas com número já registrado em `known_keys` (sale_keys do histórico) são
+        descartadas; linhas sem número de venda só entram nos dias posteriores ao
+        último dia do histórico. Depois da chamada, self.new_daily e self.new_keys
+        guardam apenas o que foi acrescentado (para persistir junto ao histórico).
+        """
+        workbooks = [ParsedWorkbook.of(f) for f in files]
+        frames = map_workbooks(self.read_sales, workbooks)
+        index = SaleIndex(known_keys)
+        sales = dedupe_sales(frames, index)
+
+        if len(daily) and len(sales):
+            after_history = (sales['data'] >= daily['dia'].max() + pd.Timedelta(days=1)).to_numpy()
+            if 'venda' in sales.columns:
+                after_history |= ~sales['venda'].isin(EMPTY_IDS).to_numpy()
+            sales = sales[after_history]
+
+        self.duplicate_sales = sum(len(f) for f in frames) - len(sales)
+        self.new_keys = np.setdiff1d(index.keys, known_keys.astype(np.uint64))
+        self.new_daily = self._aggregate_daily(sales)
+        if len(daily) == 0:
+            self.daily = self.new_daily
+        elif len(self.new_daily) == 0:
+            self.daily = daily
+        else:
+            self.daily = pd.concat([daily, self.new_daily], ignore_index=True).groupby(
+                DAILY_KEYS, sort=False).sum().reset_index()
+
+        self.matrix = SalesMatrix.from_daily(self.daily)
+        return self.matrix
+
+    def _use_streaming(self, workbook: ParsedWorkbook) -> bool:
+        if self.streaming is not None:
+            return self.streaming
+        return len(workbook.data) >= self.STREAMING_MIN_BYTES
+
+    def _read_daily(self, workbook: ParsedWorkbook) -> pd.DataFrame:
+        """
+        Consolida as vendas de um relatório por anúncio/dia (_aggregate_daily).
+        No modo streaming a consolidação é feita bloco a bloco, então a memória
+        cresce com o catálogo e não com o número de vendas.
+        """
+        header_row, cols = self.resolve_layout(workbook)
+
+        if self._use_streaming(workbook):
+            return self._read_daily_streaming(workbook, header_row, cols)
+        return self._aggregate_daily(self._read_sales_full(workbook, header_row, cols))
+
+    def read_sales(self, workbook: ParsedWorkbook) -> pd.DataFrame:
+        """
+        Vendas normalizadas (uma linha por venda, colunas de _prepare_base) de um
+        relatório, antes da consolidação diária.
+        """
+        header_row, cols = self.resolve_layout(workbook)
+        if self._use_streaming(workbook):
+            chunks = list(self._iter_sale_chunks(workbook, header_row, cols))
+            if not chunks:
+                return self._prepare_base(pd.DataFrame(columns=list(cols)))
+            return _concat_sales(chunks)
+        return self._read_sales_full(workbook, header_row, cols)
+
+    def _read_sales_full(self, workbook: ParsedWorkbook, header_row: int, cols: Dict[str, str]) -> pd.DataFrame:
+        df = workbook.sheet(0, header=header_row)
+        df = df.rename(columns=lambda c: str(c).strip())
+        raw = pd.DataFrame({role: df[col] for role, col in cols.items()})
+        return self._prepare_base(raw)
+
+    def resolve_layout(self, workbook: ParsedWorkbook) -> Tuple[int, Dict[str, str]]:
         """
-        
-        def _seek0(f):
-            try:
-                f.seek(0)
-            except Exception:
-                pass
-        
-        def _pick_col(cols, target: str) -> str:
-            if target in cols:
-                return target
-            for c in cols:
-                sc = str(c).strip()
-                if sc.startswith(target + "."):
-                    return c
-            t = target.lower()
-            for c in cols:
-                if t in str(c).lower():
-                    return c
-            raise KeyError(f"Coluna '{target}' não encontrada")
-        
-        def _try_pick_col(cols, target: str):
-            try:
-                return _pick_col(cols, target)
-            except KeyError:
-                return None
-        
-        _seek0(file)
-        preview = pd.read_excel(file, sheet_name=0, header=None, nrows=80)
-        
-        header_row = None
+        Linha de cabeçalho e mapeamento de colunas (papel -> coluna) do relatório.
+        Layouts já vistos vêm do registro (ML_LAYOUTS) sem busca; layouts novos são
+        resolvidos por _find_header_row/_resolve_columns e registrados.
+        """
+        preview = workbook.preview(0, nrows=80)
+        cached = self.layouts.lookup(preview)
+        if cached is not None:
+            return cached
+
+        header_row = self._find_header_row(preview)
+        if header_row is None:
+            header_row = 0
+        columns = [str(c).strip() for c in workbook.columns(0, header=header_row)]
+        cols = self._resolve_columns(columns)
+        self.layouts.record(preview, header_row, cols)
+        return header_row, cols
+
+    def _find_header_row(self, preview: pd.DataFrame) -> Optional[int]:
+        """Procura a linha de cabeçalho pelas colunas características do ML."""
         for i in range(min(60, len(preview))):
             row = preview.iloc[i].astype(str).str.lower()
             if row.str.contains('data da venda', na=False).any() or \
                row.str.contains('# de anúncio', na=False).any() or \
                row.str.contains('de anúncio', na=False).any():
-                header_row = i
-                break
-        if header_row is None:
-            header_row = 0
-        
-        _seek0(file)
-        df = pd.read_excel(file, sheet_name=0, header=header_row)
-        df.columns = [str(c).strip() for c in df.columns]
-        
-        col_data = _pick_col(df.columns, 'Data da venda')
-        col_unid = _pick_col(df.columns, 'Unidades')
-        
+                return i
+        return None
+
+    def _resolve_columns(self, columns) -> Dict[str, str]:
+        """
+        Mapeia os papéis usados no processamento para as colunas do relatório.
+        'sku', 'ads' e 'venda' são opcionais e ficam de fora quando não existem.
+        """
+        cols = {
+            'data': _pick_col(columns, 'Data da venda'),
+            'unidades': _pick_col(columns, 'Unidades'),
+        }
+
         try:
-            col_rec = _pick_col(df.columns, 'Receita por produtos (BRL)')
+            cols['receita'] = _pick_col(columns, 'Receita por produtos (BRL)')
         except Exception:
-            col_rec = _pick_col(df.columns, 'Receita por produtos')
-        
-        col_mlb = _pick_col(df.columns, '# de anúncio')
-        col_sku = _try_pick_col(df.columns, 'SKU')
-        col_tit = _pick_col(df.columns, 'Título do anúncio')
-        col_log = _pick_col(df.columns, 'Forma de entrega')
-        
+            cols['receita'] = _pick_col(columns, 'Receita por produtos')
+
+        cols['mlb'] = _pick_col(columns, '# de anúncio')
+        col_sku = _try_pick_col(columns, 'SKU')
+        if col_sku is not None:
+            cols['sku'] = col_sku
+        cols['titulo'] = _pick_col(columns, 'Título do anúncio')
+        cols['logistica'] = _pick_col(columns, 'Forma de entrega')
+
+        # Número da venda (usado para descartar vendas repetidas entre relatórios)
+        col_venda = next((c for c in columns if _SALE_ID_COL.match(str(c).strip())), None)
+        if col_venda is not None:
+            cols['venda'] = col_venda
+
         # Nova coluna: Venda por publicidade
         col_ads = None
         ads_variations = [
@@ -127,268 +324,174 @@ class MercadoLivreProcessor(BaseProcessor):
             'publicidade',
         ]
         for var in ads_variations:
-            col_ads = _try_pick_col(df.columns, var)
+            col_ads = _try_pick_col(columns, var)
             if col_ads is not None:
                 break
-        
+
         if col_ads is None:
-            for c in df.columns:
+            for c in columns:
                 c_lower = str(c).lower().strip()
                 if 'publicidade' in c_lower:
                     col_ads = c
                     break
-        
-        use_cols = [col_data, col_unid, col_rec, col_mlb, col_tit, col_log]
-        if col_sku is not None:
-            use_cols.insert(4, col_sku)
+
         if col_ads is not None:
-            use_cols.append(col_ads)
-        
-        base = df[use_cols].copy()
-        
-        # Renomear colunas
-        if col_sku is None and col_ads is None:
-            base.columns = ['data', 'unidades', 'receita', 'mlb', 'titulo', 'logistica']
-            base['sku'] = ''
-            base['ads'] = ''
-        elif col_sku is None and col_ads is not None:
-            base.columns = ['data', 'unidades', 'receita', 'mlb', 'titulo', 'logistica', 'ads']
+            cols['ads'] = col_ads
+
+        return cols
+
+    def _prepare_base(self, base: pd.DataFrame) -> pd.DataFrame:
+        """
+        Normaliza as linhas de venda (colunas já renomeadas para os papéis de
+        _resolve_columns): textos, datas, unidades e receita.
+        """
+        base = base.copy()
+        if 'sku' not in base.columns:
             base['sku'] = ''
-        elif col_sku is not None and col_ads is None:
-            base.columns = ['data', 'unidades', 'receita', 'mlb', 'sku', 'titulo', 'logistica']
+        if 'ads' not in base.columns:
             base['ads'] = ''
-        else:
-            base.columns = ['data', 'unidades', 'receita', 'mlb', 'sku', 'titulo', 'logistica', 'ads']
-        
-        base['mlb'] = base['mlb'].astype(str).str.strip()
-        base['sku'] = base['sku'].astype(str).str.strip()
-        base['titulo'] = base['titulo'].astype(str).str.strip()
-        base['logistica'] = base['logistica'].astype(str).str.strip()
-        base['ads'] = base['ads'].astype(str).str.strip().str.lower()
-        
-        empty_mlb = base['mlb'].isin(['', 'nan', 'none', 'None', 'NaN'])
+
+        # Textos normalizados sobre os valores distintos (colunas categóricas)
+        for col in ('mlb', 'sku', 'titulo', 'logistica'):
+            base[col] = normalize_text(base[col])
+        base['ads'] = normalize_text(base['ads'], lower=True)
+        if 'venda' in base.columns:
+            base['venda'] = normalize_text(base['venda'])
+
+        empty_mlb = base['mlb'].isin(EMPTY_IDS)
         if empty_mlb.any():
-            base.loc[empty_mlb, 'mlb'] = base.loc[empty_mlb, 'sku']
-        
-        base['_data_raw'] = base['data'].astype(str)
-        base['data'] = pd.to_datetime(base['_data_raw'], errors='coerce', dayfirst=True)
-        
-        if base['data'].notna().sum() == 0:
-            s = base['_data_raw'].astype(str)
-            for fmt in ('%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y'):
-                tmp = pd.to_datetime(s, errors='coerce', format=fmt)
-                if tmp.notna().sum() > 0:
-                    base['data'] = tmp
-                    break
-        
-        if base['data'].notna().sum() == 0:
-            month_map = {
-                'janeiro': '01', 'fevereiro': '02', 'março': '03', 'marco': '03',
-                'abril': '04', 'maio': '05', 'junho': '06', 'julho': '07',
-                'agosto': '08', 'setembro': '09', 'outubro': '10',
-                'novembro': '11', 'dezembro': '12',
-            }
-            s = base['_data_raw'].astype(str).str.lower()
-            s = s.str.replace('hs.', '', regex=False).str.replace('hs', '', regex=False)
-            for name, num in month_map.items():
-                s = s.str.replace(rf'\b{name}\b', num, regex=True)
-            s = s.str.replace(r'\s*de\s*', '/', regex=True)
-            s = s.str.replace(r'\s+', ' ', regex=True).str.strip()
-            tmp = pd.to_datetime(s, errors='coerce', dayfirst=True)
-            if tmp.notna().sum() > 0:
-                base['data'] = tmp
-        
-        base = base.drop(columns=['_data_raw'], errors='ignore')
+            base['mlb'] = fill_text(base['mlb'], empty_mlb, base['sku'])
+
+        # Formato inferido de uma amostra; cada data distinta é convertida uma única vez
+        base['data'] = parse_dates(base['data'])
         base = base.dropna(subset=['data'])
-        base = base[~base['mlb'].isin(['', 'nan', 'none', 'None', 'NaN'])].copy()
-        
+        base = base[~base['mlb'].isin(EMPTY_IDS)].copy()
+
         base['unidades'] = pd.to_numeric(base['unidades'], errors='coerce').fillna(0).astype(int)
-        
-        rec = base['receita']
-        if rec.dtype == object:
-            rec = rec.astype(str).str.replace('\u00a0', '', regex=False).str.strip()
-            # Se contiver tanto '.' quanto ',', assume formato BR (1.234,56)
-            if rec.str.contains(r'\.', regex=True).any() and rec.str.contains(r',', regex=True).any():
-                rec = rec.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
-            # Se contiver apenas ',', assume que é o separador decimal (1234,56)
-            elif rec.str.contains(r',', regex=True).any():
-                rec = rec.str.replace(',', '.', regex=False)
-            # Remove símbolos de moeda se existirem
-            rec = rec.str.replace(r'[R\$\s]', '', regex=True)
-            
-        base['receita'] = pd.to_numeric(rec, errors='coerce').fillna(0.0)
-        
+
+        # Separador decimal detectado por coluna ("1.234,56", "1234,56" ou número)
+        base['receita'] = self.parse_number_column(base['receita'], 'Receita por produtos').fillna(0.0)
+
+        return base
+
+    def _aggregate_daily(self, base: pd.DataFrame) -> pd.DataFrame:
+        """
+        Consolida as linhas de venda por anúncio, dia, forma de entrega e publicidade.
+        'linhas' guarda quantas vendas foram somadas (usado nas métricas de logística/ads).
+        """
         if base.empty:
-            cols = ['MLB','Título'] + [f'Qntd {p}' for p in ['0-30','31-60','61-90','91-120']] + \
-                   [f'Fat. {p}' for p in ['0-30','31-60','61-90','91-120']] + \
-                   [f'Curva {p}' for p in ['0-30','31-60','61-90','91-120']]
+            return pd.DataFrame(columns=DAILY_KEYS + ['unidades', 'receita', 'linhas'])
+
+        base = base.assign(dia=base['data'].dt.normalize())
+        daily = base.groupby(DAILY_KEYS, sort=False, observed=True).agg(
+            unidades=('unidades', 'sum'),
+            receita=('receita', 'sum'),
+            linhas=('unidades', 'size'),
+        ).reset_index()
+        # A agregação já é do tamanho do catálogo: volta a texto simples para as saídas
+        for col in ('mlb', 'titulo', 'logistica', 'ads'):
+            daily[col] = daily[col].astype(object)
+        return daily
+
+    def _iter_sale_chunks(self, workbook: ParsedWorkbook, header_row: int,
+                          cols: Dict[str, str]) -> Iterator[pd.DataFrame]:
+        """
+        Lê o relatório em blocos de `chunk_rows` linhas, convertendo apenas as colunas
+        necessárias, e devolve cada bloco já preparado (_prepare_base).
+        """
+        columns = [str(c).strip() for c in workbook.columns(0, header=header_row)]
+        roles = list(cols.keys())
+        positions = [columns.index(cols[role]) for role in roles]
+
+        chunk: List[list] = []
+        for row in workbook.iter_rows(0, start=header_row + 1, columns=positions):
+            chunk.append(row)
+            if len(chunk) >= self.chunk_rows:
+                yield self._prepare_base(TextParser(chunk, names=roles, header=None, skip_blank_lines=False).read())
+                chunk = []
+        if chunk:
+            yield self._prepare_base(TextParser(chunk, names=roles, header=None, skip_blank_lines=False).read())
+
+    def _read_daily_streaming(self, workbook: ParsedWorkbook, header_row: int,
+                              cols: Dict[str, str]) -> pd.DataFrame:
+        """Dobra cada bloco de _iter_sale_chunks na agregação diária."""
+        partials = [self._aggregate_daily(sales) for sales in self._iter_sale_chunks(workbook, header_row, cols)]
+
+        partials = [p for p in partials if not p.empty]
+        if not partials:
+            return self._aggregate_daily(pd.DataFrame())
+        if len(partials) == 1:
+            return partials[0]
+
+        # Anúncios/dias que aparecem em mais de um bloco são somados
+        return pd.concat(partials, ignore_index=True).groupby(DAILY_KEYS, sort=False).agg(
+            unidades=('unidades', 'sum'),
+            receita=('receita', 'sum'),
+            linhas=('linhas', 'sum'),
+        ).reset_index()
+
+    def build_outputs(self, matrix: SalesMatrix,
+                      periods: Optional[PeriodEngine] = None) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """
+        Monta export, logística e ads a partir da matriz anúncio x dia.
+        `periods` define as janelas (padrão: as do construtor).
+        Retorna: (df_export, df_logistics, df_ads)
+        """
+        periods = periods if periods is not None else self.periods
+        labels = periods.labels
+        if matrix.is_empty:
+            cols = ['MLB','Título'] + [f'Qntd {p}' for p in labels] + \
+                   [f'Fat. {p}' for p in labels] + \
+                   [f'Curva {p}' for p in labels]
             empty_df = pd.DataFrame(columns=cols)
-            empty_log = pd.DataFrame(columns=['periodo', 'full_pct', 'correios_pct', 'flex_pct', 'outros_pct', 
+            empty_log = pd.DataFrame(columns=['periodo', 'full_pct', 'correios_pct', 'flex_pct', 'outros_pct',
                                               'full_qty', 'correios_qty', 'flex_qty', 'outros_qty',
                                               'full_fat', 'correios_fat', 'flex_fat', 'outros_fat'])
             empty_ads = pd.DataFrame(columns=['periodo', 'ads_pct', 'organic_pct', 'ads_qty', 'organic_qty'])
             return empty_df, empty_log, empty_ads
-        
-        ref = base['data'].max()
-        base['dias'] = (ref - base['data']).dt.days
-        
-        def bucket(d):
-            if d <= 30:
-                return '0-30'
-            if d <= 60:
-                return '31-60'
-            if d <= 90:
-                return '61-90'
-            if d <= 120:
-                return '91-120'
-            return None
-        
-        base['periodo'] = base['dias'].apply(bucket)
-        base = base.dropna(subset=['periodo'])
-        
-        # Classificar logística
-        log_lower = base['logistica'].str.lower()
-        base['is_full'] = log_lower.str.contains('full', na=False)
-        base['is_correios'] = log_lower.str.contains('correios', na=False) | \
-                              log_lower.str.contains('pontos', na=False) | \
-                              log_lower.str.contains('ponto de envio', na=False)
-        base['is_flex'] = log_lower.str.contains('flex', na=False)
-        base['is_outros'] = ~(base['is_full'] | base['is_correios'] | base['is_flex'])
-        
-        # Classificar vendas por publicidade
-        base['is_ads'] = base['ads'].str.lower().isin(['sim', 's', 'yes', 'y'])
-        base['is_organic'] = ~base['is_ads']
-        
-        # Agregação por MLB e período
-        agg = base.groupby(['mlb', 'titulo', 'periodo']).agg({
-            'unidades': 'sum',
-            'receita': 'sum'
-        }).reset_index()
-        
-        # Pivot para ter colunas por período
-        piv_qty = agg.pivot_table(index=['mlb', 'titulo'], columns='periodo', values='unidades', fill_value=0).reset_index()
-        piv_rev = agg.pivot_table(index=['mlb', 'titulo'], columns='periodo', values='receita', fill_value=0.0).reset_index()
-        
-        # Renomear colunas
-        for p in ['0-30', '31-60', '61-90', '91-120']:
-            if p not in piv_qty.columns:
-                piv_qty[p] = 0
-            if p not in piv_rev.columns:
-                piv_rev[p] = 0.0
-        
-        piv_qty = piv_qty.rename(columns={p: f'Qntd {p}' for p in ['0-30', '31-60', '61-90', '91-120']})
-        piv_rev = piv_rev.rename(columns={p: f'Fat. {p}' for p in ['0-30', '31-60', '61-90', '91-120']})
-        
-        # Merge
-        export = piv_qty.merge(piv_rev, on=['mlb', 'titulo'], how='outer')
-        export = export.rename(columns={'mlb': 'MLB', 'titulo': 'Título'})
-        
-        # Calcula curva ABC para cada período
-        for p in ['0-30', '31-60', '61-90', '91-120']:
-            fat_col = f'Fat. {p}'
-            curva_col = f'Curva {p}'
-            
-            # Ordena por faturamento
-            export_sorted = export.sort_values(fat_col, ascending=False).copy()
-            total_fat = export_sorted[fat_col].sum()
-            
-            if total_fat > 0:
-                export_sorted['_pct_acum'] = (export_sorted[fat_col].cumsum() / total_fat) * 100
-                
-                def classify(pct):
-                    if pct <= 80:
-                        return 'A'
-                    elif pct <= 95:
-                        return 'B'
-                    else:
-                        return 'C'
-                
-                export_sorted[curva_col] = export_sorted['_pct_acum'].apply(classify)
-                export_sorted.loc[export_sorted[fat_col] == 0, curva_col] = '-'
-                
-                # Merge de volta
-                export = export.merge(export_sorted[['MLB', curva_col]], on='MLB', how='left', suffixes=('', '_new'))
-                if curva_col + '_new' in export.columns:
-                    export[curva_col] = export[curva_col + '_new']
-                    export = export.drop(columns=[curva_col + '_new'])
-            else:
-                export[curva_col] = '-'
-        
-        # Métricas logísticas por período
-        log_rows = []
-        for p in ['0-30', '31-60', '61-90', '91-120']:
-            base_p = base[base['periodo'] == p]
-            total = len(base_p)
-            
-            if total > 0:
-                full_qty = base_p['is_full'].sum()
-                correios_qty = base_p['is_correios'].sum()
-                flex_qty = base_p['is_flex'].sum()
-                outros_qty = base_p['is_outros'].sum()
-                
-                full_fat = base_p[base_p['is_full']]['receita'].sum()
-                correios_fat = base_p[base_p['is_correios']]['receita'].sum()
-                flex_fat = base_p[base_p['is_flex']]['receita'].sum()
-                outros_fat = base_p[base_p['is_outros']]['receita'].sum()
-                
-                log_rows.append({
-                    'periodo': p,
-                    'full_pct': full_qty / total,
-                    'correios_pct': correios_qty / total,
-                    'flex_pct': flex_qty / total,
-                    'outros_pct': outros_qty / total,
-                    'full_qty': int(full_qty),
-                    'correios_qty': int(correios_qty),
-                    'flex_qty': int(flex_qty),
-                    'outros_qty': int(outros_qty),
-                    'full_fat': float(full_fat),
-                    'correios_fat': float(correios_fat),
-                    'flex_fat': float(flex_fat),
-                    'outros_fat': float(outros_fat)
-                })
-            else:
-                log_rows.append({
-                    'periodo': p,
-                    'full_pct': 0, 'correios_pct': 0, 'flex_pct': 0, 'outros_pct': 0,
-                    'full_qty': 0, 'correios_qty': 0, 'flex_qty': 0, 'outros_qty': 0,
-                    'full_fat': 0.0, 'correios_fat': 0.0, 'flex_fat': 0.0, 'outros_fat': 0.0
-                })
-        
-        df_logistics = pd.DataFrame(log_rows)
-        
-        # Métricas de Ads por período
-        ads_rows = []
-        for p in ['0-30', '31-60', '61-90', '91-120']:
-            base_p = base[base['periodo'] == p]
-            total = len(base_p)
-            
-            if total > 0:
-                ads_qty = base_p['is_ads'].sum()
-                organic_qty = base_p['is_organic'].sum()
-                
-                ads_value = base_p[base_p['is_ads']]['receita'].sum()
-                organic_value = base_p[base_p['is_organic']]['receita'].sum()
-                
-                ads_rows.append({
-                    'periodo': p,
-                    'ads_pct': ads_qty / total,
-                    'organic_pct': organic_qty / total,
-                    'ads_qty': int(ads_qty),
-                    'organic_qty': int(organic_qty),
-                    'ads_value': float(ads_value),
-                    'organic_value': float(organic_value)
-                })
-            else:
-                ads_rows.append({
-                    'periodo': p,
-                    'ads_pct': 0,
-                    'organic_pct': 0,
-                    'ads_qty': 0,
-                    'organic_qty': 0,
-                    'ads_value': 0.0,
-                    'organic_value': 0.0
-                })
-        
-        df_ads = pd.DataFrame(ads_rows)
-        
+
+        # Totais por anúncio em cada janela (diferenças da soma acumulada da matriz)
+        block = matrix.period_matrix(periods, ['unidades', 'receita'])
+        qtd = block['unidades'].round().astype(int)
+        fat = block['receita']
+
+        export = block.keys.rename(columns={'mlb': 'MLB', 'titulo': 'Título'})
+        for i, p in enumerate(labels):
+            export[f'Qntd {p}'] = qtd[:, i]
+        for i, p in enumerate(labels):
+            export[f'Fat. {p}'] = fat[:, i]
+
+        # Curva ABC de todos os períodos de uma vez, gravada por posição
+        for p, curva in zip(labels, abc_classes(fat)):
+            export[f'Curva {p}'] = curva
+
+        # Métricas logísticas e de Ads por período ('linhas' = número de vendas agregadas).
+        # O export do processador não separa coleta: essas vendas ficam em 'outros'
+        totals = matrix.channel_totals(periods, ['linhas', 'receita'])
+        qty = totals['linhas'].round().astype(int)
+        fat = totals['receita']
+        for table in (qty, fat):
+            table['outros'] += table.pop('coleta')
+            table['organic'] = table['total'] - table['ads']
+        share = qty.div(qty['total'].where(qty['total'] > 0), axis=0).fillna(0.0)
+
+        channels = ['full', 'correios', 'flex', 'outros']
+        df_logistics = pd.DataFrame({'periodo': labels})
+        for name in channels:
+            df_logistics[f'{name}_pct'] = share[name].to_numpy()
+        for name in channels:
+            df_logistics[f'{name}_qty'] = qty[name].to_numpy()
+        for name in channels:
+            df_logistics[f'{name}_fat'] = fat[name].to_numpy()
+
+        df_ads = pd.DataFrame({
+            'periodo': labels,
+            'ads_pct': share['ads'].to_numpy(),
+            'organic_pct': share['organic'].to_numpy(),
+            'ads_qty': qty['ads'].to_numpy(),
+            'organic_qty': qty['organic'].to_numpy(),
+            'ads_value': fat['ads'].to_numpy(),
+            'organic_value': fat['organic'].to_numpy(),
+        })
+
         return export, df_logistics, df_ads
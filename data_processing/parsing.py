@@ -0,0 +1,239 @@
+"""
+Conversões vetorizadas de colunas brutas dos relatórios.
+Os relatórios repetem muito os mesmos valores (datas, nomes, formas de entrega),
+então as conversões trabalham sobre os valores distintos e o resultado é
+redistribuído para as linhas pelos códigos do pd.factorize.
+"""
+import re
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+MONTHS_PT = {
+    'janeiro': 1, 'fevereiro': 2, 'março': 3, 'marco': 3,
+    'abril': 4, 'maio': 5, 'junho': 6, 'julho': 7,
+    'agosto': 8, 'setembro': 9, 'outubro': 10,
+    'novembro': 11, 'dezembro': 12,
+}
+
+# "24 de dezembro de 2025 10:32 hs." (hora, segundos e "hs." opcionais)
+PT_DATE = re.compile(
+    r'^\s*(?P<day>\d{1,2})\s*de\s*(?P<month>[a-zç]+)\s*de\s*(?P<year>\d{4})'
+    r'(?:\s+(?P<hour>\d{1,2}):(?P<minute>\d{2})(?::(?P<second>\d{2}))?)?'
+    r'\s*(?:hs\.?)?\s*$',
+    re.IGNORECASE,
+)
+
+# Formatos numéricos tentados na inferência (o ISO aparece quando a célula já era data no Excel)
+DATE_FORMATS = (
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d',
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%d/%m/%Y',
+)
+
+DATE_SAMPLE_SIZE = 200
+
+# Marcadores de célula vazia nos relatórios (não contam como erro de conversão)
+MISSING_TEXT = {'', '-', '--', 'nan', 'none', 'null', 'n/a', 'nat'}
+
+# Moeda, espaços (inclusive o não separável) e símbolo de porcentagem
+_NUMBER_NOISE = re.compile(r'[R$%\s\u00a0]')
+_DOT_THOUSANDS = re.compile(r'^[+-]?\d{1,3}(\.\d{3})+$')
+
+_EMPTY = {'', 'nan', 'nat', 'none'}
+
+# Identificadores considerados vazios (resultado de astype(str) em células vazias)
+EMPTY_IDS = ['', 'nan', 'none', 'None', 'NaN']
+
+
+def _codes_and_uniques(values: pd.Series):
+    """Códigos por linha e valores distintos (NaN incluído como valor)."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy().astype(np.intp)
+        uniques = list(values.cat.categories)
+        if (codes < 0).any():
+            codes[codes < 0] = len(uniques)
+            uniques.append(np.nan)
+        return codes, uniques
+    return pd.factorize(values, use_na_sentinel=False)
+
+
+def normalize_text(values: pd.Series, lower: bool = False) -> pd.Series:
+    """
+    Equivalente a values.astype(str).str.strip() (e .str.lower() se `lower`),
+    calculado apenas sobre os valores distintos.
+
+    Retorna uma Series categórica com categorias ordenadas, de modo que ordenações
+    e agrupamentos sobre ela seguem a mesma ordem do texto puro.
+    """
+    codes, uniques = _codes_and_uniques(values)
+    text = pd.Index(uniques, dtype=object).astype(str).str.strip()
+    if lower:
+        text = text.str.lower()
+    text_codes, categories = pd.factorize(text, sort=True)
+    return pd.Series(
+        pd.Categorical.from_codes(text_codes[codes], categories=categories),
+        index=values.index,
+        name=values.name,
+    )
+
+
+def fill_text(values: pd.Series, mask: pd.Series, other: pd.Series) -> pd.Series:
+    """Troca `values` por `other` onde `mask` for verdadeiro (ambas categóricas, de normalize_text)."""
+    categories = values.cat.categories.union(other.cat.categories)
+    values = values.cat.set_categories(categories)
+    other = other.cat.set_categories(categories)
+    return values.where(~mask, other)
+
+
+def map_categories(values: pd.Series, func: Callable[[pd.Series], object]) -> np.ndarray:
+    """
+    Aplica `func` (vetorizada, recebe uma Series de textos) aos valores distintos e
+    devolve o resultado por linha. Usado para classificar textos (logística, ads)
+    uma vez por valor distinto em vez de uma vez por venda.
+    """
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = normalize_text(values)
+    result = np.asarray(func(pd.Series(values.cat.categories, dtype=object)))
+    return result[values.cat.codes.to_numpy()]
+
+
+def _parse_pt_dates(values: pd.Series) -> pd.Series:
+    """Converte datas por extenso em português com uma única regex compilada."""
+    parts = values.str.extract(PT_DATE)
+    month = parts['month'].str.lower().map(MONTHS_PT)
+    frame = pd.DataFrame({
+        'year': pd.to_numeric(parts['year'], errors='coerce'),
+        'month': month,
+        'day': pd.to_numeric(parts['day'], errors='coerce'),
+        'hour': pd.to_numeric(parts['hour'], errors='coerce').fillna(0),
+        'minute': pd.to_numeric(parts['minute'], errors='coerce').fillna(0),
+        'second': pd.to_numeric(parts['second'], errors='coerce').fillna(0),
+    })
+    return pd.to_datetime(frame, errors='coerce')
+
+
+def _parse_with(values: pd.Series, fmt: str) -> pd.Series:
+    if fmt == 'pt':
+        return _parse_pt_dates(values)
+    return pd.to_datetime(values, format=fmt, errors='coerce')
+
+
+def infer_date_formats(sample: pd.Series) -> List[str]:
+    """
+    Formatos que reconhecem ao menos um valor da amostra, do mais para o menos
+    frequente ('pt' = data por extenso).
+    """
+    scores = []
+    for fmt in ('pt',) + DATE_FORMATS:
+        hits = int(_parse_with(sample, fmt).notna().sum())
+        if hits:
+            scores.append((hits, fmt))
+    # sorted é estável: em empate vale a ordem de DATE_FORMATS
+    return [fmt for _, fmt in sorted(scores, key=lambda s: -s[0])]
+
+
+def parse_dates(values: pd.Series, sample_size: int = DATE_SAMPLE_SIZE) -> pd.Series:
+    """
+    Converte a coluna 'Data da venda' (texto ou data) em datetime64.
+
+    O formato é inferido de uma amostra dos valores distintos; cada valor distinto
+    é convertido uma única vez e o resultado volta para as linhas pelos códigos.
+    Valores que o formato principal não reconhece passam pelos demais formatos
+    inferidos e, por último, pelo parser genérico do pandas (dayfirst).
+    Valores não reconhecidos viram NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    text = pd.Series(pd.Index(uniques).astype(str), dtype=object).str.strip()
+    parsed = pd.Series(pd.NaT, index=text.index, dtype='datetime64[ns]')
+
+    pending = ~text.str.lower().isin(_EMPTY)
+    sample = text[pending].head(sample_size)
+    for fmt in infer_date_formats(sample):
+        if not pending.any():
+            break
+        result = _parse_with(text[pending], fmt)
+        parsed[result.index] = parsed[result.index].fillna(result)
+        pending &= parsed.isna()
+
+    if pending.any():
+        parsed[pending] = pd.to_datetime(text[pending], errors='coerce', dayfirst=True, format='mixed')
+
+    out = parsed.to_numpy()[codes]
+    out[codes < 0] = np.datetime64('NaT')
+    return pd.Series(out, index=values.index, name=values.name)
+
+
+def detect_decimal_separator(text: pd.Series) -> str:
+    """
+    Separador decimal de uma coluna de números em texto (já sem moeda/espaços).
+
+    - Valores com '.' e ',': vale o separador que aparece por último na maioria.
+    - Apenas ',': decimal (1234,56).
+    - Apenas '.': milhar se todos tiverem o formato 1.234(.567), senão decimal.
+    """
+    has_dot = text.str.contains('.', regex=False)
+    has_comma = text.str.contains(',', regex=False)
+    both = has_dot & has_comma
+    if both.any():
+        comma_last = text[both].str.rfind(',') > text[both].str.rfind('.')
+        return ',' if comma_last.sum() * 2 >= both.sum() else '.'
+    if has_comma.any():
+        return ','
+    if has_dot.any() and text[has_dot].str.match(_DOT_THOUSANDS).all():
+        return ','
+    return '.'
+
+
+def parse_number(values: pd.Series, percent: bool = False,
+                 decimal: Optional[str] = None) -> Tuple[pd.Series, pd.Series]:
+    """
+    Converte uma coluna de valores monetários ou percentuais ("R$ 1.234,56",
+    "31,93%", 1234.56) em float, em uma única passada sobre os valores distintos.
+
+    O separador decimal é detectado uma vez para a coluna (ou fixado por `decimal`).
+    Com `percent`, textos são divididos por 100 ("31,93%" -> 0.3193); células já
+    numéricas são mantidas como estão.
+
+    Returns:
+        (valores, inválidos): valores float com NaN onde não houve conversão e a
+        Series com as células originais que não puderam ser convertidas (marcadores
+        de vazio como '' ou '-' viram NaN sem entrar nos inválidos).
+    """
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return values.astype(float), values.iloc[:0]
+
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    uniques = pd.Series(np.asarray(uniques, dtype=object), dtype=object)
+    parsed = pd.Series(np.nan, index=uniques.index, dtype=float)
+    invalid = np.zeros(len(uniques), dtype=bool)
+
+    is_number = uniques.map(lambda v: isinstance(v, (int, float, np.number)) and not isinstance(v, bool))
+    if is_number.any():
+        parsed[is_number] = uniques[is_number].astype(float)
+
+    text = uniques[~is_number].astype(str).str.replace(_NUMBER_NOISE, '', regex=True)
+    if len(text):
+        missing = text.str.lower().isin(MISSING_TEXT)
+        text = text[~missing]
+        sep = decimal or detect_decimal_separator(text)
+        if sep == ',':
+            text = text.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+        else:
+            text = text.str.replace(',', '', regex=False)
+        numbers = pd.to_numeric(text, errors='coerce')
+        if percent:
+            numbers = numbers / 100
+        parsed[numbers.index] = numbers
+        invalid[numbers.index[numbers.isna()]] = True
+
+    out = parsed.to_numpy()[codes]
+    out[codes < 0] = np.nan
+    bad_rows = invalid[codes] & (codes >= 0)
+    return pd.Series(out, index=values.index, name=values.name), values[bad_rows]
@@ -0,0 +1,181 @@
+"""
+Janelas de análise (períodos) contadas em dias corridos a partir de uma data de referência.
+As janelas são definidas pelas bordas (dia final de cada uma, inclusive): (30, 60, 90, 120)
+gera '0-30', '31-60', '61-90' e '91-120'. A atribuição é feita com searchsorted sobre os
+deslocamentos em dias, sem chamada Python por linha, e devolve períodos categóricos
+ordenados (códigos inteiros), usados como chave nas agregações.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Janelas padrão dos relatórios de 120 dias
+DEFAULT_WINDOWS = (30, 60, 90, 120)
+
+
+def period_labels(edges: Sequence[int]) -> List[str]:
+    """Rótulos das janelas: '0-30', '31-60', ..."""
+    labels = []
+    start = 0
+    for edge in edges:
+        labels.append(f'{start}-{edge}')
+        start = edge + 1
+    return labels
+
+
+def period_columns(labels: Sequence[str]) -> Tuple[List[str], List[str], List[str]]:
+    """Colunas de quantidade, faturamento e curva de cada janela do export (na ordem das janelas)."""
+    return ([f"Qntd {p}" for p in labels], [f"Fat. {p}" for p in labels], [f"Curva {p}" for p in labels])
+
+
+def weekly_windows(weeks: int) -> List[int]:
+    """Bordas de `weeks` janelas semanais (7, 14, 21, ...)."""
+    return [7 * (i + 1) for i in range(weeks)]
+
+
+def monthly_windows(months: int, days: int = 30) -> List[int]:
+    """Bordas de `months` janelas mensais de `days` dias (30, 60, 90, ...)."""
+    return [days * (i + 1) for i in range(months)]
+
+
+def parse_windows(text: str) -> List[int]:
+    """Bordas digitadas pelo usuário ("7, 14, 30, 60") -> [7, 14, 30, 60]."""
+    parts = [p for p in str(text).replace(';', ',').replace(' ', ',').split(',') if p]
+    try:
+        return [int(p) for p in parts]
+    except ValueError:
+        raise ValueError(f"Janelas inválidas: {text!r} (use dias separados por vírgula, ex.: 7, 14, 30)")
+
+
+class PeriodEngine:
+    """
+    Atribui cada data a uma janela de análise.
+
+    Args:
+        edges: Dia final (inclusive) de cada janela, em ordem crescente.
+            Ex.: (30, 60, 90, 120), (7, 14, 30, 60, 90, 120) ou weekly_windows(8)
+        reference: Data de referência (dia 0). Vale o dia inteiro: vendas da própria
+            data contam no dia 0 e vendas posteriores ficam de fora. Padrão: a última venda
+    """
+
+    def __init__(self, edges: Sequence[int] = DEFAULT_WINDOWS, reference=None):
+        edges = [int(e) for e in edges]
+        if not edges or edges[0] < 0 or any(b <= a for a, b in zip(edges, edges[1:])):
+            raise ValueError(f"Janelas inválidas: {edges} (use dias crescentes, ex.: 30, 60, 90, 120)")
+        self.edges = np.asarray(edges, dtype=np.int64)
+        self.labels = period_labels(edges)
+        self.reference = None
+        if reference is not None:
+            self.reference = pd.Timestamp(reference).normalize() + pd.Timedelta(days=1) - pd.Timedelta(1, 'ns')
+
+    @property
+    def horizon(self) -> int:
+        """Último dia coberto pelas janelas."""
+        return int(self.edges[-1])
+
+    @property
+    def key(self) -> str:
+        """Identificação da configuração (janelas + referência), usada em chaves de cache."""
+        ref = '' if self.reference is None else self.reference.date().isoformat()
+        return f"windows={','.join(map(str, self.edges.tolist()))};ref={ref}"
+
+    def reference_date(self, dates: pd.Series) -> pd.Timestamp:
+        """Data de referência: a informada no construtor ou, sem ela, a última venda."""
+        return self.reference if self.reference is not None else dates.max()
+
+    def day_offsets(self, dates: pd.Series, ref: Optional[pd.Timestamp] = None) -> pd.Series:
+        """Dias corridos entre cada data e a referência (NaN para datas vazias)."""
+        if ref is None:
+            ref = self.reference_date(dates)
+        return (ref - dates).dt.days
+
+    def codes(self, dates: pd.Series, ref: Optional[pd.Timestamp] = None) -> np.ndarray:
+        """Código da janela de cada data (-1 fora das janelas ou após a referência)."""
+        days = self.day_offsets(dates, ref).to_numpy(dtype=float, na_value=np.nan)
+        codes = np.searchsorted(self.edges, days, side='left')
+        outside = np.isnan(days) | (days < 0) | (codes >= len(self.edges))
+        return np.where(outside, -1, codes).astype(np.int16)
+
+    def assign(self, dates: pd.Series, ref: Optional[pd.Timestamp] = None) -> pd.Series:
+        """Períodos como Series categórica ordenada (NaN fora das janelas)."""
+        return pd.Series(
+            pd.Categorical.from_codes(self.codes(dates, ref), categories=self.labels, ordered=True),
+            index=dates.index,
+            name='periodo',
+        )
+
+
+def flag_totals(periodo: pd.Series, flags: Dict[str, np.ndarray],
+                values: Dict[str, pd.Series]) -> Dict[str, pd.DataFrame]:
+    """
+    Soma cada medida de `values` por período, para cada flag e no total, em uma
+    única agregação agrupada por (período, combinação de flags).
+
+    As flags podem se sobrepor: cada combinação distinta é agregada uma vez e o
+    resultado é distribuído para as flags que ela contém, então o custo não cresce
+    com o número de períodos nem com o de categorias.
+
+    Args:
+        periodo: Períodos categóricos (PeriodEngine.assign); linhas sem período são ignoradas
+        flags: Nome -> máscara booleana por linha (ex.: is_full, is_ads)
+        values: Nome da medida -> valores por linha
+
+    Returns:
+        {medida: DataFrame com um período por linha e colunas = flags + 'total'}
+    """
+    labels = list(periodo.cat.categories)
+    names = list(flags)
+    n_combos = 1 << len(names)
+
+    combo = np.zeros(len(periodo), dtype=np.int64)
+    for bit, name in enumerate(names):
+        combo |= np.asarray(flags[name], dtype=bool).astype(np.int64) << bit
+    codes = periodo.cat.codes.to_numpy().astype(np.int64)
+    valid = codes >= 0
+    key = codes[valid] * n_combos + combo[valid]
+
+    # Quais flags cada combinação contém (combinações x flags)
+    members = (np.arange(n_combos)[:, None] >> np.arange(len(names))) & 1
+
+    out = {}
+    for measure, column in values.items():
+        weights = np.asarray(column, dtype=float)[valid]
+        sums = np.bincount(key, weights=weights, minlength=len(labels) * n_combos)
+        sums = sums.reshape(len(labels), n_combos)
+        table = pd.DataFrame(sums @ members, index=labels, columns=names)
+        table['total'] = sums.sum(axis=1)
+        out[measure] = table
+    return out
+
+
+class PeriodMatrix:
+    """
+    Bloco denso chave x período x métrica (ex.: anúncio x janela x unidades/receita),
+    montado com uma única agregação agrupada e um único unstack.
+
+    `keys` tem uma linha por chave (mesma ordem do bloco) e `matrix[metrica]`
+    devolve a visão (chaves x períodos) daquela métrica.
+    """
+
+    def __init__(self, keys: pd.DataFrame, periods: List[str], metrics: List[str], values: np.ndarray):
+        self.keys = keys
+        self.periods = list(periods)
+        self.metrics = list(metrics)
+        self.values = values
+
+    @classmethod
+    def from_frame(cls, base: pd.DataFrame, keys: List[str], metrics: List[str],
+                   periods: List[str], period_col: str = 'periodo') -> 'PeriodMatrix':
+        """Soma `metrics` por (chaves, período); períodos sem venda ficam zerados."""
+        grouped = base.groupby(keys + [period_col], observed=True, sort=True)[metrics].sum()
+        block = grouped.unstack(period_col, fill_value=0)
+        block = block.reindex(columns=pd.MultiIndex.from_product([metrics, periods]), fill_value=0)
+        values = block.to_numpy(dtype=float).reshape(len(block), len(metrics), len(periods))
+        return cls(block.index.to_frame(index=False), periods, metrics, values)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __getitem__(self, metric: str) -> np.ndarray:
+        return self.values[:, self.metrics.index(metric), :]
@@ -0,0 +1,143 @@
+"""
+Cache persistente (em disco) de relatórios já processados.
+Cada entrada é identificada pelo SHA-256 do conteúdo do(s) arquivo(s) mais a
+versão do motor de processamento, e guarda o trio (df_export, df_logistics, df_ads)
+em Parquet. Assim, reenviar o mesmo relatório (mesmo após reiniciar o servidor ou
+em outra sessão) carrega em milissegundos em vez de reprocessar o xlsx.
+"""
+import hashlib
+import os
+import shutil
+import uuid
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from .workbook import file_bytes
+
+# Incrementar sempre que a transformação mudar o formato/conteúdo da saída,
+# para que entradas antigas deixem de ser usadas.
+ENGINE_VERSION = "4"
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".report_cache")
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+
+FRAME_NAMES = ("export", "logistics", "ads", "issues")
+
+
+def content_hash(*files, engine_version: str = ENGINE_VERSION, params: str = "") -> str:
+    """
+    Calcula a chave de cache de um ou mais arquivos.
+
+    A ordem dos arquivos faz parte da chave, assim como a versão do motor e os
+    parâmetros da análise (`params`, ex.: janelas e data de referência).
+    """
+    h = hashlib.sha256()
+    h.update(f"engine={engine_version};{params};".encode("utf-8"))
+    for file in files:
+        data = file_bytes(file)
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def _parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ReportCache:
+    """
+    Cache LRU em disco, limitado por tamanho total.
+
+    Cada entrada é um diretório <chave>/ com um arquivo Parquet por DataFrame.
+    O mtime do diretório marca o último acesso e orienta a remoção (LRU).
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = _parquet_available()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key: str) -> Optional[Tuple[pd.DataFrame, ...]]:
+        """Retorna os DataFrames salvos para a chave (FRAME_NAMES), ou None se não existir/estiver corrompido."""
+        if not self.enabled:
+            return None
+        entry = self._entry_dir(key)
+        if not os.path.isdir(entry):
+            return None
+        try:
+            frames = tuple(
+                pd.read_parquet(os.path.join(entry, f"{name}.parquet"))
+                for name in FRAME_NAMES
+            )
+            os.utime(entry, None)
+            return frames
+        except Exception:
+            self.invalidate(key)
+            return None
+
+    def put(self, key: str, frames: Tuple[pd.DataFrame, ...]) -> bool:
+        """
+        Salva os DataFrames (na ordem de FRAME_NAMES). Falhas de escrita não interrompem
+        a análise: o cache é apenas uma otimização.
+        """
+        if not self.enabled:
+            return False
+        tmp = os.path.join(self.cache_dir, f".tmp-{uuid.uuid4().hex}")
+        try:
+            os.makedirs(tmp, exist_ok=True)
+            for name, df in zip(FRAME_NAMES, frames):
+                df = df if df is not None else pd.DataFrame()
+                df.to_parquet(os.path.join(tmp, f"{name}.parquet"))
+            entry = self._entry_dir(key)
+            if os.path.isdir(entry):
+                shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp, entry)
+        except Exception as e:
+            print(f"Erro ao gravar cache de relatório: {e}")
+            shutil.rmtree(tmp, ignore_errors=True)
+            return False
+        self._evict()
+        return True
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Remove a entrada da chave informada, ou todo o cache se key for None."""
+        if key is None:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            return
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def _entries(self) -> list:
+        """Lista (mtime, tamanho, caminho) de todas as entradas válidas."""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(path, f))
+                for f in os.listdir(path)
+            )
+            entries.append((os.path.getmtime(path), size, path))
+        return entries
+
+    def _evict(self) -> None:
+        """Remove as entradas usadas há mais tempo até respeitar o limite de tamanho."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        while entries and total > self.max_bytes:
+            _, size, path = entries.pop(0)
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
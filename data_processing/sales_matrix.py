@@ -0,0 +1,213 @@
+"""
+Matriz esparsa de vendas (anúncio x dia).
+É o resultado canônico da leitura dos relatórios do Mercado Livre: cada camada
+(unidades, receita, Full, Ads...) guarda apenas os pares anúncio/dia com venda, em
+formato COO ordenado por (anúncio, dia), junto com a soma acumulada (prefix sum)
+de cada camada. O total de qualquer janela de dias é uma diferença entre duas
+posições da soma acumulada, então mudar as janelas ou a data de referência não
+exige reler os arquivos.
+"""
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .abc import abc_codes
+from .logistics import classify_logistics, logistics_categories
+from .parsing import map_categories
+from .periods import PeriodEngine, PeriodMatrix, flag_totals
+
+# Identificação de um anúncio nas saídas
+SKU_KEYS = ['mlb', 'titulo']
+
+# Camadas por anúncio/dia ('linhas' = número de vendas)
+LAYERS = ('unidades', 'receita', 'linhas', 'unidades_full', 'receita_full', 'unidades_ads', 'receita_ads')
+
+# Valores de 'Venda por publicidade' que indicam venda via Ads (já em minúsculas)
+ADS_YES = ['sim', 's', 'yes', 'y', '1', 'true', 'si']
+
+
+def ads_flags(values: pd.Series) -> np.ndarray:
+    """Venda via Ads por linha (avaliado uma vez por valor distinto)."""
+    return map_categories(values, lambda s: s.str.strip().str.lower().isin(ADS_YES))
+
+
+class SalesMatrix:
+    """
+    Vendas por anúncio e dia em formato esparso.
+
+    Atributos:
+        skus: Um anúncio por linha (colunas de SKU_KEYS), na ordem dos índices da matriz
+        start: Primeiro dia do histórico (dia 0)
+        n_days: Quantidade de dias entre o primeiro e o último dia com venda
+        sku, day: Coordenadas de cada entrada (ordenadas por anúncio e dia, sem repetição)
+        layers: Camada -> valores de cada entrada
+        channels: Totais por (dia, forma de entrega, Ads), sem abrir por anúncio
+    """
+
+    def __init__(self, skus: pd.DataFrame, start: Optional[pd.Timestamp], n_days: int,
+                 sku: np.ndarray, day: np.ndarray, layers: Dict[str, np.ndarray],
+                 channels: pd.DataFrame):
+        self.skus = skus.reset_index(drop=True)
+        self.start = start
+        self.n_days = int(n_days)
+        self.sku = sku
+        self.day = day
+        self.layers = layers
+        self.channels = channels
+        self._key = sku.astype(np.int64) * max(self.n_days, 1) + day
+        self._prefix = {name: np.concatenate([[0.0], np.cumsum(values)]) for name, values in layers.items()}
+
+    @classmethod
+    def from_daily(cls, daily: pd.DataFrame) -> 'SalesMatrix':
+        """
+        Monta a matriz a partir da agregação diária do MercadoLivreProcessor
+        (colunas mlb, titulo, dia, logistica, ads, unidades, receita, linhas).
+        """
+        if daily.empty:
+            return cls.empty()
+
+        entrega = classify_logistics(daily['logistica'])
+        is_full = (entrega == 'full').to_numpy()
+        is_ads = ads_flags(daily['ads'])
+
+        sku_index = pd.MultiIndex.from_frame(daily[SKU_KEYS].astype(object))
+        sku, skus = pd.factorize(sku_index, sort=True)
+        start = daily['dia'].min()
+        day = (daily['dia'] - start).dt.days.to_numpy()
+
+        unidades = daily['unidades'].to_numpy(dtype=float)
+        receita = daily['receita'].to_numpy(dtype=float)
+        entries = pd.DataFrame({
+            'sku': sku,
+            'day': day,
+            'unidades': unidades,
+            'receita': receita,
+            'linhas': daily['linhas'].to_numpy(dtype=float),
+            'unidades_full': np.where(is_full, unidades, 0.0),
+            'receita_full': np.where(is_full, receita, 0.0),
+            'unidades_ads': np.where(is_ads, unidades, 0.0),
+            'receita_ads': np.where(is_ads, receita, 0.0),
+        }).groupby(['sku', 'day'], sort=True).sum()
+
+        channels = pd.DataFrame({
+            'dia': daily['dia'].to_numpy(),
+            'entrega': entrega.to_numpy(),
+            'ads': is_ads,
+            'unidades': unidades,
+            'receita': receita,
+            'linhas': daily['linhas'].to_numpy(dtype=float),
+        }).groupby(['dia', 'entrega', 'ads'], observed=True, sort=True).sum().reset_index()
+
+        return cls(
+            skus=skus.to_frame(index=False, name=SKU_KEYS),
+            start=start,
+            n_days=int(day.max()) + 1,
+            sku=entries.index.get_level_values('sku').to_numpy(dtype=np.int64),
+            day=entries.index.get_level_values('day').to_numpy(dtype=np.int64),
+            layers={name: entries[name].to_numpy() for name in LAYERS},
+            channels=channels,
+        )
+
+    @classmethod
+    def empty(cls) -> 'SalesMatrix':
+        return cls(
+            skus=pd.DataFrame(columns=SKU_KEYS),
+            start=None,
+            n_days=0,
+            sku=np.empty(0, dtype=np.int64),
+            day=np.empty(0, dtype=np.int64),
+            layers={name: np.empty(0) for name in LAYERS},
+            channels=pd.DataFrame(columns=['dia', 'entrega', 'ads', 'unidades', 'receita', 'linhas']),
+        )
+
+    @property
+    def is_empty(self) -> bool:
+        return len(self.sku) == 0
+
+    @property
+    def days(self) -> pd.DatetimeIndex:
+        """Datas das colunas da matriz."""
+        return pd.date_range(self.start, periods=self.n_days, freq='D')
+
+    def reference_day(self, engine: PeriodEngine) -> int:
+        """Índice do dia de referência (a referência do motor ou, sem ela, o último dia)."""
+        if engine.reference is None:
+            return self.n_days - 1
+        return int((engine.reference.normalize() - self.start).days)
+
+    def window_totals(self, layer: str, first_day, last_day) -> np.ndarray:
+        """
+        Total da camada por anúncio entre os dias `first_day` e `last_day` (inclusive).
+        Com limites escalares o resultado tem um valor por anúncio; com vetores de
+        limites (uma posição por janela), uma matriz anúncios x janelas.
+        """
+        n = max(self.n_days, 1)
+        first, last = np.broadcast_arrays(np.asarray(first_day, dtype=np.int64), np.asarray(last_day, dtype=np.int64))
+        first = np.clip(first, 0, n)
+        last = np.clip(last, -1, n - 1)
+        rows = np.arange(len(self.skus), dtype=np.int64)
+        if first.ndim:
+            rows = rows[:, None]
+        lo = np.searchsorted(self._key, rows * n + first, side='left')
+        hi = np.searchsorted(self._key, rows * n + last, side='right')
+        prefix = self._prefix[layer]
+        return np.where(last >= first, prefix[np.maximum(hi, lo)] - prefix[lo], 0.0)
+
+    def window_bounds(self, engine: PeriodEngine):
+        """Primeiro e último dia (índices da matriz) de cada janela do motor."""
+        ref = self.reference_day(engine)
+        edges = engine.edges
+        starts = np.concatenate([[0], edges[:-1] + 1])
+        return ref - edges, ref - starts
+
+    def period_matrix(self, engine: PeriodEngine, layers: Sequence[str] = LAYERS) -> PeriodMatrix:
+        """
+        Bloco anúncio x janela x camada para as janelas do motor. Anúncios sem nenhuma
+        venda nas janelas ficam de fora (mesmo critério da agregação por linhas).
+        """
+        first, last = self.window_bounds(engine)
+        sold = self.window_totals('linhas', first, last).sum(axis=1) > 0
+        values = np.stack([self.window_totals(layer, first, last)[sold] for layer in layers], axis=1)
+        return PeriodMatrix(self.skus[sold].reset_index(drop=True), engine.labels, list(layers), values)
+
+    def channel_totals(self, engine: PeriodEngine,
+                       measures: Sequence[str] = ('unidades', 'receita', 'linhas')) -> Dict[str, pd.DataFrame]:
+        """
+        Totais por janela para cada forma de entrega (categorias de logistics) e para
+        Ads, no formato de flag_totals: {medida: períodos x (categorias + 'ads' + 'total')}.
+        """
+        channels = self.channels
+        periodo = engine.assign(channels['dia'], ref=self.start + pd.Timedelta(days=self.reference_day(engine)))
+        entrega = channels['entrega'].astype(str)
+        flags = {c: (entrega == c).to_numpy() for c in logistics_categories()}
+        flags['ads'] = channels['ads'].to_numpy(dtype=bool)
+        return flag_totals(periodo, flags, {m: channels[m] for m in measures})
+
+    def dense(self, layer: str) -> np.ndarray:
+        """Camada como matriz densa (anúncios x dias)."""
+        out = np.zeros((len(self.skus), self.n_days))
+        out[self.sku, self.day] = self.layers[layer]
+        return out
+
+    def rolling_totals(self, layer: str, edge: int = 30) -> np.ndarray:
+        """
+        Total da camada na janela móvel que termina em cada dia (anúncios x dias).
+        A janela cobre os dias 0..`edge` para trás, como a primeira janela do
+        PeriodEngine; nos primeiros `edge` dias do histórico ela está incompleta.
+        """
+        totals = np.cumsum(self.dense(layer), axis=1)
+        span = edge + 1
+        if span < self.n_days:
+            totals[:, span:] -= totals[:, :-span].copy()
+        return totals
+
+    def rolling_abc(self, edge: int = 30) -> np.ndarray:
+        """
+        Curva ABC da janela móvel de cada dia (códigos int8 de abc_codes, anúncios x dias),
+        com o ranking de todos os dias feito de uma vez.
+        """
+        revenue = self.rolling_totals('receita', edge)
+        # Sem vendas na janela = '-' (a subtração das somas acumuladas pode deixar resíduo)
+        revenue[self.rolling_totals('linhas', edge) == 0] = 0.0
+        return abc_codes(revenue)
@@ -0,0 +1,185 @@
+"""
+Segmentações do catálogo (âncoras, inativar, revitalizar...).
+Cada segmento é uma regra declarada em uma tabela: todas as regras são avaliadas
+uma vez sobre o catálogo e viram uma matriz booleana produto x segmento. O catálogo
+é ordenado uma única vez por critério de ordenação (a maioria usa 'Fat total'), e
+cada segmento é a fatia dessa ordem que passa na sua regra, devolvida como um
+vetor de posições. Um segmento novo custa só a avaliação da sua regra. A frente
+do plano tático de cada produto sai da mesma matriz (FRONTS).
+"""
+from typing import Callable, Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .periods import period_columns
+
+
+class Catalog:
+    """
+    Acesso às colunas do catálogo filtrado (df_f) como vetores numpy, por período
+    (0 = janela atual). Cada coluna é convertida uma única vez.
+    """
+
+    def __init__(self, df: pd.DataFrame, labels: Sequence[str]):
+        self.df = df
+        self.qty_cols, self.fat_cols, self.curve_cols = period_columns(labels)
+        self._values: Dict[str, np.ndarray] = {}
+        self._curves: Dict[Tuple[int, str], np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def col(self, name: str) -> np.ndarray:
+        """Valores numéricos de uma coluna do catálogo ou de uma coluna derivada."""
+        if name not in self._values:
+            self._values[name] = self.df[name].to_numpy(dtype=float)
+        return self._values[name]
+
+    def derive(self, name: str, values) -> None:
+        """Registra uma coluna derivada (calculada para o catálogo inteiro)."""
+        self._values[name] = np.asarray(values, dtype=float)
+
+    def qty(self, period: int) -> np.ndarray:
+        return self.col(self.qty_cols[period])
+
+    def fat(self, period: int) -> np.ndarray:
+        return self.col(self.fat_cols[period])
+
+    def curve(self, period: int, classes: str) -> np.ndarray:
+        """Produtos cuja curva no período está em `classes` (ex.: 'AB', 'C-')."""
+        key = (period, classes)
+        if key not in self._curves:
+            self._curves[key] = self.df[self.curve_cols[period]].isin(list(classes)).to_numpy()
+        return self._curves[key]
+
+    def median(self, name: str) -> float:
+        """Mediana da coluna ignorando vazios (como Series.median)."""
+        values = self.col(name)
+        values = values[~np.isnan(values)]
+        return float(np.median(values)) if len(values) else np.nan
+
+
+class Segment(NamedTuple):
+    """
+    Segmento do catálogo.
+
+    Args:
+        name: Nome do segmento (campo do AnalysisResult)
+        rule: Catalog -> máscara booleana dos produtos do segmento
+        sort_by: Coluna usada para ordenar o segmento (decrescente, vazios no fim)
+        columns: Colunas derivadas (nome, Catalog -> valores) calculadas antes da regra
+            e incluídas no DataFrame do segmento
+    """
+    name: str
+    rule: Callable[[Catalog], np.ndarray]
+    sort_by: str = 'Fat total'
+    columns: Tuple[Tuple[str, Callable[[Catalog], np.ndarray]], ...] = ()
+
+
+# Mercado Livre: compara a janela atual com as anteriores
+ML_SEGMENTS = (
+    Segment('anchors', lambda c: c.curve(0, 'A') & c.curve(1, 'AB') & c.curve(2, 'AB')),
+    Segment('inactivate', lambda c: (c.qty(0) == 0) & (c.qty(1) == 0) & (c.qty(2) == 0)),
+    Segment('revitalize', lambda c: c.curve(1, 'AB') & c.curve(0, 'C-')),
+    Segment('rise_to_A', lambda c: c.curve(1, 'BC') & c.curve(0, 'A')),
+    Segment('opp_50_60', lambda c: c.curve(0, 'B') & (c.qty(0) >= c.qty(1) * 1.1)),
+    Segment('dead_stock_combo', lambda c: c.curve(0, '-') & (c.col('Fat total') > 0), sort_by='TM total'),
+    Segment('drop_alert', lambda c: c.curve(1, 'AB') & c.curve(0, 'C-'), sort_by='Perda estimada', columns=(
+        ('Fat anterior ref', lambda c: np.fmax(c.fat(1), c.fat(2))),
+        ('Perda estimada', lambda c: c.col('Fat anterior ref') - c.fat(0)),
+    )),
+)
+
+# Shopee: período único, usa apenas a curva atual
+SHOPEE_SEGMENTS = (
+    Segment('anchors', lambda c: c.curve(0, 'A')),
+    Segment('inactivate', lambda c: c.qty(0) == 0),
+    # Teve vendas mas está em C ou -
+    Segment('revitalize', lambda c: c.curve(0, 'C-') & (c.qty(0) > 0)),
+    Segment('rise_to_A', lambda c: c.curve(0, 'A') & (c.qty(0) > 0)),
+    Segment('opp_50_60', lambda c: c.curve(0, 'B')),
+    Segment('dead_stock_combo', lambda c: c.curve(0, '-') & (c.col('Fat total') > 0), sort_by='TM total'),
+    # Fuga de receita: produtos C ou - com bom ticket médio (potencial); perda estimada pelo TM
+    Segment('drop_alert', lambda c: c.curve(0, 'C-') & (c.col('TM total') > c.median('TM total')),
+            sort_by='Perda estimada', columns=(
+                ('Perda estimada', lambda c: c.col('TM total') * 10),
+            )),
+)
+
+
+# Frentes do plano tático em ordem de precedência: o produto fica na primeira frente
+# que tem algum dos seus segmentos; fora de todos os segmentos, na frente padrão
+FRONTS = (
+    ('DEFESA', ('anchors',)),
+    ('CORREÇÃO', ('drop_alert', 'revitalize')),
+    ('ATAQUE', ('rise_to_A', 'opp_50_60')),
+    ('LIMPEZA', ('dead_stock_combo', 'inactivate')),
+)
+DEFAULT_FRONT = 'OTIMIZAÇÃO'
+
+
+class Segmentation:
+    """
+    Segmentos avaliados sobre um catálogo.
+
+    Atributos:
+        names: Nome de cada segmento, na ordem da tabela
+        masks: Matriz booleana produto x segmento (na ordem das linhas do catálogo)
+    """
+
+    def __init__(self, catalog: Catalog, segments: Sequence[Segment]):
+        self.catalog = catalog
+        self.segments = {s.name: s for s in segments}
+        self.names: List[str] = [s.name for s in segments]
+        for segment in segments:
+            for name, values in segment.columns:
+                catalog.derive(name, values(catalog))
+        self.masks = np.zeros((len(catalog), len(segments)), dtype=bool)
+        for i, segment in enumerate(segments):
+            self.masks[:, i] = segment.rule(catalog)
+
+        # Uma ordenação por critério, compartilhada pelos segmentos que o usam
+        # (estável: empates mantêm a ordem do catálogo; vazios no fim)
+        self._orders = {key: np.argsort(-catalog.col(key), kind='stable')
+                        for key in dict.fromkeys(s.sort_by for s in segments)}
+
+    def mask(self, name: str) -> np.ndarray:
+        return self.masks[:, self.names.index(name)]
+
+    def index(self, name: str) -> np.ndarray:
+        """Posições (no catálogo) dos produtos do segmento, na ordem do segmento."""
+        order = self._orders[self.segments[name].sort_by]
+        return order[self.mask(name)[order]]
+
+    def frame(self, name: str) -> pd.DataFrame:
+        """Produtos do segmento como DataFrame (com as colunas derivadas do segmento)."""
+        positions = self.index(name)
+        out = self.catalog.df.take(positions)
+        for column, _ in self.segments[name].columns:
+            out[column] = self.catalog.col(column)[positions]
+        return out
+
+    def classified(self) -> np.ndarray:
+        """Produtos que estão em pelo menos um segmento."""
+        return self.masks.any(axis=1)
+
+    def fronts(self, fronts: Sequence[Tuple[str, Sequence[str]]] = FRONTS,
+               default: str = DEFAULT_FRONT) -> Tuple[np.ndarray, pd.Series]:
+        """
+        Frente de cada produto (object array) e quantidade de produtos por frente
+        (Series na ordem de precedência, padrão por último).
+        """
+        names = [name for name, _ in fronts] + [default]
+        # Produto x frente: o produto está em algum segmento da frente
+        hits = np.stack([self.masks[:, [self.names.index(s) for s in segs]].any(axis=1)
+                         for _, segs in fronts], axis=1)
+        # A primeira frente marcada vence; sem nenhuma, a frente padrão
+        codes = np.where(hits.any(axis=1), hits.argmax(axis=1), len(fronts))
+        counts = pd.Series(np.bincount(codes, minlength=len(names)), index=names)
+        return np.array(names, dtype=object)[codes], counts
+
+
+def segment_catalog(df: pd.DataFrame, labels: Sequence[str], segments: Sequence[Segment]) -> Segmentation:
+    """Avalia a tabela de segmentos sobre o catálogo filtrado."""
+    return Segmentation(Catalog(df, labels), segments)
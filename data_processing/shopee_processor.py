@@ -4,43 +4,33 @@ Transforma relatórios da Shopee no formato padronizado de curva ABC.
 """
 import pandas as pd
 import numpy as np
-from typing import Tuple, Optional
+from typing import Sequence, Tuple, Optional
 from .base_processor import BaseProcessor
+from .periods import DEFAULT_WINDOWS, period_labels
+from .sniffer import sniff
+from .workbook import ParsedWorkbook
 
 
 class ShopeeProcessor(BaseProcessor):
     """Processador para relatórios da Shopee."""
     
-    def __init__(self):
+    def __init__(self, windows: Sequence[int] = DEFAULT_WINDOWS):
+        """
+        Args:
+            windows: Janelas de análise do painel; o relatório da Shopee cobre um
+                único período, lançado na primeira janela
+        """
         super().__init__()
         self.canal_name = "Shopee"
+        self.periods = period_labels(windows)
     
     def detect(self, file) -> bool:
         """
         Detecta se o arquivo é um relatório da Shopee.
-        Verifica cabeçalhos característicos da Shopee.
+        Verifica cabeçalhos característicos da Shopee (qualquer um dos três relatórios),
+        lidos direto do zip do .xlsx.
         """
-        try:
-            file.seek(0)
-            # Tenta ler as primeiras linhas
-            df_preview = pd.read_excel(file, nrows=5)
-            file.seek(0)
-            
-            # Colunas características da Shopee
-            shopee_indicators = [
-                'ID do Item',
-                'SKU Principle',
-                'Visitantes do Produto',
-                'Taxa de conversão (Pedido pago)',
-                'Vendas (Pedido pago) (BRL)'
-            ]
-            
-            # Verifica se pelo menos 2 indicadores estão presentes
-            matches = sum(1 for col in df_preview.columns if any(ind in str(col) for ind in shopee_indicators))
-            return matches >= 2
-            
-        except Exception:
-            return False
+        return sniff(file).channel == self.canal_name
     
     def process(self, files: list) -> Tuple[pd.DataFrame, Optional[pd.DataFrame], Optional[pd.DataFrame]]:
         """
@@ -57,22 +47,15 @@ class ShopeeProcessor(BaseProcessor):
         traffic_file = None
         
         for file in files:
-            file.seek(0)
-            try:
-                df_test = pd.read_excel(file, nrows=2)
-                cols = [str(c).lower() for c in df_test.columns]
-                
-                if 'id do item' in cols or 'sku principle' in cols:
-                    product_file = file
-                elif 'compradores (pedidos feitos)' in cols:
-                    sales_file = file
-                elif 'visualizações da página' in cols and 'taxa de devolução' in cols:
-                    traffic_file = file
-                    
-                file.seek(0)
-            except Exception:
-                file.seek(0)
-                continue
+            workbook = ParsedWorkbook.of(file)
+            kind = sniff(workbook).kind
+            
+            if kind == 'product':
+                product_file = workbook
+            elif kind == 'sales':
+                sales_file = workbook
+            elif kind == 'traffic':
+                traffic_file = workbook
         
         if product_file is None:
             raise ValueError("Arquivo de performance de produtos da Shopee não encontrado")
@@ -98,12 +81,11 @@ class ShopeeProcessor(BaseProcessor):
         
         return df_export, df_logistics, df_ads
     
-    def _process_product_performance(self, file) -> pd.DataFrame:
+    def _process_product_performance(self, workbook: ParsedWorkbook) -> pd.DataFrame:
         """
         Processa o arquivo de performance de produtos (parentskudetail).
         """
-        file.seek(0)
-        df = pd.read_excel(file, sheet_name=0)
+        df = workbook.sheet(0)
         
         # Remove linhas vazias
         df = df.dropna(how='all')
@@ -126,16 +108,9 @@ class ShopeeProcessor(BaseProcessor):
         df_export['Qtd total'] = pd.to_numeric(df_pai['Unidades (Pedido pago)'], errors='coerce').fillna(0).astype(int)
         
         # Converte valores monetários (formato: "1.234,56")
-        def parse_brl(value):
-            if pd.isna(value):
-                return 0.0
-            value_str = str(value).replace('.', '').replace(',', '.')
-            try:
-                return float(value_str)
-            except:
-                return 0.0
-        
-        df_export['Fat total'] = df_pai['Vendas (Pedido pago) (BRL)'].apply(parse_brl)
+        df_export['Fat total'] = self.parse_number_column(
+            df_pai['Vendas (Pedido pago) (BRL)'], 'Vendas (Pedido pago) (BRL)'
+        ).fillna(0.0)
         
         # Calcula ticket médio
         df_export['TM total'] = df_export.apply(
@@ -143,36 +118,27 @@ class ShopeeProcessor(BaseProcessor):
             axis=1
         )
         
-        # Como Shopee tem apenas um período, replica para todos os períodos
-        for periodo in ['0-30', '31-60', '61-90', '91-120']:
-            df_export[f'Qntd {periodo}'] = df_export['Qtd total'] if periodo == '0-30' else 0
-            df_export[f'Fat. {periodo}'] = df_export['Fat total'] if periodo == '0-30' else 0.0
+        # Como Shopee tem apenas um período, ele ocupa a primeira janela (atual)
+        atual = self.periods[0]
+        for periodo in self.periods:
+            df_export[f'Qntd {periodo}'] = df_export['Qtd total'] if periodo == atual else 0
+            df_export[f'Fat. {periodo}'] = df_export['Fat total'] if periodo == atual else 0.0
         
         # Calcula curva ABC baseada no faturamento total
         df_export = self.calculate_abc_curve(df_export, 'Fat total')
         
-        # Atribui curva ABC para o período 0-30 (atual)
-        df_export['Curva 0-30'] = df_export['curva_abc']
-        df_export['Curva 31-60'] = '-'
-        df_export['Curva 61-90'] = '-'
-        df_export['Curva 91-120'] = '-'
+        # Atribui curva ABC para o período atual; os anteriores ficam sem dados
+        for periodo in self.periods:
+            df_export[f'Curva {periodo}'] = df_export['curva_abc'] if periodo == atual else '-'
         
         # Dados específicos da Shopee
         df_export['_shopee_visitantes'] = pd.to_numeric(df_pai['Visitantes do Produto (Visita)'], errors='coerce').fillna(0).astype(int)
         df_export['_shopee_visualizacoes'] = pd.to_numeric(df_pai['Visualizações da Página do Produto'], errors='coerce').fillna(0).astype(int)
         
         # Taxa de rejeição (formato: "31,93%")
-        def parse_pct(value):
-            if pd.isna(value):
-                return 0.0
-            value_str = str(value).replace('%', '').replace(',', '.')
-            try:
-                return float(value_str) / 100
-            except:
-                return 0.0
-        
-        df_export['_shopee_taxa_rejeicao'] = df_pai['Taxa de Rejeição do Produto'].apply(parse_pct)
-        df_export['_shopee_taxa_conversao'] = df_pai['Taxa de conversão (Pedido pago)'].apply(parse_pct)
+        for col, target in [('Taxa de Rejeição do Produto', '_shopee_taxa_rejeicao'),
+                            ('Taxa de conversão (Pedido pago)', '_shopee_taxa_conversao')]:
+            df_export[target] = self.parse_number_column(df_pai[col], col, percent=True).fillna(0.0)
         
         # Adiciona ao carrinho
         df_export['_shopee_add_carrinho'] = pd.to_numeric(df_pai['Unidades (adicionar ao carrinho)'], errors='coerce').fillna(0).astype(int)
@@ -183,13 +149,12 @@ class ShopeeProcessor(BaseProcessor):
         
         return df_export
     
-    def _process_sales_overview(self, file) -> Optional[pd.DataFrame]:
+    def _process_sales_overview(self, workbook: ParsedWorkbook) -> Optional[pd.DataFrame]:
         """
         Processa o arquivo de visão geral de vendas (sales_overview).
         """
         try:
-            file.seek(0)
-            df = pd.read_excel(file, sheet_name=0)
+            df = workbook.sheet(0)
             
             # Remove linhas vazias
             df = df.dropna(how='all')
@@ -204,14 +169,13 @@ class ShopeeProcessor(BaseProcessor):
             print(f"Erro ao processar sales_overview: {e}")
             return None
     
-    def _process_traffic_overview(self, file) -> Optional[pd.DataFrame]:
+    def _process_traffic_overview(self, workbook: ParsedWorkbook) -> Optional[pd.DataFrame]:
         """
         Processa o arquivo de visão geral de tráfego (traffic_overview).
         """
         try:
-            file.seek(0)
             # Lê todas as sheets (Todos, PC, Aplicativo)
-            dfs = pd.read_excel(file, sheet_name=None)
+            dfs = workbook.sheets()
             
             traffic_data = {}
             for sheet_name, df in dfs.items():
@@ -230,15 +194,14 @@ class ShopeeProcessor(BaseProcessor):
             print(f"Erro ao processar traffic_overview: {e}")
             return None
     
-    def _extract_pc_app_data(self, file) -> Optional[dict]:
+    def _extract_pc_app_data(self, workbook: ParsedWorkbook) -> Optional[dict]:
         """
         Extrai dados de visitantes por origem (PC vs Aplicativo).
+        Reaproveita as abas já lidas em _process_traffic_overview.
         """
         try:
-            file.seek(0)
-            
             # Lê aba PC
-            df_pc_raw = pd.read_excel(file, sheet_name='PC')
+            df_pc_raw = workbook.sheet('PC')
             df_pc = df_pc_raw.iloc[2:].reset_index(drop=True)
             df_pc.columns = df_pc_raw.iloc[2].values
             # Remove a primeira linha que é o header duplicado
@@ -246,8 +209,7 @@ class ShopeeProcessor(BaseProcessor):
             visitantes_pc = pd.to_numeric(df_pc['Visitantes'], errors='coerce').sum()
             
             # Lê aba Aplicativo
-            file.seek(0)
-            df_app_raw = pd.read_excel(file, sheet_name='Aplicativo')
+            df_app_raw = workbook.sheet('Aplicativo')
             df_app = df_app_raw.iloc[2:].reset_index(drop=True)
             df_app.columns = df_app_raw.iloc[2].values
             # Remove a primeira linha que é o header duplicado
@@ -0,0 +1,216 @@
+"""
+Detecção rápida do canal e do tipo de relatório.
+Lê apenas o início da primeira aba direto do zip do .xlsx (sheet1.xml e as
+primeiras entradas de sharedStrings.xml), sem decodificar a planilha inteira,
+e compara os textos encontrados com as assinaturas de cada relatório.
+"""
+import io
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from .workbook import ParsedWorkbook, file_bytes
+
+# Linhas lidas do início da aba (o cabeçalho do ML costuma vir após algumas linhas de título)
+SNIFF_ROWS = 60
+
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_CELL_REF = re.compile(r"([A-Z]+)(\d*)")
+
+
+class ReportSignature(NamedTuple):
+    """Textos característicos de um relatório (procurados em minúsculas, por substring)."""
+    channel: str
+    kind: str
+    terms: Tuple[str, ...]
+    min_matches: int
+    max_header_row: int
+
+
+# Ordem importa apenas em empates de confiança
+SIGNATURES = [
+    ReportSignature(
+        "Shopee", "product",
+        ('id do item', 'sku principle', 'visitantes do produto',
+         'taxa de conversão (pedido pago)', 'vendas (pedido pago) (brl)'),
+        min_matches=2, max_header_row=0,
+    ),
+    ReportSignature(
+        "Shopee", "sales",
+        ('compradores (pedidos feitos)', 'vendas (pedidos pagos) (brl)',
+         'visitantes (visitar)', 'taxa de conversão (visitados a feitos)'),
+        min_matches=1, max_header_row=0,
+    ),
+    ReportSignature(
+        "Shopee", "traffic",
+        ('visualizações da página', 'taxa de devolução', 'novos visitantes', 'novos seguidores'),
+        min_matches=2, max_header_row=0,
+    ),
+    ReportSignature(
+        "Mercado Livre", "sales",
+        ('data da venda', 'de anúncio', 'receita por produtos', 'título do anúncio', 'forma de entrega'),
+        min_matches=1, max_header_row=SNIFF_ROWS - 1,
+    ),
+]
+
+
+class SniffResult(NamedTuple):
+    """Resultado da detecção: canal, tipo de relatório, confiança (0-1) e linha do cabeçalho."""
+    channel: Optional[str]
+    kind: Optional[str]
+    confidence: float
+    header_row: Optional[int]
+
+
+UNKNOWN = SniffResult(None, None, 0.0, None)
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+def _column_index(ref: str) -> int:
+    letters = _CELL_REF.match(ref).group(1)
+    idx = 0
+    for ch in letters:
+        idx = idx * 26 + (ord(ch) - 64)
+    return idx - 1
+
+
+def _first_sheet_path(zf: zipfile.ZipFile) -> str:
+    """Caminho do XML da primeira aba, seguindo workbook.xml e seus relacionamentos."""
+    try:
+        workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+        sheet = next(el for el in workbook.iter() if _local(el.tag) == 'sheet')
+        rel_id = sheet.get(f'{_REL_NS}id')
+        rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+        target = next(el.get('Target') for el in rels if el.get('Id') == rel_id)
+        path = target.lstrip('/') if target.startswith('/') else f'xl/{target}'
+        zf.getinfo(path)
+        return path
+    except (KeyError, StopIteration, ET.ParseError):
+        sheets = sorted(n for n in zf.namelist() if n.startswith('xl/worksheets/sheet'))
+        if not sheets:
+            raise ValueError("Arquivo xlsx sem abas")
+        return sheets[0]
+
+
+def _text_of(el) -> str:
+    """Texto de um <si>/<is>: <t> simples ou rich text (<r><t>), ignorando fonética (<rPh>)."""
+    parts = []
+    for child in el:
+        tag = _local(child.tag)
+        if tag == 't':
+            parts.append(child.text or '')
+        elif tag == 'r':
+            parts.extend(t.text or '' for t in child if _local(t.tag) == 't')
+    return ''.join(parts)
+
+
+def _shared_strings(zf: zipfile.ZipFile, last_index: int) -> List[str]:
+    """Lê sharedStrings.xml apenas até a posição `last_index`."""
+    strings: List[str] = []
+    if last_index < 0 or 'xl/sharedStrings.xml' not in zf.namelist():
+        return strings
+    with zf.open('xl/sharedStrings.xml') as f:
+        for _, el in ET.iterparse(f, events=('end',)):
+            if _local(el.tag) == 'si':
+                strings.append(_text_of(el))
+                el.clear()
+                if len(strings) > last_index:
+                    break
+    return strings
+
+
+def _xlsx_head_rows(data: bytes, max_rows: int) -> List[List[str]]:
+    """Primeiras `max_rows` linhas da primeira aba como texto, lidas direto do zip."""
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        cells = []  # (linha, coluna, tipo, valor bruto)
+        row_idx = -1
+        with zf.open(_first_sheet_path(zf)) as f:
+            for event, el in ET.iterparse(f, events=('start', 'end')):
+                tag = _local(el.tag)
+                if event == 'start':
+                    if tag == 'row':
+                        r = el.get('r')
+                        row_idx = int(r) - 1 if r else row_idx + 1
+                        if row_idx >= max_rows:
+                            break
+                    continue
+                if tag == 'c':
+                    ref = el.get('r')
+                    col = _column_index(ref) if ref else None
+                    cell_type = el.get('t', 'n')
+                    if cell_type == 'inlineStr':
+                        value = next((_text_of(c) for c in el if _local(c.tag) == 'is'), '')
+                    else:
+                        value = next((c.text or '' for c in el if _local(c.tag) == 'v'), '')
+                    cells.append((row_idx, col, cell_type, value))
+                elif tag == 'row':
+                    el.clear()
+                elif tag == 'sheetData':
+                    break
+
+        shared_idx = [int(v) for _, _, t, v in cells if t == 's' and v.isdigit()]
+        strings = _shared_strings(zf, max(shared_idx, default=-1))
+
+    rows: List[List[str]] = [[] for _ in range(max(row_idx, -1) + 1)][:max_rows]
+    for r, col, cell_type, value in cells:
+        if r >= max_rows:
+            continue
+        if cell_type == 's':
+            value = strings[int(value)] if value.isdigit() and int(value) < len(strings) else ''
+        row = rows[r]
+        col = len(row) if col is None else col
+        if col >= len(row):
+            row.extend([''] * (col + 1 - len(row)))
+        row[col] = value
+    return rows
+
+
+def head_rows(file, max_rows: int = SNIFF_ROWS) -> List[List[str]]:
+    """
+    Primeiras linhas da primeira aba como texto.
+    Arquivos que não são .xlsx (ou que o leitor do zip não entende) caem na
+    prévia do ParsedWorkbook.
+    """
+    try:
+        return _xlsx_head_rows(file_bytes(file), max_rows)
+    except (zipfile.BadZipFile, ValueError, KeyError, ET.ParseError):
+        preview = ParsedWorkbook.of(file).preview(0, nrows=max_rows)
+        return [['' if pd.isna(v) else str(v) for v in row] for row in preview.values.tolist()]
+
+
+def score_rows(rows: List[List[str]]) -> SniffResult:
+    """Compara as linhas com as assinaturas e retorna a de maior confiança."""
+    lowered = [[str(v).strip().lower() for v in row if v != ''] for row in rows]
+    best = UNKNOWN
+    for sig in SIGNATURES:
+        for i, row in enumerate(lowered[: sig.max_header_row + 1]):
+            if not row:
+                continue
+            matches = sum(1 for term in sig.terms if any(term in cell for cell in row))
+            if matches < sig.min_matches:
+                continue
+            confidence = matches / len(sig.terms)
+            if confidence > best.confidence:
+                best = SniffResult(sig.channel, sig.kind, round(confidence, 3), i)
+            # Para o ML vale a primeira linha que bate (mesma regra de _find_header_row)
+            break
+    return best
+
+
+def sniff(file, max_rows: int = SNIFF_ROWS) -> SniffResult:
+    """
+    Detecta o canal e o tipo de relatório de um arquivo lendo apenas o cabeçalho.
+
+    Returns:
+        SniffResult com channel/kind None e confiança 0 se nenhuma assinatura bater.
+    """
+    try:
+        return score_rows(head_rows(file, max_rows))
+    except Exception:
+        return UNKNOWN
@@ -0,0 +1,239 @@
+"""
+Leitura única de planilhas enviadas pelo usuário.
+Um ParsedWorkbook decodifica cada aba uma única vez e compartilha o resultado
+entre a detecção de canal e o processamento (nomes das abas, prévia do cabeçalho
+e DataFrames completos ficam em cache no próprio objeto).
+"""
+import hashlib
+import io
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Dict, List, Optional, Union
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from .excel_engines import engine_chain
+
+
+def file_bytes(file) -> bytes:
+    """Retorna o conteúdo bruto de um arquivo uploaded (ou bytes) sem alterar sua posição."""
+    if isinstance(file, (bytes, bytearray)):
+        return bytes(file)
+    if hasattr(file, 'getvalue'):
+        return file.getvalue()
+    pos = file.tell() if hasattr(file, 'tell') else None
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    data = file.read()
+    if pos is not None:
+        file.seek(pos)
+    return data
+
+
+def map_workbooks(func: Callable, workbooks: list, max_workers: Optional[int] = None) -> list:
+    """
+    Aplica `func` a cada planilha em paralelo (threads) e retorna os resultados na
+    mesma ordem. Com uma única planilha, roda direto na thread atual.
+    """
+    if len(workbooks) <= 1:
+        return [func(wb) for wb in workbooks]
+    workers = max_workers or min(4, len(workbooks))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, workbooks))
+
+
+def _normalize_rows(rows: List[list]) -> List[list]:
+    """Remove linhas vazias no final e iguala a largura das linhas (como o pandas faz)."""
+    last_row_with_data = -1
+    for i, row in enumerate(rows):
+        while row and row[-1] == "":
+            row.pop()
+        if row:
+            last_row_with_data = i
+    rows = rows[: last_row_with_data + 1]
+    if rows:
+        max_width = max(len(r) for r in rows)
+        rows = [r + [""] * (max_width - len(r)) for r in rows]
+    return rows
+
+
+class ParsedWorkbook:
+    """
+    Planilha aberta uma única vez.
+
+    As linhas de cada aba são decodificadas sob demanda e guardadas em memória;
+    prévias (header=None) e DataFrames com cabeçalho são derivados dessas linhas
+    sem reler o arquivo, com o mesmo resultado de pd.read_excel.
+
+    A decodificação usa o motor de excel_engines (calamine quando disponível);
+    se o motor falhar no arquivo, o próximo da cadeia é usado automaticamente.
+    """
+
+    def __init__(self, file, name: Optional[str] = None, engine: Optional[str] = None):
+        self.name = name or getattr(file, 'name', None)
+        self.data = file_bytes(file)
+        self._digest = None
+        self._engines = engine_chain(engine)
+        self._book = None
+        self._sheet_names = None
+        self._rows: Dict[str, List[list]] = {}
+        self._frames: Dict[tuple, pd.DataFrame] = {}
+
+    @classmethod
+    def of(cls, file) -> "ParsedWorkbook":
+        """Reaproveita o ParsedWorkbook recebido ou abre um novo a partir do arquivo."""
+        return file if isinstance(file, cls) else cls(file)
+
+    def getvalue(self) -> bytes:
+        return self.data
+
+    @property
+    def digest(self) -> str:
+        """SHA-256 do conteúdo (usado como chave de cache)."""
+        if self._digest is None:
+            self._digest = hashlib.sha256(self.data).hexdigest()
+        return self._digest
+
+    @property
+    def engine_name(self) -> str:
+        """Motor de leitura em uso (ou o próximo a ser tentado)."""
+        return self._engines[0].name
+
+    def _open(self):
+        while self._book is None:
+            try:
+                self._book = self._engines[0].open(self.data)
+            except Exception:
+                if not self._fallback():
+                    raise
+        return self._book
+
+    def _fallback(self) -> bool:
+        """Descarta o motor atual e passa para o próximo da cadeia."""
+        if len(self._engines) <= 1:
+            return False
+        self.close()
+        self._engines.pop(0)
+        return True
+
+    @property
+    def sheet_names(self) -> List[str]:
+        if self._sheet_names is None:
+            while True:
+                book = self._open()
+                try:
+                    self._sheet_names = self._engines[0].sheet_names(book)
+                    break
+                except Exception:
+                    if not self._fallback():
+                        raise
+        return self._sheet_names
+
+    def _sheet_name(self, sheet: Union[int, str]) -> str:
+        if isinstance(sheet, int):
+            return self.sheet_names[sheet]
+        if sheet not in self.sheet_names:
+            raise ValueError(f"Worksheet named '{sheet}' not found")
+        return sheet
+
+    def _iter_sheet_rows(self, name: str, columns: Optional[List[int]] = None):
+        """
+        Gera as linhas da aba já convertidas, sem guardá-las em memória.
+        Se `columns` for informado, apenas essas posições são convertidas.
+        Se o motor falhar no meio da leitura, o próximo continua de onde parou.
+        """
+        produced = 0
+        while True:
+            book = self._open()
+            try:
+                for i, row in enumerate(self._engines[0].iter_rows(book, name, columns)):
+                    if i >= produced:
+                        produced += 1
+                        yield row
+                return
+            except Exception:
+                if not self._fallback():
+                    raise
+
+    def rows(self, sheet: Union[int, str] = 0) -> List[list]:
+        """Células da aba como lista de linhas (decodificada uma única vez)."""
+        name = self._sheet_name(sheet)
+        if name not in self._rows:
+            self._rows[name] = _normalize_rows(list(self._iter_sheet_rows(name)))
+        return self._rows[name]
+
+    def iter_rows(self, sheet: Union[int, str] = 0, start: int = 0, columns: Optional[List[int]] = None):
+        """
+        Itera as linhas da aba a partir do índice `start` sem materializar a aba inteira
+        (leitura em streaming para relatórios muito grandes). Com `columns`, cada linha
+        traz apenas as posições pedidas, na ordem informada.
+        """
+        name = self._sheet_name(sheet)
+        if name in self._rows:
+            for row in self._rows[name][start:]:
+                yield row if columns is None else [row[i] if i < len(row) else "" for i in columns]
+            return
+        for i, row in enumerate(self._iter_sheet_rows(name, columns)):
+            if i >= start:
+                yield row
+
+    def _parse(self, rows: List[list], header: Optional[int]) -> pd.DataFrame:
+        if not rows:
+            return pd.DataFrame()
+        return TextParser(rows, header=header, skip_blank_lines=False).read()
+
+    def preview(self, sheet: Union[int, str] = 0, nrows: int = 80) -> pd.DataFrame:
+        """Primeiras linhas da aba sem cabeçalho (equivale a read_excel(header=None, nrows=...))."""
+        name = self._sheet_name(sheet)
+        key = (name, None, nrows)
+        if key not in self._frames:
+            if name in self._rows:
+                rows = self._rows[name][:nrows]
+            else:
+                # Lê apenas as primeiras linhas; a aba completa só é decodificada se necessária
+                rows = _normalize_rows(list(islice(self._iter_sheet_rows(name), nrows)))
+            self._frames[key] = self._parse(rows, header=None)
+        return self._frames[key]
+
+    def header(self, sheet: Union[int, str] = 0, row: int = 0) -> List[str]:
+        """Valores de uma linha da aba como texto (útil para detectar colunas sem montar o DataFrame)."""
+        name = self._sheet_name(sheet)
+        if name in self._rows:
+            rows = self._rows[name]
+        else:
+            rows = list(islice(self._iter_sheet_rows(name), row + 1))
+        if row >= len(rows):
+            return []
+        return [str(v) for v in rows[row] if v != ""]
+
+    def columns(self, sheet: Union[int, str] = 0, header: int = 0) -> List[str]:
+        """
+        Nomes das colunas que pd.read_excel(header=...) produziria (com 'Unnamed: n'
+        e sufixos '.1' para duplicadas), lendo apenas até a linha de cabeçalho.
+        """
+        rows = self.preview(sheet, nrows=header + 1)
+        values = rows.iloc[header].tolist() if len(rows) > header else []
+        values = ["" if pd.isna(v) else v for v in values]
+        return list(self._parse([values], header=0).columns)
+
+    def sheet(self, sheet: Union[int, str] = 0, header: Optional[int] = 0) -> pd.DataFrame:
+        """
+        Aba completa com a linha `header` como cabeçalho (equivale a read_excel(header=...)).
+        O DataFrame retornado é compartilhado: não deve ser alterado in-place.
+        """
+        key = (self._sheet_name(sheet), header, None)
+        if key not in self._frames:
+            self._frames[key] = self._parse(self.rows(sheet), header=header)
+        return self._frames[key]
+
+    def sheets(self, header: Optional[int] = 0) -> Dict[str, pd.DataFrame]:
+        """Todas as abas (equivale a read_excel(sheet_name=None))."""
+        return {name: self.sheet(name, header=header) for name in self.sheet_names}
+
+    def close(self) -> None:
+        if self._book is not None:
+            try:
+                self._engines[0].close(self._book)
+            finally:
+                self._book = None
@@ -1,4 +1,5 @@
 import sqlite3
+import numpy as np
 import pandas as pd
 import json
 from datetime import datetime
@@ -36,6 +37,31 @@ def init_db():
     columns = [col[1] for col in cursor.fetchall()]
     if 'cliente' not in columns:
         cursor.execute("ALTER TABLE snapshots ADD COLUMN cliente TEXT DEFAULT 'Geral'")
+    # Histórico diário de vendas por cliente (atualização incremental)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_sales (
+            cliente TEXT,
+            canal TEXT,
+            mlb TEXT,
+            titulo TEXT,
+            dia TEXT,
+            logistica TEXT,
+            ads TEXT,
+            unidades INTEGER,
+            receita REAL,
+            linhas INTEGER
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_sales_conta ON daily_sales (cliente, canal)")
+    # Vendas já incluídas no histórico diário (hash de número + data + anúncio)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sale_keys (
+            cliente TEXT,
+            canal TEXT,
+            chave INTEGER
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sale_keys_conta ON sale_keys (cliente, canal)")
     conn.commit()
     conn.close()
 
@@ -69,3 +95,58 @@ def get_history(cliente, canal, limit=10):
     df = pd.read_sql_query(query, conn, params=(cliente, canal, limit))
     conn.close()
     return df
+
+DAILY_COLUMNS = ['mlb', 'titulo', 'dia', 'logistica', 'ads', 'unidades', 'receita', 'linhas']
+
+def load_daily_store(cliente, canal):
+    """
+    Histórico diário salvo da conta.
+    Retorna: (DataFrame com DAILY_COLUMNS, chaves das vendas já incluídas como uint64)
+    """
+    init_db()
+    conn = sqlite3.connect(DB_PATH)
+    query = f"SELECT {', '.join(DAILY_COLUMNS)} FROM daily_sales WHERE cliente = ? AND canal = ?"
+    daily = pd.read_sql_query(query, conn, params=(cliente, canal))
+    keys = conn.execute("SELECT chave FROM sale_keys WHERE cliente = ? AND canal = ?", (cliente, canal)).fetchall()
+    conn.close()
+    daily['dia'] = pd.to_datetime(daily['dia'], format='%Y-%m-%d')
+    return daily, np.array([k[0] for k in keys], dtype=np.int64).view(np.uint64)
+
+def append_daily_store(cliente, canal, daily, keys):
+    """Acrescenta linhas diárias e chaves de vendas novas ao histórico da conta."""
+    init_db()
+    conn = sqlite3.connect(DB_PATH)
+    if len(daily):
+        rows = daily[DAILY_COLUMNS].assign(cliente=cliente, canal=canal, dia=daily['dia'].dt.strftime('%Y-%m-%d'))
+        rows.to_sql('daily_sales', conn, if_exists='append', index=False)
+    if len(keys):
+        signed = np.asarray(keys, dtype=np.uint64).view(np.int64)
+        conn.executemany(
+            "INSERT INTO sale_keys (cliente, canal, chave) VALUES (?, ?, ?)",
+            ((cliente, canal, int(k)) for k in signed),
+        )
+    conn.commit()
+    conn.close()
+
+def daily_store_version(cliente, canal):
+    """
+    Versão do histórico diário da conta: (linhas diárias, último dia, vendas registradas).
+    Muda a cada acréscimo; entra na chave dos caches que leem o histórico.
+    """
+    init_db()
+    conn = sqlite3.connect(DB_PATH)
+    rows, last_day = conn.execute(
+        "SELECT COUNT(*), MAX(dia) FROM daily_sales WHERE cliente = ? AND canal = ?", (cliente, canal)).fetchone()
+    keys = conn.execute(
+        "SELECT COUNT(*) FROM sale_keys WHERE cliente = ? AND canal = ?", (cliente, canal)).fetchone()[0]
+    conn.close()
+    return rows, last_day, keys
+
+def clear_daily_store(cliente, canal):
+    """Apaga o histórico diário da conta (a próxima carga recomeça do zero)."""
+    init_db()
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("DELETE FROM daily_sales WHERE cliente = ? AND canal = ?", (cliente, canal))
+    conn.execute("DELETE FROM sale_keys WHERE cliente = ? AND canal = ?", (cliente, canal))
+    conn.commit()
+    conn.close()
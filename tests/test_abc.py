@@ -0,0 +1,46 @@
+"""
+WhatIfABC: depois de cada edição a curva tem que ser a mesma de abc_codes sobre o
+faturamento editado, inclusive com empates e produtos exatamente nos cortes.
+"""
+import numpy as np
+import pytest
+
+from data_processing.abc import WhatIfABC, abc_codes
+
+# Valores pequenos e repetidos: muitos empates e acumulados caindo exatamente em 80%/95%
+VALUES = [0.0, 0.1, 1.0, 1.5, 3.0, 7.5, 10.0, 15.0, 100.0, 150.0]
+
+
+@pytest.mark.parametrize('seed', range(100))
+def test_every_edit_matches_abc_codes(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 40))
+    whatif = WhatIfABC(rng.choice(VALUES, n))
+    assert (whatif.codes == abc_codes(whatif.revenue)).all()
+
+    for _ in range(200):
+        item = int(rng.integers(n))
+        kind = rng.integers(3)
+        before = whatif.codes.copy()
+        if kind == 0:
+            changed = whatif.set_revenue(item, float(rng.choice(VALUES)))
+        elif kind == 1:
+            changed = whatif.scale(item, float(rng.choice([0.5, 1.1, 2.0, 3.0])))
+        else:
+            changed = whatif.remove(rng.integers(n, size=int(rng.integers(1, 3))))
+
+        expected = abc_codes(whatif.revenue)
+        assert (whatif.codes == expected).all()
+        assert set(changed.tolist()) == set(np.flatnonzero(before != expected).tolist())
+
+
+def test_edits_do_not_accumulate_rounding_error():
+    whatif = WhatIfABC([150, 1.5, 150, 100, 1.5, 3, 1, 7.5, 7.5, 15, 0, 100, 100, 10, 150])
+    rng = np.random.default_rng(1)
+    for _ in range(25):
+        whatif.set_revenue(int(rng.integers(15)), float(rng.choice([0.1, 0.2, 0.3, 1.1, 2.2, 150.0])))
+    whatif.set_revenue(13, 10.0)
+    # Mesmos números que abc_codes usaria, sem deriva das edições anteriores
+    assert whatif._total == whatif.revenue.sum()
+    assert (whatif._cum == np.cumsum(whatif.revenue[whatif._order])).all()
+    assert (whatif.codes == abc_codes(whatif.revenue)).all()
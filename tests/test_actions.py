@@ -0,0 +1,219 @@
+"""
+Equivalência entre as tabelas de regras de data_processing.actions e a lógica
+anterior (suggest_action linha a linha + atribuições .loc por segmento), mantida
+aqui como referência.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processing.actions import ML_PLANS, ML_SUGGESTED, SHOPEE_PLANS, SHOPEE_SUGGESTED, apply_rules
+from data_processing.periods import period_columns
+from data_processing.segments import ML_SEGMENTS, SHOPEE_SEGMENTS, segment_catalog
+
+LABELS = ['0-30', '31-60', '61-90', '91-120']
+CURVES = ['A', 'B', 'C', '-']
+
+
+def random_catalog(n: int = 6000, seed: int = 7) -> pd.DataFrame:
+    """Catálogo com todas as combinações de curva atual x anterior, vendas zeradas e TM vazio."""
+    rng = np.random.default_rng(seed)
+    qty_cols, fat_cols, curve_cols = period_columns(LABELS)
+    data = {'MLB': [f'MLB{i}' for i in range(n)], 'Título': [f'Produto {i}' for i in range(n)]}
+    for q, f, c in zip(qty_cols, fat_cols, curve_cols):
+        qty = rng.integers(0, 4, n) * rng.integers(0, 2, n)
+        data[q] = qty
+        data[f] = np.round(qty * rng.choice([0.0, 9.9, 10.0, 25.5], n), 2)
+        data[c] = rng.choice(CURVES, n)
+    df = pd.DataFrame(data)
+    df['Fat total'] = df[fat_cols].sum(axis=1)
+    df['Qtd total'] = df[qty_cols].sum(axis=1)
+    df['TM total'] = df['Fat total'] / df['Qtd total'].replace(0, np.nan)
+    return df
+
+
+def legacy_plan(df_f: pd.DataFrame, shopee: bool, segments) -> pd.DataFrame:
+    """Ação sugerida e planos 7/15/30 dias como eram calculados antes das tabelas de regras."""
+    CURVE_COLS = period_columns(LABELS)[2]
+    anchors, inactivate, revitalize, rise_to_A, opp_50_60, dead_stock_combo, drop_alert = (
+        segments.frame(name) for name in
+        ('anchors', 'inactivate', 'revitalize', 'rise_to_A', 'opp_50_60', 'dead_stock_combo', 'drop_alert'))
+    plan = df_f.copy()
+
+    def suggest_action(row):
+        c0, c1 = row[CURVE_COLS[0]], row[CURVE_COLS[1]]
+
+        # Para Shopee (sem histórico), usa apenas curva atual
+        if shopee:
+            if c0 == "A":
+                return "Garantir estoque 30d + otimizar fotos/título + avaliar Shopee Ads"
+            elif c0 == "B":
+                return "Testar Shopee Ads com palavras-chave específicas (cauda longa)"
+            elif c0 == "C":
+                # Verifica se tem bom ticket médio (potencial)
+                tm_total = row.get("TM total", 0)
+                if tm_total > 0:
+                    return "Diagnosticar gargalo (CTR/conversão) + melhorar imagens/descrição"
+                else:
+                    return "Testar preço promocional + bundle ou liquidar"
+            elif c0 == "-":
+                # Verifica se teve faturamento (dead stock) ou é inativo
+                fat_total = row.get("Fat total", 0)
+                if fat_total > 0:
+                    return "Criar bundle com produto âncora ou participar Shopee Liquida"
+                else:
+                    return "Testar preço promocional última chance ou desativar"
+            return "-"
+
+        # Para Mercado Livre (com histórico), usa comparação de períodos
+        if c0 == "A" and c1 in ["A", "B"]:
+            return "Garantir estoque 30-60d + completar ficha técnica 100% + avaliar ML Ads"
+        if c0 == "A" and c1 in ["C", "-"]:
+            return "Subiu rápido – validar se é sazonal ou tendência antes de escalar"
+        if c0 == "B" and c1 == "A":
+            return "Caiu de A→B: diagnosticar (CTR/conversão/Buy Box) + corrigir gargalo"
+        if c0 == "B" and c1 in ["B", "C"]:
+            return "Potencial de crescimento: otimizar anúncio (conversão >2%) + testar ML Ads"
+        if c0 == "C":
+            return "Diagnosticar gargalo (foto/preço/descrição) + testar promoção ou kit"
+        if c0 == "-":
+            return "Sem giro: otimizar última chance (preço/foto) ou liquidar e liberar capital"
+        return "-"
+
+    plan["Ação sugerida"] = plan.apply(suggest_action, axis=1)
+
+    actions = pd.DataFrame(index=plan.index)
+    actions["7d"] = "-"
+    actions["15d"] = "-"
+    actions["30d"] = "-"
+
+    # DEFESA - Âncoras (produtos A estáveis)
+    if shopee:
+        actions.loc[anchors.index, "7d"] = "Garantir estoque 30-60d + monitorar taxa resposta (100%) + checar prazo entrega"
+        actions.loc[anchors.index, "15d"] = "Adicionar foto uso real + tabela medidas + responder FAQ na descrição"
+        actions.loc[anchors.index, "30d"] = "Testar Shopee Ads (cauda longa) se ACOS < margem + criar bundle upsell"
+    else:
+        actions.loc[anchors.index, "7d"] = "Estoque 30-60d + monitorar Buy Box + validar reputação (resposta <24h, reclamações <1%)"
+        actions.loc[anchors.index, "15d"] = "Completar ficha técnica 100% + adicionar vídeo 15-30s + organizar variações"
+        actions.loc[anchors.index, "30d"] = "Se conversão >2%: testar ML Ads (cauda longa, ACOS <25-30%) + Full/Flex"
+
+    # CORREÇÃO - Queda de faturamento / Fuga de receita
+    if shopee:
+        actions.loc[drop_alert.index, "7d"] = "Diagnosticar: CTR baixo (imagem/título) ou conversão baixa (descrição/preço/frete)"
+        actions.loc[drop_alert.index, "15d"] = "Testar nova capa (zoom produto + selo benefício) + expandir descrição com FAQ"
+        actions.loc[drop_alert.index, "30d"] = "Participar Flash Sale (margem mín aceitável) + cupom prazo limitado"
+    else:
+        actions.loc[drop_alert.index, "7d"] = "Diagnosticar: CTR <1% (foto/título) ou conversão <2% (preço/descrição/frete) + comparar concorrentes"
+        actions.loc[drop_alert.index, "15d"] = "Corrigir gargalo: foto fundo branco + título otimizado + FAQ na descrição + ajustar preço"
+        actions.loc[drop_alert.index, "30d"] = "Se ajustes não funcionaram: oferta relâmpago ou cupom + responder avaliações negativas"
+
+    # CORREÇÃO - Reativar produtos
+    if shopee:
+        actions.loc[revitalize.index, "7d"] = "Ler avaliações negativas concorrentes + responder todas avaliações negativas"
+        actions.loc[revitalize.index, "15d"] = "Ajustar preço (usar âncora: cheio+desconto) + melhorar capa (fundo limpo)"
+        actions.loc[revitalize.index, "30d"] = "Cupom seguidor (criar base clientes) + monitorar se conversão voltou"
+    else:
+        actions.loc[revitalize.index, "7d"] = "Diagnosticar problema: sem impressões (SEO) ou CTR baixo (foto) + verificar categoria correta"
+        actions.loc[revitalize.index, "15d"] = "Otimizar: título com palavra-chave + ficha técnica 100% + foto fundo branco + vídeo"
+        actions.loc[revitalize.index, "30d"] = "Testar preço promocional (abaixo média) + cupom + monitorar se conversão voltou"
+
+    # ATAQUE - Subindo para A
+    if shopee:
+        actions.loc[rise_to_A.index, "7d"] = "Estoque 30-60d + otimizar anúncio (conversão >2%) antes de investir Ads"
+        actions.loc[rise_to_A.index, "15d"] = "Ativar Shopee Ads: orçamento baixo + palavras cauda longa + monitorar ACOS"
+        actions.loc[rise_to_A.index, "30d"] = "Se ROAS >3: aumentar budget + participar campanhas (11.11, Black Friday)"
+    else:
+        actions.loc[rise_to_A.index, "7d"] = "Estoque 60-90d + validar conversão >2% + completar ficha técnica 100% + Full/Flex"
+        actions.loc[rise_to_A.index, "15d"] = "Ativar ML Ads: orçamento baixo + palavras cauda longa + monitorar ACOS diariamente"
+        actions.loc[rise_to_A.index, "30d"] = "Se ACOS <25-30%: aumentar budget + participar ofertas relâmpago + monitorar posição orgânica"
+
+    # ATAQUE - Oportunidades B/C
+    if shopee:
+        actions.loc[opp_50_60.index, "7d"] = "Calcular margem líquida + ACOS máx aceitável + volume busca categoria"
+        actions.loc[opp_50_60.index, "15d"] = "Testar Ads: termos específicos (ex: 'sapato social preto 40' > 'sapato')"
+        actions.loc[opp_50_60.index, "30d"] = "Ajustar lances (alto rendimento: +lance | baixo: pausar) + criar bundles"
+    else:
+        actions.loc[opp_50_60.index, "7d"] = "Calcular margem líquida + ACOS máx aceitável + otimizar anúncio (conversão >2%)"
+        actions.loc[opp_50_60.index, "15d"] = "Testar ML Ads: termos específicos (ex: 'tênis corrida nike 42' > 'tênis') + monitorar CTR"
+        actions.loc[opp_50_60.index, "30d"] = "Ajustar lances (alto ROAS: +lance | baixo: pausar) + testar kit com produto âncora"
+
+    # LIMPEZA - Combo/Kit
+    if shopee:
+        actions.loc[dead_stock_combo.index, "7d"] = "Analisar: quem comprou também comprou? Pesquisar combos concorrentes"
+        actions.loc[dead_stock_combo.index, "15d"] = "Criar bundle (dead stock + âncora) desconto 10-20% + anúncio novo"
+        actions.loc[dead_stock_combo.index, "30d"] = "Se bundle não funcionou: Shopee Liquida com preço agressivo"
+    else:
+        actions.loc[dead_stock_combo.index, "7d"] = "Analisar: quem comprou também comprou? Pesquisar kits concorrentes + avaliar margem kit"
+        actions.loc[dead_stock_combo.index, "15d"] = "Criar kit (dead stock + âncora) desconto 10-20% + anúncio novo otimizado + variações"
+        actions.loc[dead_stock_combo.index, "30d"] = "Se kit não vendeu: liquidação agressiva (preço abaixo custo) + oferta relâmpago"
+
+    # LIMPEZA - Inativar
+    if shopee:
+        actions.loc[inactivate.index, "7d"] = "Calcular custo oportunidade (capital imobilizado) + verificar se obsoleto"
+        actions.loc[inactivate.index, "15d"] = "Liquidação: preço agressivo + frete grátis + comunicar 'Última Chance'"
+        actions.loc[inactivate.index, "30d"] = "Se não vendeu: desativar + liquidar lote ou doar (crédito fiscal)"
+    else:
+        actions.loc[inactivate.index, "7d"] = "Calcular custo oportunidade (capital imobilizado) + diagnosticar: obsoleto ou anúncio ruim?"
+        actions.loc[inactivate.index, "15d"] = "Liquidação: preço agressivo + frete grátis + comunicar 'Última Chance' + ML Ads baixo orçamento"
+        actions.loc[inactivate.index, "30d"] = "Se não vendeu: desativar + liquidar lote (revendedores) ou doar (crédito fiscal)"
+
+    # OTIMIZAÇÃO - Produtos que não se encaixam em outras frentes
+    # Identificar índices de otimização (todos que não estão nas outras frentes)
+    all_classified = set(anchors.index) | set(drop_alert.index) | set(revitalize.index) | set(rise_to_A.index) | set(opp_50_60.index) | set(dead_stock_combo.index) | set(inactivate.index)
+    optimization_idx = [idx for idx in plan.index if idx not in all_classified]
+
+    for idx in optimization_idx:
+        row = plan.loc[idx]
+        c0 = row.get(CURVE_COLS[0], "-")
+        c1 = row.get(CURVE_COLS[1], "-")
+
+        if c0 == "A":
+            # Produto A que não é âncora - subiu rápido
+            actions.loc[idx, "7d"] = "Validar se é sazonal"
+            actions.loc[idx, "15d"] = "Monitorar tendência"
+            actions.loc[idx, "30d"] = "Decidir estratégia"
+        elif c0 == "B":
+            # Produto B estável ou em transição
+            actions.loc[idx, "7d"] = "Analisar histórico"
+            actions.loc[idx, "15d"] = "Testar otimização"
+            actions.loc[idx, "30d"] = "Avaliar promoção"
+        elif c0 == "C":
+            # Produto C - baixo volume
+            actions.loc[idx, "7d"] = "Revisar preço"
+            actions.loc[idx, "15d"] = "Testar destaque"
+            actions.loc[idx, "30d"] = "Avaliar combo"
+        else:
+            # Sem vendas recentes
+            actions.loc[idx, "7d"] = "Verificar anúncio"
+            actions.loc[idx, "15d"] = "Ajustar estratégia"
+            actions.loc[idx, "30d"] = "Decidir manter/remover"
+
+    plan["Plano 7 dias"] = actions["7d"]
+    plan["Plano 15 dias"] = actions["15d"]
+    plan["Plano 30 dias"] = actions["30d"]
+
+    return plan
+
+
+@pytest.mark.parametrize('shopee', [False, True], ids=['mercado_livre', 'shopee'])
+def test_rule_tables_match_legacy_rules(shopee):
+    df_f = random_catalog()
+    segments = segment_catalog(df_f, LABELS, SHOPEE_SEGMENTS if shopee else ML_SEGMENTS)
+    expected = legacy_plan(df_f, shopee, segments)
+
+    # O catálogo cobre todas as combinações de curva atual x anterior, todos os segmentos
+    # e produtos em mais de um segmento (onde a precedência das regras importa)
+    curve_cols = period_columns(LABELS)[2]
+    pairs = set(zip(df_f[curve_cols[0]], df_f[curve_cols[1]]))
+    assert pairs == {(a, b) for a in CURVES for b in CURVES}
+    assert segments.masks.any(axis=0).all()
+    assert (segments.masks.sum(axis=1) > 1).any()
+    if not shopee:
+        # Na Shopee todo produto cai em algum segmento; no ML sobram produtos de todas as curvas
+        assert set(df_f.loc[~segments.classified(), curve_cols[0]]) == set(CURVES)
+
+    (suggested,) = apply_rules(SHOPEE_SUGGESTED if shopee else ML_SUGGESTED, segments)
+    plan_7, plan_15, plan_30 = apply_rules(SHOPEE_PLANS if shopee else ML_PLANS, segments)
+    for column, values in [('Ação sugerida', suggested), ('Plano 7 dias', plan_7),
+                           ('Plano 15 dias', plan_15), ('Plano 30 dias', plan_30)]:
+        np.testing.assert_array_equal(values, expected[column].to_numpy(dtype=object), err_msg=column)
@@ -0,0 +1,188 @@
+"""
+parse_number e detect_decimal_separator contra os conversores anteriores: o
+parse_brl/parse_pct da Shopee (célula a célula) e a conversão da coluna de
+receita do Mercado Livre (separador escolhido pela coluna inteira). parse_dates
+contra a cadeia anterior de tentativas para 'Data da venda'.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processing.parsing import MONTHS_PT, detect_decimal_separator, parse_dates, parse_number
+
+
+def legacy_brl(value):
+    """parse_brl da Shopee: "1.234,56" -> 1234.56, inválido -> 0."""
+    if pd.isna(value):
+        return 0.0
+    value_str = str(value).replace('.', '').replace(',', '.')
+    try:
+        return float(value_str)
+    except ValueError:
+        return 0.0
+
+
+def legacy_pct(value):
+    """parse_pct da Shopee: "31,93%" -> 0.3193, inválido -> 0."""
+    if pd.isna(value):
+        return 0.0
+    value_str = str(value).replace('%', '').replace(',', '.')
+    try:
+        return float(value_str) / 100
+    except ValueError:
+        return 0.0
+
+
+def legacy_ml_revenue(rec: pd.Series) -> pd.Series:
+    """Receita do relatório do Mercado Livre: separador decidido pela coluna inteira."""
+    rec = rec.astype(str).str.replace('\u00a0', '', regex=False).str.strip()
+    if rec.str.contains(r'\.', regex=True).any() and rec.str.contains(r',', regex=True).any():
+        rec = rec.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    elif rec.str.contains(r',', regex=True).any():
+        rec = rec.str.replace(',', '.', regex=False)
+    rec = rec.str.replace(r'[R\$\s]', '', regex=True)
+    return pd.to_numeric(rec, errors='coerce').fillna(0.0)
+
+
+def brl(value: float) -> str:
+    return f"{value:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+
+
+def random_amounts(n: int = 3000, seed: int = 11) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.round(rng.choice([1, 100, 10_000, 1_000_000], n) * rng.random(n), 2)
+
+
+def test_brl_text_matches_shopee_parser():
+    values = pd.Series([brl(v) for v in random_amounts()] + ['0,00', '12,5'], dtype=object)
+    parsed, invalid = parse_number(values)
+    assert parsed.tolist() == values.map(legacy_brl).tolist()
+    assert invalid.empty
+
+
+def test_percent_text_matches_shopee_parser():
+    rng = np.random.default_rng(2)
+    values = pd.Series([f"{v:.2f}%".replace('.', ',') for v in rng.random(2000) * 100], dtype=object)
+    parsed, invalid = parse_number(values, percent=True)
+    assert np.allclose(parsed, values.map(legacy_pct))
+    assert invalid.empty
+
+
+@pytest.mark.parametrize('style', ['brl', 'brl_currency', 'comma_decimal', 'plain'])
+def test_revenue_column_matches_ml_parser(style):
+    amounts = random_amounts()
+    text = {
+        'brl': [brl(v) for v in amounts],
+        'brl_currency': [f"R$ {brl(v)}" for v in amounts],
+        'comma_decimal': [f"{v:.2f}".replace('.', ',') for v in amounts],
+        'plain': [f"{v:.2f}" for v in amounts],
+    }[style]
+    values = pd.Series(text, dtype=object)
+    parsed, invalid = parse_number(values)
+    assert parsed.tolist() == legacy_ml_revenue(values).tolist()
+    assert invalid.empty
+
+
+def test_numeric_cells_are_kept():
+    values = pd.Series([1234.56, 10, None, 0.5], dtype=object)
+    parsed, invalid = parse_number(values)
+    assert parsed.tolist()[:2] == [1234.56, 10.0] and np.isnan(parsed[2]) and parsed[3] == 0.5
+    assert invalid.empty
+    numeric = pd.Series([1.5, 2.0])
+    assert parse_number(numeric)[0].tolist() == [1.5, 2.0]
+
+
+def test_invalid_cells_are_reported_and_empty_markers_are_not():
+    values = pd.Series(['1.234,56', 'abc', '-', '', None, 'R$ 10,00', 'abc', 'n/d'], dtype=object)
+    parsed, invalid = parse_number(values)
+    assert parsed[0] == 1234.56 and parsed[5] == 10.0
+    assert parsed[[1, 2, 3, 4, 6, 7]].isna().all()
+    assert invalid.to_dict() == {1: 'abc', 6: 'abc', 7: 'n/d'}
+
+
+@pytest.mark.parametrize('values, expected', [
+    (['1.234,56', '10,00'], ','),
+    (['1,234.56', '10.00'], '.'),
+    (['1234,56', '7,5'], ','),
+    (['1.234', '12.345.678'], ','),
+    (['1.234', '12.5'], '.'),
+    (['1234', '56'], '.'),
+    (['1.234,56', '1,234.56', '2.000,00'], ','),
+])
+def test_detect_decimal_separator(values, expected):
+    assert detect_decimal_separator(pd.Series(values, dtype=object)) == expected
+
+
+def test_decimal_can_be_fixed():
+    values = pd.Series(['1.234', '5.000'], dtype=object)
+    assert parse_number(values)[0].tolist() == [1234.0, 5000.0]
+    assert parse_number(values, decimal='.')[0].tolist() == [1.234, 5.0]
+
+
+def legacy_dates(raw: pd.Series) -> pd.Series:
+    """'Data da venda' como era convertida antes: dayfirst, formatos fixos e, por último, meses por extenso."""
+    raw = raw.astype(str)
+    # O parser antigo caía no dateutil célula a célula (e avisava a cada chamada)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        data = pd.to_datetime(raw, errors='coerce', dayfirst=True)
+
+    if data.notna().sum() == 0:
+        for fmt in ('%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y'):
+            tmp = pd.to_datetime(raw, errors='coerce', format=fmt)
+            if tmp.notna().sum() > 0:
+                data = tmp
+                break
+
+    if data.notna().sum() == 0:
+        month_map = {name: f'{num:02d}' for name, num in MONTHS_PT.items()}
+        s = raw.str.lower()
+        s = s.str.replace('hs.', '', regex=False).str.replace('hs', '', regex=False)
+        for name, num in month_map.items():
+            s = s.str.replace(rf'\b{name}\b', num, regex=True)
+        s = s.str.replace(r'\s*de\s*', '/', regex=True)
+        s = s.str.replace(r'\s+', ' ', regex=True).str.strip()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            tmp = pd.to_datetime(s, errors='coerce', dayfirst=True)
+        if tmp.notna().sum() > 0:
+            data = tmp
+    return data
+
+
+def random_timestamps(n: int = 2000, seed: int = 17) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    minutes = rng.integers(0, 300 * 1440, n)
+    return pd.Series(pd.Timestamp('2025-03-01') + pd.to_timedelta(minutes, unit='m'))
+
+
+@pytest.mark.parametrize('style', ['pt', 'pt_no_time', 'dmy_hms', 'dmy_hm', 'dmy', 'excel'])
+def test_sale_dates_match_legacy_parser(style):
+    stamps = random_timestamps()
+    months = {num: name for name, num in MONTHS_PT.items() if name != 'marco'}
+    if style == 'excel':
+        values = pd.Series(list(stamps), dtype=object)
+    else:
+        fmt = {
+            'pt': lambda d: f"{d.day} de {months[d.month]} de {d.year} {d.hour:02d}:{d.minute:02d} hs.",
+            'pt_no_time': lambda d: f"{d.day} de {months[d.month]} de {d.year}",
+            'dmy_hms': lambda d: d.strftime('%d/%m/%Y %H:%M:%S'),
+            'dmy_hm': lambda d: d.strftime('%d/%m/%Y %H:%M'),
+            'dmy': lambda d: d.strftime('%d/%m/%Y'),
+        }[style]
+        values = pd.Series([fmt(d) for d in stamps], dtype=object)
+    # Células vazias no meio da coluna
+    values[::97] = None
+
+    got = parse_dates(values)
+    expected = legacy_dates(values)
+    assert got.isna().equals(expected.isna())
+    assert (got.dropna() == expected.dropna()).all()
+    assert got.notna().sum() == len(values) - len(values[::97])
+
+
+def test_datetime_column_is_returned_as_is():
+    stamps = random_timestamps(10)
+    assert parse_dates(stamps) is stamps
@@ -0,0 +1,108 @@
+"""
+PeriodEngine e parse_windows contra a atribuição anterior (dias desde a última
+venda e bucket linha a linha com if/elif sobre as bordas das janelas), e
+flag_totals contra as somas por período e máscara de logística/Ads.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processing.periods import (DEFAULT_WINDOWS, PeriodEngine, flag_totals, parse_windows, period_labels,
+                                     weekly_windows)
+
+
+def random_dates(n: int = 5000, seed: int = 3) -> pd.Series:
+    """Vendas com hora ao longo de 200 dias, incluindo datas vazias."""
+    rng = np.random.default_rng(seed)
+    seconds = rng.integers(0, 200 * 86400, n)
+    dates = pd.Series(pd.Timestamp('2025-06-01') + pd.to_timedelta(seconds, unit='s'))
+    dates[rng.random(n) < 0.05] = pd.NaT
+    return dates
+
+
+def legacy_periods(dates: pd.Series, edges, ref=None) -> list:
+    """Período de cada venda como era calculado antes do PeriodEngine."""
+    if ref is None:
+        ref = dates.max()
+    days = (ref - dates).dt.days
+    labels = period_labels(edges)
+
+    def bucket(d):
+        if d < 0:
+            return None
+        for label, edge in zip(labels, edges):
+            if d <= edge:
+                return label
+        return None
+
+    return days.apply(bucket).tolist()
+
+
+def as_list(periods: pd.Series) -> list:
+    return [None if pd.isna(p) else p for p in periods]
+
+
+@pytest.mark.parametrize('edges', [DEFAULT_WINDOWS, tuple(weekly_windows(12)), (7, 14, 30, 60, 90, 120), (0, 1, 2)])
+def test_assign_matches_legacy_buckets(edges):
+    dates = random_dates()
+    assert as_list(PeriodEngine(edges).assign(dates)) == legacy_periods(dates, edges)
+
+
+def test_reference_counts_the_whole_day_and_drops_later_sales():
+    dates = random_dates()
+    reference = pd.Timestamp('2025-10-15')
+    got = PeriodEngine(DEFAULT_WINDOWS, reference).assign(dates)
+    # Fim do dia de referência: vendas da própria data ficam no dia 0
+    end_of_day = reference + pd.Timedelta(days=1) - pd.Timedelta(1, 'ns')
+    assert as_list(got) == legacy_periods(dates, DEFAULT_WINDOWS, end_of_day)
+    assert got[dates > end_of_day].isna().all()
+    assert (got[dates.dt.normalize() == reference] == '0-30').all()
+
+
+def test_codes_and_labels():
+    engine = PeriodEngine((7, 14, 30))
+    assert engine.labels == ['0-7', '8-14', '15-30']
+    dates = pd.Series(pd.to_datetime(['2025-01-31', '2025-01-24', '2025-01-23', '2025-01-01', '2024-12-31', None]))
+    assert engine.codes(dates).tolist() == [0, 0, 1, 2, -1, -1]
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('7, 14, 30, 60', [7, 14, 30, 60]),
+    ('7;14 30', [7, 14, 30]),
+    (' 30,60,,90 ', [30, 60, 90]),
+])
+def test_parse_windows(text, expected):
+    assert parse_windows(text) == expected
+
+
+@pytest.mark.parametrize('text', ['7, a, 30', '7.5, 14'])
+def test_parse_windows_rejects_non_integers(text):
+    with pytest.raises(ValueError):
+        parse_windows(text)
+
+
+@pytest.mark.parametrize('edges', [(), (30, 30, 60), (60, 30), (-1, 30)])
+def test_engine_rejects_invalid_windows(edges):
+    with pytest.raises(ValueError):
+        PeriodEngine(edges)
+
+
+def test_flag_totals_match_masked_sums_per_period():
+    rng = np.random.default_rng(5)
+    dates = random_dates()
+    periodo = PeriodEngine(DEFAULT_WINDOWS).assign(dates)
+    n = len(dates)
+    # Flags sobrepostas, como 'full' e 'ads'
+    flags = {name: rng.random(n) < share for name, share in [('full', 0.4), ('flex', 0.2), ('ads', 0.3)]}
+    values = {'unidades': pd.Series(rng.integers(1, 4, n)), 'receita': pd.Series(np.round(rng.random(n) * 200, 2))}
+
+    got = flag_totals(periodo, flags, values)
+    for measure, column in values.items():
+        table = got[measure]
+        assert list(table.index) == period_labels(DEFAULT_WINDOWS)
+        assert list(table.columns) == list(flags) + ['total']
+        for label in table.index:
+            in_period = (periodo == label).to_numpy()
+            for name, mask in flags.items():
+                assert table.loc[label, name] == pytest.approx(column[in_period & mask].sum())
+            assert table.loc[label, 'total'] == pytest.approx(column[in_period].sum())
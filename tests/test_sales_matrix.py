@@ -0,0 +1,210 @@
+"""
+Leitura dos relatórios brutos do Mercado Livre contra o cálculo direto sobre as
+vendas: junção de relatórios sobrepostos sem contar vendas duas vezes, e a
+SalesMatrix contra a agregação anterior (bucket por dias até a última venda,
+groupby/pivot_table por anúncio e laço de logística/Ads por período). A curva
+ABC móvel contra abc_codes sobre a receita de cada janela, dia a dia. O modo
+incremental contra a leitura de todos os relatórios de uma vez.
+"""
+import io
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from data_processing.abc import abc_codes
+from data_processing.layouts import LayoutRegistry
+from data_processing.mercado_livre_processor import MercadoLivreProcessor, dedupe_sales
+from data_processing.periods import DEFAULT_WINDOWS, PeriodEngine, period_labels
+from data_processing.workbook import ParsedWorkbook
+
+MONTHS = ['janeiro', 'fevereiro', 'março', 'abril', 'maio', 'junho', 'julho',
+          'agosto', 'setembro', 'outubro', 'novembro', 'dezembro']
+HEADER = ['N.º de venda', 'Data da venda', 'Estado', 'Unidades', 'Receita por produtos (BRL)',
+          'Tarifa de venda', '# de anúncio', 'SKU', 'Título do anúncio', 'Venda por publicidade',
+          'Forma de entrega']
+LOGISTICS = ['Mercado Envios Full', 'Correios e pontos de envio', 'Mercado Envios Flex', 'Coleta', 'Retirada']
+START = datetime(2025, 9, 1)
+
+
+def random_sales(n: int = 3000, days: int = 150, seed: int = 1) -> pd.DataFrame:
+    """Vendas com número, hora, anúncio (40 anúncios), Ads e forma de entrega."""
+    rng = np.random.default_rng(seed)
+    sku = rng.integers(0, 40, n)
+    unidades = rng.choice([1, 1, 2, 3], n)
+    return pd.DataFrame({
+        'venda': 2_000_000_000 + np.arange(n),
+        'data': [START + timedelta(days=int(d), minutes=int(m))
+                 for d, m in zip(rng.integers(0, days, n), rng.integers(0, 1440, n))],
+        'unidades': unidades,
+        'receita': np.round(unidades * (10 + sku * 1.7), 2),
+        'mlb': [f'MLB{1_000_000 + k}' for k in sku],
+        'titulo': [f'Produto {k}' for k in sku],
+        'ads': np.where(rng.random(n) < 0.3, 'Sim', None),
+        'logistica': rng.choice(LOGISTICS, n),
+    })
+
+
+def ml_report(sales: pd.DataFrame) -> ParsedWorkbook:
+    """Relatório de vendas no layout do Mercado Livre (datas por extenso)."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Vendas BR')
+    ws.append(['Relatório de vendas'])
+    ws.append([])
+    ws.append(['Vendas'])
+    ws.append(HEADER)
+    for s in sales.itertuples():
+        d = s.data
+        date = f"{d.day} de {MONTHS[d.month - 1]} de {d.year} {d.hour:02d}:{d.minute:02d} hs."
+        venda = None if pd.isna(s.venda) else int(s.venda)
+        ws.append([venda, date, 'Entregue', int(s.unidades), float(s.receita), -1.5,
+                   s.mlb, f'SKU-{s.mlb}', s.titulo, s.ads, s.logistica])
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return ParsedWorkbook(buffer.getvalue())
+
+
+@pytest.fixture
+def processor(tmp_path):
+    return MercadoLivreProcessor(layouts=LayoutRegistry(str(tmp_path / 'layouts.json')))
+
+
+def totals(matrix) -> pd.DataFrame:
+    """Unidades, receita e vendas por anúncio e dia (para comparar matrizes)."""
+    frame = pd.DataFrame({
+        'mlb': matrix.skus['mlb'].to_numpy()[matrix.sku],
+        'day': matrix.start + pd.to_timedelta(matrix.day, unit='D'),
+        **{layer: matrix.layers[layer] for layer in ('unidades', 'receita', 'linhas')},
+    })
+    return frame.sort_values(['mlb', 'day']).reset_index(drop=True)
+
+
+def test_dedupe_drops_sales_seen_in_earlier_reports(processor):
+    sales = random_sales()
+    first = sales.iloc[:2000]
+    # Segundo relatório repete 500 vendas do primeiro; repetições dentro do mesmo relatório ficam
+    second = pd.concat([sales.iloc[1500:], sales.iloc[2900:]])
+    frames = [processor.read_sales(ml_report(first)), processor.read_sales(ml_report(second))]
+
+    got = dedupe_sales(frames)
+
+    # Referência: (venda, data, anúncio) já visto em um relatório anterior
+    seen, kept = set(), []
+    for frame in frames:
+        keys = list(zip(frame['venda'].astype(str), frame['data'], frame['mlb'].astype(str)))
+        kept.append(frame[[key not in seen for key in keys]])
+        seen.update(keys)
+    expected = pd.concat(kept, ignore_index=True)
+
+    assert len(got) == len(sales) + 100
+    for col in ('venda', 'mlb', 'titulo', 'logistica'):
+        assert got[col].astype(str).tolist() == expected[col].astype(str).tolist()
+    assert got['data'].tolist() == expected['data'].tolist()
+    assert got['receita'].tolist() == expected['receita'].tolist()
+
+
+def test_overlapping_reports_match_one_report_with_every_sale(processor):
+    sales = random_sales()
+    merged = processor.read_matrix([ml_report(sales.iloc[:2000]), ml_report(sales.iloc[1200:])])
+    assert processor.duplicate_sales == 800
+    single = MercadoLivreProcessor(layouts=processor.layouts).read_matrix([ml_report(sales)])
+    pd.testing.assert_frame_equal(totals(merged), totals(single))
+
+
+def legacy_base(sales: pd.DataFrame, edges=DEFAULT_WINDOWS) -> pd.DataFrame:
+    """Vendas com período e flags como eram classificadas antes da SalesMatrix (dias por data)."""
+    base = sales.copy()
+    dias = (base['data'].max().normalize() - base['data'].dt.normalize()).dt.days
+    labels = period_labels(edges)
+
+    def bucket(d):
+        for label, edge in zip(labels, edges):
+            if d <= edge:
+                return label
+        return None
+
+    base['periodo'] = dias.apply(bucket)
+    base = base.dropna(subset=['periodo'])
+    log_lower = base['logistica'].str.lower()
+    base['is_full'] = log_lower.str.contains('full', na=False)
+    base['is_correios'] = log_lower.str.contains('correios|pontos|ponto de envio', na=False)
+    base['is_flex'] = log_lower.str.contains('flex', na=False)
+    base['is_coleta'] = log_lower.str.contains('coleta', na=False)
+    base['is_outros'] = ~(base['is_full'] | base['is_correios'] | base['is_flex'] | base['is_coleta'])
+    base['is_ads'] = base['ads'].astype(str).str.strip().str.lower().isin(['sim', 's', 'yes', 'y', '1', 'true', 'si'])
+    return base
+
+
+def test_period_matrix_matches_legacy_pivot(processor):
+    sales = random_sales()
+    matrix = processor.read_matrix([ml_report(sales)])
+    got = matrix.period_matrix(PeriodEngine(DEFAULT_WINDOWS))
+
+    base = legacy_base(sales)
+    for flag, suffix in [(None, ''), ('is_full', '_full'), ('is_ads', '_ads')]:
+        rows = base if flag is None else base[base[flag]]
+        for measure in ('unidades', 'receita'):
+            pivot = rows.pivot_table(index=['mlb', 'titulo'], columns='periodo', values=measure,
+                                     aggfunc='sum', fill_value=0)
+            pivot = pivot.reindex(index=pd.MultiIndex.from_frame(got.keys), columns=got.periods, fill_value=0)
+            assert np.allclose(got[measure + suffix], pivot.to_numpy()), measure + suffix
+    assert len(got) == base.groupby(['mlb', 'titulo']).ngroups
+
+
+def test_channel_totals_match_legacy_logistics_loop(processor):
+    sales = random_sales()
+    matrix = processor.read_matrix([ml_report(sales)])
+    got = matrix.channel_totals(PeriodEngine(DEFAULT_WINDOWS))
+
+    base = legacy_base(sales)
+    for periodo in period_labels(DEFAULT_WINDOWS):
+        periodo_df = base[base['periodo'] == periodo]
+        for measure in ('unidades', 'receita'):
+            table = got[measure]
+            for name in ('full', 'correios', 'flex', 'coleta', 'outros', 'ads'):
+                expected = periodo_df[periodo_df['is_' + name]][measure].sum()
+                assert table.loc[periodo, name] == pytest.approx(expected)
+            assert table.loc[periodo, 'total'] == pytest.approx(periodo_df[measure].sum())
+        assert got['linhas'].loc[periodo, 'total'] == len(periodo_df)
+
+
+@pytest.mark.parametrize('edge', [0, 6, 30, 200])
+def test_rolling_abc_matches_abc_codes_per_window(processor, edge):
+    sales = random_sales(n=1500, days=90, seed=7)
+    matrix = processor.read_matrix([ml_report(sales)])
+    got = matrix.rolling_abc(edge)
+    assert got.shape == (len(matrix.skus), matrix.n_days)
+
+    day = (sales['data'].dt.normalize() - sales['data'].min().normalize()).dt.days
+    mlbs = matrix.skus['mlb'].tolist()
+    for d in range(matrix.n_days):
+        window = sales[((day <= d) & (day >= d - edge)).to_numpy()]
+        revenue = window.groupby('mlb')['receita'].sum().reindex(mlbs, fill_value=0.0)
+        assert (got[:, d] == abc_codes(revenue.to_numpy())).all(), d
+
+
+def test_incremental_update_matches_reading_every_report(processor):
+    sales = random_sales(n=4000, days=150)
+    old = sales[sales['data'] < START + timedelta(days=100)]
+    # Exportação nova: repete 20 dias do histórico e traz vendas sem número
+    new = sales[sales['data'] >= START + timedelta(days=80)].astype({'venda': object})
+    new.iloc[::10, new.columns.get_loc('venda')] = None
+
+    processor.update_matrix([ml_report(old)], pd.DataFrame(), np.empty(0, dtype=np.uint64))
+    daily, keys = processor.new_daily, processor.new_keys
+    assert len(keys) == len(old)
+    updated = processor.update_matrix([ml_report(new)], daily, keys)
+    keys = np.union1d(keys, processor.new_keys)
+
+    # Sem número de venda só contam depois do último dia do histórico
+    after_history = new['data'] >= old['data'].max().normalize() + pd.Timedelta(days=1)
+    expected = MercadoLivreProcessor(layouts=processor.layouts).read_matrix(
+        [ml_report(old), ml_report(new[new['venda'].notna() | after_history])])
+    pd.testing.assert_frame_equal(totals(updated), totals(expected))
+
+    # Reenviar a mesma exportação não acrescenta nada
+    again = processor.update_matrix([ml_report(new)], processor.daily, keys)
+    assert len(processor.new_daily) == 0 and len(processor.new_keys) == 0
+    pd.testing.assert_frame_equal(totals(again), totals(expected))
@@ -302,9 +302,10 @@ def render_shopee_top_rejection_rate(df_export: pd.DataFrame):
     """, unsafe_allow_html=True)
 
 
-def render_shopee_top_products(df_export: pd.DataFrame, top_n: int = 10):
+def render_shopee_top_products(df_export: pd.DataFrame, top_n: int = 10, curve_col: str = 'Curva 0-30'):
     """
     Renderiza tabela de top produtos da Shopee.
+    `curve_col` é a coluna de curva da janela atual.
     """
     st.markdown("""
     <div class="section-box">
@@ -328,7 +329,7 @@ def render_shopee_top_products(df_export: pd.DataFrame, top_n: int = 10):
         'Faturamento': df_top['Fat total'].apply(lambda x: f"R$ {x:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")),
         'Unidades': df_top['Qtd total'].apply(lambda x: f"{int(x):,}".replace(",", ".")),
         'Ticket Médio': df_top['TM total'].apply(lambda x: f"R$ {x:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")),
-        'Curva': df_top['Curva 0-30'],
+        'Curva': df_top[curve_col],
         'Taxa Conversão': df_top['_shopee_taxa_conversao'].apply(lambda x: f"{x*100:.2f}%"),
         'Visitantes': df_top['_shopee_visitantes'].apply(lambda x: f"{int(x):,}".replace(",", "."))
     })
@@ -336,9 +337,10 @@ def render_shopee_top_products(df_export: pd.DataFrame, top_n: int = 10):
     st.dataframe(df_display, use_container_width=True, hide_index=True, height=400)
 
 
-def render_shopee_abc_distribution(df_export: pd.DataFrame):
+def render_shopee_abc_distribution(df_export: pd.DataFrame, curve_col: str = 'Curva 0-30'):
     """
     Renderiza distribuição da curva ABC para Shopee.
+    `curve_col` é a coluna de curva da janela atual.
     """
     st.markdown("""
     <div class="section-box">
@@ -353,8 +355,8 @@ def render_shopee_abc_distribution(df_export: pd.DataFrame):
     """, unsafe_allow_html=True)
     
     # Conta produtos por curva
-    curva_counts = df_export['Curva 0-30'].value_counts()
-    curva_revenue = df_export.groupby('Curva 0-30')['Fat total'].sum()
+    curva_counts = df_export[curve_col].value_counts()
+    curva_revenue = df_export.groupby(curve_col)['Fat total'].sum()
     
     # Cria DataFrame para visualização
     curva_data = pd.DataFrame({